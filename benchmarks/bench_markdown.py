@@ -0,0 +1,114 @@
+"""Micro-benchmark of the docs viewer Markdown renderer.
+
+Compares the single-pass inline tokenizer in
+`entrega2/interactive_menu/utils/markdown_formatter.py` with the previous
+chain of regex substitutions (kept below as `legacy_format_markdown_line`),
+on the repository's Markdown files repeated up to `--lines` lines. Also
+reports how many lines render differently and the cost of a cached re-render
+(`render_cached`).
+
+Usage:
+    python benchmarks/bench_markdown.py
+    python benchmarks/bench_markdown.py --lines 500000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+ROOT = Path(__file__).resolve().parents[1]
+MENU_DIR = ROOT / "entrega2" / "interactive_menu"
+if str(MENU_DIR) not in sys.path:
+    sys.path.insert(0, str(MENU_DIR))
+
+from utils import markdown_formatter  # noqa: E402
+from utils.colors import Colors  # noqa: E402
+
+
+def legacy_format_markdown_line(line: str) -> str:
+    """The regex chain `format_markdown_line` used before the tokenizer."""
+    text = line.strip()
+    if text.startswith("### "):
+        return f"{Colors.YELLOW}{Colors.BOLD}{text[4:]}{Colors.RESET}"
+    text = re.sub(r'\*\*(.+?)\*\*', rf'{Colors.BOLD}\1{Colors.RESET}', text)
+    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', rf'{Colors.UNDERLINE}\1{Colors.RESET}', text)
+    text = re.sub(r'`(.+?)`', rf'{Colors.CYAN}\1{Colors.RESET}', text)
+    if text.startswith("* ") or text.startswith("- "):
+        return f"  {Colors.GREEN}•{Colors.RESET} {text[2:]}"
+    if re.match(r'^\d+\.\s', text):
+        return f"  {Colors.GREEN}{text}{Colors.RESET}"
+    if text.startswith("---") or text == "=" * len(text):
+        return f"{Colors.BLUE}{'─' * 60}{Colors.RESET}"
+    text = re.sub(r'\[(.+?)\]\((.+?)\)', rf'{Colors.BLUE}{Colors.UNDERLINE}\1{Colors.RESET}', text)
+    return text if text else ""
+
+
+def corpus_lines() -> List[str]:
+    """Lines of every Markdown file in the repository."""
+    lines: List[str] = []
+    for path in sorted(ROOT.rglob("*.md")):
+        if any(part.startswith(".") for part in path.relative_to(ROOT).parts):
+            continue
+        lines.extend(path.read_text(encoding="utf-8").splitlines())
+    return lines
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n_lines: int = 200_000, repeat: int = 3) -> Dict[str, float]:
+    base = corpus_lines()
+    lines = (base * (n_lines // max(len(base), 1) + 1))[:n_lines]
+
+    def render(fmt: Callable[[str], str]) -> Callable[[], object]:
+        return lambda: [fmt(line) for line in lines]
+
+    legacy = best_of(render(legacy_format_markdown_line), repeat)
+    tokenizer = best_of(render(markdown_formatter.format_markdown_line), repeat)
+
+    markdown_formatter._render_cache.clear()
+    key = ("bench", n_lines)
+    consume: Callable[[Iterable[str]], object] = lambda it: sum(1 for _ in it)
+    consume(markdown_formatter.render_cached(key, lambda: markdown_formatter.render_content(lines)))
+    cached = best_of(lambda: consume(markdown_formatter.render_cached(key, lambda: [])), repeat)
+
+    diff = sum(legacy_format_markdown_line(l) != markdown_formatter.format_markdown_line(l) for l in base)
+    return {
+        "lines": float(len(lines)),
+        "legacy_s": legacy,
+        "tokenizer_s": tokenizer,
+        "cached_s": cached,
+        "speedup": legacy / tokenizer if tokenizer else float("inf"),
+        "corpus_lines": float(len(base)),
+        "corpus_diff": float(diff),
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    res = run(args.lines, args.repeat)
+    n = res["lines"]
+    print(f"{int(n)} lines")
+    print(f"  regex chain : {res['legacy_s'] * 1e3:8.1f} ms  ({n / res['legacy_s']:,.0f} lines/s)")
+    print(f"  tokenizer   : {res['tokenizer_s'] * 1e3:8.1f} ms  ({n / res['tokenizer_s']:,.0f} lines/s)  x{res['speedup']:.1f}")
+    print(f"  cached view : {res['cached_s'] * 1e3:8.1f} ms")
+    print(f"  corpus lines rendered differently: {int(res['corpus_diff'])} of {int(res['corpus_lines'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+"""Scaling benchmark for the data utilities on synthetic data.
+
+For each scale (number of sales; detail rows are ~2.85x that) the synthetic
+dataset from `src/synthetic.py` is written to a temporary directory and each
+function below is timed on it:
+
+- load_csv       (data.load_csv on detalle_ventas.csv)
+- summarize_df   (data.summarize_df on detalle_ventas)
+- clean_df       (data.clean_df on detalle_ventas)
+- inventory_db   (inventory.inventory_db over the four CSVs)
+- compute_rfm    (mi_analisis.compute_rfm on ventas + detalle + clientes)
+
+Each measurement records wall time, tracemalloc peak (NumPy and pandas
+report their buffers to tracemalloc) and throughput in rows/s. A run is
+appended to a JSON history; `--check` compares it with the previous run at
+the same scales and fails if any function got slower than `--tolerance`.
+
+Usage:
+    python benchmarks/bench_scaling.py --scales 1e4 1e5 1e6
+    python benchmarks/bench_scaling.py --scales 1e5 --check
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+HISTORY_PATH = ROOT / "benchmarks" / "history.json"
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.25
+
+
+def measure(func: Callable[[], Any], rows: int) -> Dict[str, float]:
+    """Run `func` once and return wall time, peak traced memory and throughput."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        func()
+    finally:
+        wall = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "rows": rows,
+        "wall_s": round(wall, 6),
+        "peak_mb": round(peak / 2**20, 3),
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+    }
+
+
+def bench_scale(n_ventas: int, workdir: Path, seed: int = 0) -> List[Dict[str, Any]]:
+    """Benchmark every function at one scale."""
+    from src import data, inventory, mi_analisis, synthetic
+
+    frames = synthetic.generate_dataset(n_ventas, seed=seed)
+    paths = {}
+    for name, df in frames.items():
+        paths[name] = workdir / f"{name}.csv"
+        df.to_csv(paths[name], index=False)
+    detalle, ventas, clientes = frames["detalle_ventas"], frames["ventas"], frames["clientes"]
+    n_det = len(detalle)
+    total_rows = sum(len(df) for df in frames.values())
+
+    cases: List[Tuple[str, int, Callable[[], Any]]] = [
+        ("load_csv", n_det, lambda: data.load_csv(paths["detalle_ventas"])),
+        ("summarize_df", n_det, lambda: data.summarize_df(detalle)),
+        ("clean_df", n_det, lambda: data.clean_df(detalle)),
+        ("inventory_db", total_rows, lambda: inventory.inventory_db(workdir)),
+        ("compute_rfm", len(ventas), lambda: mi_analisis.compute_rfm(ventas, detalle, clientes)),
+    ]
+    results = []
+    for name, rows, func in cases:
+        res = measure(func, rows)
+        res.update({"func": name, "scale": n_ventas})
+        results.append(res)
+        print(f"{name:<13} scale={n_ventas:<10} rows={rows:<10} {res['wall_s']:9.3f} s "
+              f"{res['peak_mb']:9.1f} MB {res['rows_per_s'] or 0:12.0f} rows/s")
+    return results
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(path: Path = HISTORY_PATH) -> List[Dict[str, Any]]:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+
+def find_regressions(
+    run: Dict[str, Any], history: Sequence[Dict[str, Any]], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Compare `run` with the latest earlier result for each (func, scale)."""
+    baseline: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for past in history:
+        for res in past["results"]:
+            baseline[(res["func"], res["scale"])] = res
+    problems = []
+    for res in run["results"]:
+        base = baseline.get((res["func"], res["scale"]))
+        if base is None or not base["wall_s"]:
+            continue
+        ratio = res["wall_s"] / base["wall_s"]
+        if ratio > 1 + tolerance:
+            problems.append(
+                f"{res['func']} at scale {res['scale']}: {base['wall_s']:.3f}s -> {res['wall_s']:.3f}s (x{ratio:.2f})"
+            )
+    return problems
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", type=float, default=DEFAULT_SCALES, help="number of sales per run")
+    parser.add_argument("--history", type=Path, default=HISTORY_PATH)
+    parser.add_argument("--check", action="store_true", help="fail if slower than the previous baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(prefix="bench_scaling_") as tmp:
+            results.extend(bench_scale(int(scale), Path(tmp), seed=args.seed))
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    history = load_history(args.history)
+    problems = find_regressions(run, history, args.tolerance) if args.check else []
+    history.append(run)
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    args.history.write_text(json.dumps(history, indent=1), encoding="utf-8")
+    print(f"Appended run to {args.history}")
+
+    for line in problems:
+        print("REGRESSION:", line)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
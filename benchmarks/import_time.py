@@ -0,0 +1,78 @@
+"""Import-time benchmark for the CLI entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each entry point and reports the cumulative import time of the module
+itself, plus which heavy libraries ended up loaded.
+
+Budget: each entry point must import in under IMPORT_BUDGET_MS and must not
+pull in any of HEAVY_MODULES; those are imported inside the functions that
+need them. `tests/test_import_time.py` enforces both.
+
+Usage:
+    python benchmarks/import_time.py
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+ENTRY_POINTS = ["src.mi_analisis", "src.visual", "src.reports", "src.docs"]
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "seaborn"]
+
+# Generous enough for a cold container; pandas + matplotlib + seaborn alone
+# take well over a second.
+IMPORT_BUDGET_MS = 250.0
+
+
+def measure_import(module: str) -> Dict[str, object]:
+    """Import `module` in a fresh interpreter and return its import stats.
+
+    Returns a dict with `module`, `cumulative_ms` (from `-X importtime`) and
+    `heavy` (the HEAVY_MODULES present in `sys.modules` afterwards).
+    """
+    code = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry for {module}:\n{proc.stderr[-2000:]}")
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return {"module": module, "cumulative_ms": cumulative_us / 1000.0, "heavy": heavy}
+
+
+def run(modules: List[str] = ENTRY_POINTS) -> List[Dict[str, object]]:
+    return [measure_import(m) for m in modules]
+
+
+def main() -> int:
+    failed = False
+    for res in run():
+        over = res["cumulative_ms"] > IMPORT_BUDGET_MS or res["heavy"]
+        failed = failed or bool(over)
+        status = "OVER" if over else "ok"
+        heavy = ", ".join(res["heavy"]) or "-"
+        print(f"{res['module']:<20} {res['cumulative_ms']:8.1f} ms  heavy: {heavy:<30} [{status}]")
+    print(f"Budget: {IMPORT_BUDGET_MS:.0f} ms per entry point, no {', '.join(HEAVY_MODULES)} at import")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
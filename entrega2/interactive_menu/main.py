@@ -9,9 +9,48 @@ from __future__ import annotations
 import os
 from typing import Dict, List, Optional
 
-from .utils import Colors, clear_screen, format_markdown_line, render_content
+from .utils import (
+    Colors,
+    Document,
+    clear_screen,
+    format_lines,
+    load_document,
+    load_or_build_index,
+    paginate,
+    Preloader,
+    render_cached,
+    render_content,
+)
 
 DEFAULT_MD_FILENAME = "README.md"
+SEARCH_RESULTS = 10
+
+NOTEBOOKS = [
+    {
+        "nombre": "01 - Exploración de Datos",
+        "archivo": "01_exploracion_datos.ipynb",
+        "descripcion": "Limpieza y exploración inicial de datos. Validación de calidad y creación de dataset consolidado.",
+        "contenido": ["Inspección de datasets", "Limpieza de datos", "Visualizaciones exploratorias", "Matriz de correlación"]
+    },
+    {
+        "nombre": "02 - Análisis de Productos",
+        "archivo": "02_analisis_productos.ipynb",
+        "descripcion": "Análisis de rendimiento de productos y categorías.",
+        "contenido": ["Top productos", "Ingresos por categoría", "Análisis de precios", "Correlación de métricas"]
+    },
+    {
+        "nombre": "03 - Análisis de Clientes",
+        "archivo": "03_analisis_clientes.ipynb",
+        "descripcion": "Segmentación de clientes y análisis de comportamiento.",
+        "contenido": ["Segmentación RFM", "Distribución geográfica", "Medios de pago", "Top clientes"]
+    },
+    {
+        "nombre": "04 - Análisis de Ventas",
+        "archivo": "04_analisis_ventas.ipynb",
+        "descripcion": "Análisis temporal de ventas y tendencias.",
+        "contenido": ["Evolución mensual", "Tendencias diarias", "Patrones semanales", "Distribución de tickets"]
+    }
+]
 
 
 def load_file(path: str) -> List[str]:
@@ -64,8 +103,13 @@ def parse_document(lines: List[str]) -> List[Dict]:
 
     return sections
 
-def find_section(sections: List[Dict], prefix: str) -> Optional[Dict]:
-    """Buscar una sección cuyo título empiece por el prefijo dado (insensible a mayúsculas)."""
+def find_section(sections, prefix: str) -> Optional[Dict]:
+    """Buscar una sección cuyo título empiece por el prefijo dado (insensible a mayúsculas).
+
+    Con un `Document` indexado la búsqueda usa su índice de prefijos.
+    """
+    if isinstance(sections, Document):
+        return sections.find_section(prefix)
     prefix_lower = prefix.lower()
     for sec in sections:
         if sec["titulo"].lower().startswith(prefix_lower):
@@ -74,12 +118,30 @@ def find_section(sections: List[Dict], prefix: str) -> Optional[Dict]:
 
 def find_subsection(section: Dict, prefix: str) -> Optional[Dict]:
     """Buscar una subsección dentro de una sección por prefijo."""
+    if hasattr(section, "find_subsection"):
+        return section.find_subsection(prefix)
     prefix_lower = prefix.lower()
     for sub in section.get("subsecciones", []):
         if sub["titulo"].lower().startswith(prefix_lower):
             return sub
     return None
 
+def print_section_body(section: Dict) -> None:
+    """Imprimir el contenido formateado de una sección (memorizado si es indexada)."""
+    key = getattr(section, "cache_key", None)
+    for line in render_cached(key, lambda: format_lines(section["contenido"])):
+        print(line)
+
+
+def print_subsection(sub: Dict) -> None:
+    """Imprimir título y contenido de una subsección."""
+    print(f"\n{Colors.CYAN}{Colors.BOLD}{sub['titulo']}{Colors.RESET}")
+    print(f"{Colors.CYAN}{'-' * len(sub['titulo'])}{Colors.RESET}")
+    print_section_body(sub)
+    if not sub["contenido"] or not any(sub["contenido"]):
+        print(f"{Colors.YELLOW}[sin contenido]{Colors.RESET}")
+
+
 def show_subsections(section: Dict, keys: Optional[List[str]] = None) -> None:
     """Imprimir una sección o subsecciones específicas con formato."""
     if keys:
@@ -88,77 +150,83 @@ def show_subsections(section: Dict, keys: Optional[List[str]] = None) -> None:
             if not sub:
                 print(f"\n{Colors.RED}[Subsección '{key}' no encontrada]{Colors.RESET}")
                 continue
-            print(f"\n{Colors.CYAN}{Colors.BOLD}{sub['titulo']}{Colors.RESET}")
-            print(f"{Colors.CYAN}{'-' * len(sub['titulo'])}{Colors.RESET}")
-            for line in sub["contenido"]:
-                formatted = format_markdown_line(line)
-                if formatted:
-                    print(formatted)
-            if not sub["contenido"] or not any(sub["contenido"]):
-                print(f"{Colors.YELLOW}[sin contenido]{Colors.RESET}")
+            print_subsection(sub)
     else:
         print(f"\n{Colors.HEADER}{Colors.BOLD}{section['titulo']}{Colors.RESET}")
         print(f"{Colors.HEADER}{'=' * len(section['titulo'])}{Colors.RESET}")
         if section["contenido"]:
-            for line in section["contenido"]:
-                formatted = format_markdown_line(line)
-                if formatted:
-                    print(formatted)
+            print_section_body(section)
         for sub in section.get("subsecciones", []):
-            print(f"\n{Colors.CYAN}{Colors.BOLD}{sub['titulo']}{Colors.RESET}")
-            print(f"{Colors.CYAN}{'-' * len(sub['titulo'])}{Colors.RESET}")
-            for line in sub["contenido"]:
-                formatted = format_markdown_line(line)
-                if formatted:
-                    print(formatted)
-            if not sub["contenido"] or not any(sub["contenido"]):
-                print(f"{Colors.YELLOW}[sin contenido]{Colors.RESET}")
+            print_subsection(sub)
+
+def print_notebook(i: int, nb: Dict) -> None:
+    """Imprimir la ficha de un notebook."""
+    print(f"{Colors.CYAN}{Colors.BOLD}{i}. {nb['nombre']}{Colors.RESET}")
+    print(f"   {Colors.YELLOW}Archivo:{Colors.RESET} {nb['archivo']}")
+    print(f"   {nb['descripcion']}")
+    print(f"   {Colors.GREEN}Contenido:{Colors.RESET}")
+    for item in nb['contenido']:
+        print(f"     • {item}")
+    print()
 
 def show_notebooks_menu():
     """Muestra información sobre los notebooks de análisis."""
-    notebooks = [
-        {
-            "nombre": "01 - Exploración de Datos",
-            "archivo": "01_exploracion_datos.ipynb",
-            "descripcion": "Limpieza y exploración inicial de datos. Validación de calidad y creación de dataset consolidado.",
-            "contenido": ["Inspección de datasets", "Limpieza de datos", "Visualizaciones exploratorias", "Matriz de correlación"]
-        },
-        {
-            "nombre": "02 - Análisis de Productos",
-            "archivo": "02_analisis_productos.ipynb",
-            "descripcion": "Análisis de rendimiento de productos y categorías.",
-            "contenido": ["Top productos", "Ingresos por categoría", "Análisis de precios", "Correlación de métricas"]
-        },
-        {
-            "nombre": "03 - Análisis de Clientes",
-            "archivo": "03_analisis_clientes.ipynb",
-            "descripcion": "Segmentación de clientes y análisis de comportamiento.",
-            "contenido": ["Segmentación RFM", "Distribución geográfica", "Medios de pago", "Top clientes"]
-        },
-        {
-            "nombre": "04 - Análisis de Ventas",
-            "archivo": "04_analisis_ventas.ipynb",
-            "descripcion": "Análisis temporal de ventas y tendencias.",
-            "contenido": ["Evolución mensual", "Tendencias diarias", "Patrones semanales", "Distribución de tickets"]
-        }
-    ]
-
     print(f"\n{Colors.HEADER}{Colors.BOLD}ANÁLISIS DE DATOS - NOTEBOOKS DISPONIBLES{Colors.RESET}")
     print(f"{Colors.HEADER}{'=' * 60}{Colors.RESET}\n")
 
-    for i, nb in enumerate(notebooks, 1):
-        print(f"{Colors.CYAN}{Colors.BOLD}{i}. {nb['nombre']}{Colors.RESET}")
-        print(f"   {Colors.YELLOW}Archivo:{Colors.RESET} {nb['archivo']}")
-        print(f"   {nb['descripcion']}")
-        print(f"   {Colors.GREEN}Contenido:{Colors.RESET}")
-        for item in nb['contenido']:
-            print(f"     • {item}")
-        print()
+    for i, nb in enumerate(NOTEBOOKS, 1):
+        print_notebook(i, nb)
 
     print(f"{Colors.YELLOW}Para abrir un notebook:{Colors.RESET}")
     print(f"  jupyter notebook notebooks/{Colors.CYAN}<nombre_archivo>{Colors.RESET}\n")
     print(f"{Colors.YELLOW}Ubicación:{Colors.RESET} ./notebooks/\n")
 
+def show_search_result(sections: List[Dict], doc: Dict) -> None:
+    """Mostrar la sección, subsección o notebook de un resultado de búsqueda."""
+    ruta = doc["ruta"]
+    if doc["tipo"] == "notebook":
+        print()
+        print_notebook(ruta[0] + 1, NOTEBOOKS[ruta[0]])
+    elif doc["tipo"] == "seccion":
+        show_subsections(sections[ruta[0]])
+    else:
+        print_subsection(sections[ruta[0]]["subsecciones"][ruta[1]])
+
+def search_menu(index, sections: List[Dict]) -> None:
+    """Pedir una consulta, listar los resultados y abrir el elegido."""
+    query = input(f"\n{Colors.YELLOW} Buscar: {Colors.RESET}").strip()
+    if not query:
+        return
+    results = index.search(query, limit=SEARCH_RESULTS)
+    if not results:
+        print(f"\n{Colors.RED}[Sin resultados para '{query}']{Colors.RESET}")
+        return
+    print()
+    for i, (score, doc) in enumerate(results, 1):
+        where = f" {Colors.BLUE}({doc['seccion']}){Colors.RESET}" if doc.get("seccion") else ""
+        print(f" {Colors.GREEN}{i}){Colors.RESET} [{doc['tipo']}] {Colors.BOLD}{doc['titulo']}{Colors.RESET}{where}  {score:.2f}")
+    choice = input(f"\n{Colors.YELLOW} Número a abrir (ENTER para volver): {Colors.RESET}").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(results):
+        show_search_result(sections, results[int(choice) - 1][1])
+
+def warm_render(document, sections: List[Dict], stopping=None) -> int:
+    """Dejar en caché el render de `sections` (y sus subsecciones) y del documento completo.
+
+    Si `stopping` (un `threading.Event`) se activa, por ejemplo al salir del
+    menú, deja de renderizar; lo ya empezado no queda en caché a medias.
+    """
+    for sec in sections:
+        for part in [sec, *sec.get("subsecciones", [])]:
+            for _ in render_cached(part.cache_key, lambda: format_lines(part["contenido"])):
+                if stopping is not None and stopping.is_set():
+                    return 0
+    lines = 0
+    for _ in render_cached(document.cache_key, lambda: render_content(document.iter_lines())):
+        if stopping is not None and stopping.is_set():
+            return lines
+        lines += 1
+    return lines
+
 def show_menu():
     """Muestra el menú de opciones."""
     print("\n" + f"{Colors.BLUE}{'=' * 60}{Colors.RESET}")
@@ -170,6 +238,7 @@ def show_menu():
     print(f" {Colors.GREEN}4){Colors.RESET} Información del Programa")
     print(f" {Colors.GREEN}5){Colors.RESET} Mostrar documento completo")
     print(f" {Colors.CYAN}6){Colors.RESET} Análisis de Datos (Notebooks)")
+    print(f" {Colors.CYAN}7){Colors.RESET} Buscar en la documentación")
     print(f" {Colors.RED}0){Colors.RESET} Salir")
     print(f"{Colors.BLUE}{'=' * 60}{Colors.RESET}")
 
@@ -179,11 +248,11 @@ def main():
     parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     path = os.path.join(parent_dir, DEFAULT_MD_FILENAME)
     try:
-        lines = load_file(path)
+        document = load_document(path)
     except FileNotFoundError:
         print(f"{Colors.RED}Error: archivo de documentación no encontrado en {path}{Colors.RESET}")
         return
-    sections = parse_document(lines)
+    sections = document.sections
     
     if not sections:
         print(f"{Colors.RED}Error: No se encontraron secciones en el archivo.{Colors.RESET}")
@@ -191,14 +260,21 @@ def main():
     
     # Localizar secciones principales
     first_section = sections[0]
-    dataset_section = find_section(sections, "Dataset")
-    program_section = find_section(sections, "Programa")
+    dataset_section = find_section(document, "Dataset")
+    program_section = find_section(document, "Programa")
     
     # Buscar subsección de escala dentro de Dataset
     scale_subsection = None
     if dataset_section:
         scale_subsection = find_subsection(dataset_section, "Escala")
     
+    # Mientras el usuario lee el menú se preparan en segundo plano el índice de
+    # búsqueda (reconstruido sólo si cambió el documento) y el render completo
+    preloader = Preloader(color=Colors.YELLOW)
+    preloader.submit("busqueda", load_or_build_index, path, sections, NOTEBOOKS)
+    menu_sections = [s for s in (first_section, dataset_section, program_section) if s]
+    preloader.submit("documento", warm_render, document, menu_sections, preloader.stopping)
+
     # Loop del menú
     while True:
         clear_screen()
@@ -208,10 +284,12 @@ def main():
             option = input(f"\n{Colors.YELLOW} ➤  Seleccione una opción: {Colors.RESET}").strip()
         except (EOFError, KeyboardInterrupt):
             print(f"\n\n{Colors.GREEN} Saliendo...{Colors.RESET}")
+            preloader.shutdown()
             return
         
         if option == "0":
             print(f"\n{Colors.GREEN} Saliendo...{Colors.RESET}")
+            preloader.shutdown()
             return
         
         elif option == "1":
@@ -227,17 +305,7 @@ def main():
         
         elif option == "3":
             if scale_subsection:
-                print(f"\n{Colors.CYAN}{Colors.BOLD}{scale_subsection['titulo']}{Colors.RESET}")
-                print(f"{Colors.CYAN}{'-' * len(scale_subsection['titulo'])}{Colors.RESET}")
-                
-                # Formatear cada línea del contenido
-                for line in scale_subsection["contenido"]:
-                    formatted = format_markdown_line(line)
-                    if formatted:
-                        print(formatted)
-                
-                if not scale_subsection["contenido"] or not any(scale_subsection["contenido"]):
-                    print(f"{Colors.YELLOW}[sin contenido]{Colors.RESET}")
+                print_subsection(scale_subsection)
             else:
                 print(f"\n{Colors.RED}[Error: Subsección 'Escala' no encontrada]{Colors.RESET}")
             input(f"\n{Colors.YELLOW}Presione ENTER para continuar...{Colors.RESET}")
@@ -254,9 +322,9 @@ def main():
             print(f"{Colors.BOLD}CONTENIDO COMPLETO{Colors.RESET}")
             print(f"{Colors.BLUE}{'=' * 60}{Colors.RESET}\n")
 
-            # Renderizar todo el documento
-            for formatted_line in render_content(lines):
-                print(formatted_line)
+            # Renderizar todo el documento, paginado; si la precarga no terminó
+            # se formatea a medida que se muestra en lugar de esperarla
+            paginate(render_cached(document.cache_key, lambda: render_content(document.iter_lines())))
 
             print("\n" + f"{Colors.BLUE}{'=' * 60}{Colors.RESET}")
             input(f"\n{Colors.YELLOW}Presione ENTER para continuar...{Colors.RESET}")
@@ -265,8 +333,12 @@ def main():
             show_notebooks_menu()
             input(f"\n{Colors.YELLOW}Presione ENTER para continuar...{Colors.RESET}")
 
+        elif option == "7":
+            search_menu(preloader.get("busqueda", "índice de búsqueda"), sections)
+            input(f"\n{Colors.YELLOW}Presione ENTER para continuar...{Colors.RESET}")
+
         else:
-            print(f"\n{Colors.RED}[Opción inválida. Ingrese 0-6]{Colors.RESET}")
+            print(f"\n{Colors.RED}[Opción inválida. Ingrese 0-7]{Colors.RESET}")
             input(f"\n{Colors.YELLOW}Presione ENTER para continuar...{Colors.RESET}")
 
 if __name__ == "__main__":
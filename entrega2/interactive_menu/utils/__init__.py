@@ -2,9 +2,16 @@
 Utilidades para el visor de documentación interactivo.
 """
 from .colors import Colors, clear_screen
-from .markdown_formatter import format_markdown_line, render_content
+from .markdown_formatter import format_lines, format_markdown_line, render_cached, render_content
+from .pager import paginate
+from .preload import Preloader
+from .search import SearchIndex, load_or_build_index
+from .document import Document, load_document
 
 __all__ = [
     'Colors', 'clear_screen', 'format_markdown_line', 'render_content',
+    'format_lines', 'render_cached', 'paginate', 'SearchIndex', 'load_or_build_index',
+    'Preloader',
+    'Document', 'load_document',
     'load_notebook', 'extract_notebook_info', 'get_notebooks_from_dir', 'display_notebook_content'
 ]
\ No newline at end of file
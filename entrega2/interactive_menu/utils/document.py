@@ -0,0 +1,205 @@
+"""
+Modelo indexado de un documento Markdown para el visor interactivo.
+
+En lugar de leer todas las líneas y copiarlas en listas de diccionarios, el
+archivo se mapea en memoria (`mmap`) sólo para recorrerlo una vez buscando los
+encabezados `# ` y `## `. Cada sección guarda los desplazamientos en bytes de
+su contenido, que se lee (`seek`/`read`) y decodifica recién cuando se
+muestra. Entre lecturas no queda ningún archivo abierto ni mapeado, así el
+documento se puede editar o reemplazar mientras el visor está abierto (en
+Windows un archivo mapeado no se puede truncar).
+
+- Los documentos parseados se cachean por ruta y se reutilizan mientras no
+  cambien el `mtime` ni el tamaño del archivo.
+- La búsqueda por prefijo usa una lista ordenada de títulos con `bisect`, y
+  devuelve la misma sección que la búsqueda lineal (la primera del documento).
+"""
+import mmap
+import os
+import re
+from bisect import bisect_left
+from collections.abc import Mapping
+
+# Mismo criterio que parse_document: la línea sin sangría empieza con "# " o "## "
+_HEADER_RE = re.compile(rb"^[ \t]*(#{1,2}) ([^\r\n]*)", re.MULTILINE)
+_LINE_END_RE = re.compile(rb"\r\n|\r|\n")
+
+INTRO_TITLE = "INTRODUCCIÓN"
+
+_CACHE = {}
+
+
+class PrefixIndex:
+    """Índice de títulos para buscar por prefijo sin distinguir mayúsculas."""
+
+    def __init__(self, titles):
+        self._keys = sorted((t.lower(), pos) for pos, t in enumerate(titles))
+
+    def find(self, prefix):
+        """Posición del primer título (en orden original) que empieza por `prefix`."""
+        prefix = prefix.lower()
+        i = bisect_left(self._keys, (prefix, -1))
+        best = None
+        while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+            pos = self._keys[i][1]
+            if best is None or pos < best:
+                best = pos
+            i += 1
+        return best
+
+
+class Section(Mapping):
+    """Sección o subsección con el contenido cargado bajo demanda.
+
+    Se comporta como los diccionarios de `parse_document` (claves `titulo`,
+    `contenido` y, en secciones, `subsecciones`), así el resto del visor no
+    necesita saber de dónde viene.
+    """
+
+    def __init__(self, document, titulo, start, end, subsecciones=None):
+        self._document = document
+        self._start = start
+        self._end = end
+        self._contenido = None
+        self._index = None
+        self._data = {"titulo": titulo}
+        if subsecciones is not None:
+            self._data["subsecciones"] = subsecciones
+
+    def __getitem__(self, key):
+        if key == "contenido":
+            if self._contenido is None:
+                self._contenido = self._document.read_lines(self._start, self._end)
+            return self._contenido
+        return self._data[key]
+
+    def __iter__(self):
+        yield "titulo"
+        yield "contenido"
+        if "subsecciones" in self._data:
+            yield "subsecciones"
+
+    def __len__(self):
+        return 3 if "subsecciones" in self._data else 2
+
+    @property
+    def cache_key(self):
+        """Clave para cachear el render de esta sección (cambia con el archivo)."""
+        return (self._document.path, self._document.stamp, self._start, self._end)
+
+    def find_subsection(self, prefix):
+        subs = self._data.get("subsecciones", [])
+        if self._index is None:
+            self._index = PrefixIndex([s["titulo"] for s in subs])
+        pos = self._index.find(prefix)
+        return subs[pos] if pos is not None else None
+
+
+class Document:
+    """Documento Markdown con sus secciones indexadas por desplazamiento en bytes."""
+
+    def __init__(self, path):
+        self.path = path
+        st = os.stat(path)
+        self.stamp = (st.st_mtime_ns, st.st_size)
+        # el mapeo sólo dura el recorrido de encabezados: en Windows un
+        # archivo mapeado no se puede truncar ni reemplazar
+        with open(path, "rb") as fh:
+            if st.st_size:
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    headers, size = _find_headers(buf), len(buf)
+                finally:
+                    buf.close()
+            else:
+                # mmap no admite archivos vacíos
+                headers, size = [], 0
+        self.sections = self._build(headers, size)
+        self._index = PrefixIndex([s["titulo"] for s in self.sections])
+
+    def _build(self, headers, size):
+        sections = []
+        current = None
+        for i, (level, title, _, body) in enumerate(headers):
+            end = headers[i + 1][2] if i + 1 < len(headers) else size
+            if level == 1:
+                current = Section(self, title, body, end, subsecciones=[])
+                sections.append(current)
+            else:
+                if current is None:
+                    current = Section(self, INTRO_TITLE, 0, 0, subsecciones=[])
+                    sections.append(current)
+                current["subsecciones"].append(Section(self, title, body, end))
+        return sections
+
+    def _read(self, start, end):
+        """Bytes entre dos desplazamientos; el archivo se abre sólo para leerlos."""
+        with open(self.path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size < end:
+                # el archivo se truncó desde que se indexó
+                raise RuntimeError(f"{self.path} cambió mientras se leía; vuelva a cargarlo")
+            fh.seek(start)
+            return fh.read(end - start)
+
+    def read_lines(self, start, end):
+        """Decodificar las líneas entre dos desplazamientos en bytes."""
+        if start >= end:
+            return []
+        return self._read(start, end).decode("utf-8").splitlines()
+
+    def iter_lines(self, block_size=1 << 20):
+        """Recorrer todas las líneas del documento sin decodificarlo entero."""
+        size = self.stamp[1]
+        pos = 0
+        rest = b""
+        while pos < size:
+            end = min(pos + block_size, size)
+            block = rest + self._read(pos, end)
+            pos = end
+            nl = block.rfind(b"\n")
+            if nl < 0 and pos < size:
+                rest = block
+                continue
+            cut = nl + 1 if pos < size else len(block)
+            yield from block[:cut].decode("utf-8").splitlines()
+            rest = block[cut:]
+
+    @property
+    def cache_key(self):
+        return (self.path, self.stamp)
+
+    def find_section(self, prefix):
+        pos = self._index.find(prefix)
+        return self.sections[pos] if pos is not None else None
+
+    def close(self):
+        """No queda nada abierto entre lecturas; se mantiene por compatibilidad."""
+
+
+def _find_headers(buf):
+    """(nivel, título, inicio, inicio del cuerpo) de cada encabezado `# `/`## `."""
+    headers = []
+    for m in _HEADER_RE.finditer(buf):
+        line_end = _LINE_END_RE.search(buf, m.end())
+        body = line_end.end() if line_end else len(buf)
+        title = m.group(2).decode("utf-8").strip()
+        headers.append((len(m.group(1)), title, m.start(), body))
+    return headers
+
+
+def load_document(path):
+    """Devolver el documento indexado de `path`, reutilizando el cacheado.
+
+    Raises:
+        FileNotFoundError: si el archivo no existe.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    doc = _CACHE.get(key)
+    if doc is not None and doc.stamp == (st.st_mtime_ns, st.st_size):
+        return doc
+    if doc is not None:
+        doc.close()
+    doc = Document(key)
+    _CACHE[key] = doc
+    return doc
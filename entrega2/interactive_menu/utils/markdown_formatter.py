@@ -1,64 +1,117 @@
 """
 Funciones para formatear Markdown en la terminal con colores ANSI.
+
+El formato en línea (negrita, cursiva, código y enlaces) se resuelve en una
+sola pasada con un patrón maestro: cada coincidencia es un token y el texto
+entre tokens se copia tal cual. Las líneas sin marcas (`*`, `` ` ``, `[`) se
+devuelven sin ejecutar ninguna expresión regular de reemplazo.
 """
 import re
+import threading
+from collections import OrderedDict
+
 from .colors import Colors
 
+# Un único patrón con una alternativa por token; el orden de las alternativas
+# da la prioridad cuando dos tokens podrían empezar en la misma posición.
+_INLINE_RE = re.compile(
+    r"`(?P<code>.+?)`"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|(?<!\*)\*(?!\*)(?P<italic>.+?)(?<!\*)\*(?!\*)"
+    r"|\[(?P<link>.+?)\]\((?P<url>.+?)\)"
+)
+_MARKS = frozenset("*`[")
+_NUMBERED_RE = re.compile(r"\d+\.\s")
+
+RENDER_CACHE_SIZE = 256
+_render_cache = OrderedDict()
+# El menú y los hilos de precarga comparten la caché
+_render_lock = threading.Lock()
+
+
+def _has_marks(text):
+    return not _MARKS.isdisjoint(text)
+
+
+def _format_inline(text, links=True):
+    """Aplicar negrita, cursiva, código y (opcionalmente) enlaces en una pasada."""
+    if not _has_marks(text):
+        return text
+
+    def token(m):
+        kind = m.lastgroup if m.lastgroup != "url" else "link"
+        if kind == "code":
+            return f"{Colors.CYAN}{m.group('code')}{Colors.RESET}"
+        if kind == "link" and not links:
+            # en listas los enlaces se muestran como texto, sólo se formatea su interior
+            return f"[{_format_inline(m.group('link'), links)}]({m.group('url')})"
+        inner = _format_inline(m.group(kind), links)
+        if kind == "bold":
+            return f"{Colors.BOLD}{inner}{Colors.RESET}"
+        if kind == "italic":
+            return f"{Colors.UNDERLINE}{inner}{Colors.RESET}"
+        return f"{Colors.BLUE}{Colors.UNDERLINE}{inner}{Colors.RESET}"
+
+    return _INLINE_RE.sub(token, text)
+
+
 def format_markdown_line(line):
     """
     Formatea una línea de Markdown para visualización en terminal.
-    
+
     Args:
         line (str): Línea de texto en formato Markdown
-        
+
     Returns:
         str: Línea formateada con códigos de color ANSI
     """
     text = line.strip()
-    
+
     # Headers H3
     if text.startswith("### "):
         return f"{Colors.YELLOW}{Colors.BOLD}{text[4:]}{Colors.RESET}"
-    
-    # Bold text **text**
-    text = re.sub(r'\*\*(.+?)\*\*', rf'{Colors.BOLD}\1{Colors.RESET}', text)
-    
-    # Italic text *text* (solo si no es parte de **)
-    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', rf'{Colors.UNDERLINE}\1{Colors.RESET}', text)
-    
-    # Code inline `code`
-    text = re.sub(r'`(.+?)`', rf'{Colors.CYAN}\1{Colors.RESET}', text)
-    
+
     # Bullet points
     if text.startswith("* ") or text.startswith("- "):
-        return f"  {Colors.GREEN}•{Colors.RESET} {text[2:]}"
-    
+        return f"  {Colors.GREEN}•{Colors.RESET} {_format_inline(text[2:], links=False)}"
+
     # Numbered lists
-    if re.match(r'^\d+\.\s', text):
-        return f"  {Colors.GREEN}{text}{Colors.RESET}"
-    
+    if _NUMBERED_RE.match(text):
+        return f"  {Colors.GREEN}{_format_inline(text, links=False)}{Colors.RESET}"
+
     # Horizontal rules
     if text.startswith("---") or text == "=" * len(text):
         return f"{Colors.BLUE}{'─' * 60}{Colors.RESET}"
-    
-    # Links [text](url)
-    text = re.sub(r'\[(.+?)\]\((.+?)\)', rf'{Colors.BLUE}{Colors.UNDERLINE}\1{Colors.RESET}', text)
-    
-    return text if text else ""
+
+    # Bold, italic, inline code and links [text](url)
+    return _format_inline(text)
+
+
+def format_lines(lines):
+    """
+    Formatea líneas sueltas (sin bloques de código) omitiendo las vacías.
+
+    Es lo que se imprime al mostrar una sección o subsección.
+    """
+    for line in lines:
+        formatted = format_markdown_line(line)
+        if formatted:
+            yield formatted
+
 
 def render_content(lines, format_code_blocks = True):
     """
     Renderiza un conjunto de líneas con formato Markdown.
-    
+
     Args:
         lines (list): Lista de líneas a formatear
         format_code_blocks (bool): Si se deben formatear bloques de código
-        
+
     Yields:
         str: Líneas formateadas una por una
     """
     in_code_block = False
-    
+
     for line in lines:
         # Detectar bloques de código ```
         if line.strip().startswith("```"):
@@ -66,10 +119,45 @@ def render_content(lines, format_code_blocks = True):
             if format_code_blocks:
                 yield f"{Colors.CYAN}{'─' * 60}{Colors.RESET}"
             continue
-        
+
         if in_code_block:
             # Mostrar código sin formatear, solo con color
             yield f"{Colors.CYAN}{line}{Colors.RESET}"
         else:
             # Aplicar formato Markdown
-            yield format_markdown_line(line)
\ No newline at end of file
+            yield format_markdown_line(line)
+
+
+def render_cached(key, render):
+    """
+    Devuelve las líneas de `render()` memorizadas bajo `key`.
+
+    La primera vez las líneas se entregan a medida que se generan (no hay que
+    esperar a renderizar todo) y se guardan sólo si se consumieron completas.
+    Con `key=None` no se cachea.
+
+    Args:
+        key: Clave hashable que identifica el contenido (p. ej. sección y mtime)
+        render: Función sin argumentos que devuelve un iterable de líneas
+
+    Yields:
+        str: Líneas formateadas
+    """
+    if key is None:
+        yield from render()
+        return
+    with _render_lock:
+        cached = _render_cache.get(key)
+        if cached is not None:
+            _render_cache.move_to_end(key)
+    if cached is not None:
+        yield from cached
+        return
+    out = []
+    for line in render():
+        out.append(line)
+        yield line
+    with _render_lock:
+        _render_cache[key] = tuple(out)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
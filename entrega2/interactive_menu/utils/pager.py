@@ -0,0 +1,48 @@
+"""
+Salida paginada para documentos largos.
+"""
+import shutil
+
+from .colors import Colors
+
+PROMPT = f"{Colors.YELLOW}-- ENTER: página siguiente | q: volver al menú --{Colors.RESET}"
+
+
+def page_size():
+    """Líneas por página según el alto de la terminal (0 = sin paginar)."""
+    rows = shutil.get_terminal_size(fallback=(80, 0)).lines
+    return max(rows - 2, 0)
+
+
+def paginate(lines, size=None, read=input, write=print):
+    """
+    Imprime `lines` a medida que llegan, pausando cada `size` líneas.
+
+    Como `lines` puede ser un generador, la primera página se muestra antes
+    de haber formateado el resto del documento.
+
+    Args:
+        lines: Iterable de líneas ya formateadas
+        size (int): Líneas por página; None usa el alto de la terminal y 0
+            imprime todo sin pausas
+        read: Función para leer la respuesta del usuario
+        write: Función para imprimir cada línea
+
+    Returns:
+        bool: True si se mostró todo, False si el usuario salió antes
+    """
+    if size is None:
+        size = page_size()
+    shown = 0
+    for line in lines:
+        if size and shown == size:
+            try:
+                answer = read(PROMPT)
+            except (EOFError, KeyboardInterrupt):
+                return False
+            if answer.strip().lower() == "q":
+                return False
+            shown = 0
+        write(line)
+        shown += 1
+    return True
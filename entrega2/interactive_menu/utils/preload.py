@@ -0,0 +1,19 @@
+"""
+Precarga en segundo plano para el visor.
+
+Mientras el menú espera en `input()`, un pool de hilos va armando lo que las
+opciones van a necesitar (índice de búsqueda, render del documento). La
+implementación es la de `src/preload.py`, compartida con el menú de
+`src/docs.py`; este módulo sólo la reexporta.
+"""
+import os
+import sys
+
+try:
+    from src.preload import Preloader
+except ImportError:
+    # visor lanzado desde fuera de la raíz del repositorio
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+    from src.preload import Preloader
+
+__all__ = ["Preloader"]
@@ -0,0 +1,178 @@
+"""
+Búsqueda de texto completo para el visor de documentación.
+
+Se arma un índice invertido (término -> lista de (documento, frecuencia)) con
+las secciones y subsecciones del documento y con la descripción de los
+notebooks. Las consultas se ordenan con BM25.
+
+- La tokenización ignora mayúsculas y tildes ("análisis" == "analisis"),
+  y descarta las palabras vacías más comunes del español.
+- El índice se guarda en disco junto con la firma de sus fuentes (mtime y
+  tamaño del Markdown, hash de los metadatos de notebooks) y sólo se
+  reconstruye cuando alguna cambia.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+
+INDEX_VERSION = 1
+TITLE_WEIGHT = 3
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a al algo como con de del el en es esta este la las lo los mas o para por "
+    "que se sin su sus un una uno y".split()
+)
+
+
+def normalize(text):
+    """Pasar a minúsculas y quitar tildes y diéresis (la ñ queda como n)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    """Lista de términos normalizados de `text`, sin palabras vacías."""
+    return [t for t in _TOKEN_RE.findall(normalize(text)) if t not in STOPWORDS]
+
+
+def documents_from_sections(sections, notebooks=()):
+    """
+    Armar los documentos a indexar.
+
+    Cada documento es un dict con `titulo`, `tipo` (seccion, subseccion o
+    notebook), `ruta` (posición para volver a mostrarlo) y `texto`.
+    """
+    docs = []
+    for i, sec in enumerate(sections):
+        docs.append({"titulo": sec["titulo"], "tipo": "seccion", "ruta": [i],
+                     "texto": "\n".join(sec["contenido"])})
+        for j, sub in enumerate(sec.get("subsecciones", [])):
+            docs.append({"titulo": sub["titulo"], "tipo": "subseccion", "ruta": [i, j],
+                         "seccion": sec["titulo"], "texto": "\n".join(sub["contenido"])})
+    for k, nb in enumerate(notebooks):
+        texto = "\n".join([nb["archivo"], nb["descripcion"], *nb["contenido"]])
+        docs.append({"titulo": nb["nombre"], "tipo": "notebook", "ruta": [k], "texto": texto})
+    return docs
+
+
+class SearchIndex:
+    """Índice invertido con ranking BM25."""
+
+    def __init__(self, docs, postings, lengths, signature=None):
+        self.docs = docs
+        self.postings = postings
+        self.lengths = lengths
+        self.signature = signature
+        self.avgdl = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, docs, signature=None):
+        postings = {}
+        lengths = []
+        meta = []
+        for doc_id, doc in enumerate(docs):
+            tf = Counter(tokenize(doc["texto"]))
+            for term in tokenize(doc["titulo"]):
+                tf[term] += TITLE_WEIGHT
+            lengths.append(sum(tf.values()))
+            for term, n in tf.items():
+                postings.setdefault(term, []).append([doc_id, n])
+            # el texto completo no hace falta para buscar ni para mostrar
+            meta.append({k: v for k, v in doc.items() if k != "texto"})
+        return cls(meta, postings, lengths, signature)
+
+    def search(self, query, limit=10):
+        """Devolver hasta `limit` pares (puntaje, documento), mejores primero."""
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        scores = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for doc_id, tf in plist:
+                norm = K1 * (1 - B + B * self.lengths[doc_id] / self.avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, self.docs[doc_id]) for doc_id, score in best]
+
+    # -- persistencia ------------------------------------------------------
+    def save(self, path):
+        state = {
+            "version": INDEX_VERSION,
+            "signature": self.signature,
+            "docs": self.docs,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".search.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(state, fh, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        if state.get("version") != INDEX_VERSION:
+            raise ValueError("versión de índice distinta")
+        return cls(state["docs"], state["postings"], state["lengths"], state["signature"])
+
+
+def sources_signature(md_path, notebooks=()):
+    """Firma de las fuentes del índice: mtime y tamaño del Markdown y hash de los notebooks."""
+    st = os.stat(md_path)
+    nb_hash = hashlib.blake2b(json.dumps(list(notebooks), sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+    return [os.path.abspath(md_path), st.st_mtime_ns, st.st_size, nb_hash]
+
+
+def load_or_build_index(md_path, sections, notebooks=(), index_path=None):
+    """
+    Cargar el índice guardado o reconstruirlo si cambiaron sus fuentes.
+
+    Args:
+        md_path: Markdown del que salen `sections`
+        sections: Secciones (de `parse_document` o de un `Document`)
+        notebooks: Metadatos de notebooks a incluir
+        index_path: Archivo del índice; por defecto `.cache/search_index.json`
+            junto al Markdown
+
+    Returns:
+        SearchIndex
+    """
+    if index_path is None:
+        index_path = os.path.join(os.path.dirname(os.path.abspath(md_path)), ".cache", "search_index.json")
+    signature = sources_signature(md_path, notebooks)
+    try:
+        index = SearchIndex.load(index_path)
+        if index.signature == signature:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    index = SearchIndex.build(documents_from_sections(sections, notebooks), signature)
+    try:
+        index.save(index_path)
+    except OSError:
+        # sin permisos de escritura el índice sigue sirviendo en memoria
+        pass
+    return index
@@ -0,0 +1,203 @@
+"""Compressed CSV inputs (`.csv.gz`, `.csv.bz2`, `.csv.xz`, `.csv.zst`).
+
+Files are decompressed while they are parsed, never to disk. When a
+command-line decompressor is installed it runs in its own process and
+streams into the parser through a pipe, so decompression and parsing run on
+different cores; the parallel tools are preferred (pigz, lbzip2/pbzip2,
+`xz -T0`, zstd). Without one, Python's gzip/bz2/lzma modules (and
+`zstandard`, if installed) decompress in-process.
+
+    with open_stream(path) as fh:          # binary, decompressed
+        df = pd.read_csv(fh)
+    df = read_csv(path)                     # same; df.attrs["uncompressed_bytes"]
+
+Set AURELION_DECOMPRESS=python to skip the external tools.
+"""
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+ENV_VAR = "AURELION_DECOMPRESS"
+
+SUFFIXES: Dict[str, str] = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+# external decompressors in order of preference: (binary, args)
+TOOLS: Dict[str, List[Tuple[str, List[str]]]] = {
+    "gzip": [("pigz", ["-dc"]), ("gzip", ["-dc"])],
+    "bz2": [("lbzip2", ["-dc"]), ("pbzip2", ["-dc"]), ("bzip2", ["-dc"])],
+    "xz": [("xz", ["-dc", "-T0"])],
+    "zstd": [("zstd", ["-dcq"])],
+}
+
+BUFFER_SIZE = 1 << 20
+
+
+def compression_of(path: Path) -> Optional[str]:
+    """'gzip', 'bz2', 'xz', 'zstd' or None, from the file suffix."""
+    return SUFFIXES.get(Path(path).suffix.lower())
+
+
+def is_csv(path: Path) -> bool:
+    """True for `x.csv` and its compressed forms (`x.csv.gz`, ...)."""
+    name = Path(path).name.lower()
+    for suffix in SUFFIXES:
+        if name.endswith(".csv" + suffix):
+            return True
+    return name.endswith(".csv")
+
+
+def table_name(path: Path) -> str:
+    """File name without `.csv` and compression suffixes: `ventas.csv.gz` -> `ventas`."""
+    name = Path(path).name
+    if compression_of(Path(name)):
+        name = name[: -len(Path(name).suffix)]
+    return name[:-4] if name.lower().endswith(".csv") else Path(name).stem
+
+
+def external_tool(kind: str) -> Optional[List[str]]:
+    """Command line of the preferred installed decompressor for `kind`, if any."""
+    if os.environ.get(ENV_VAR, "").lower() == "python":
+        return None
+    for binary, args in TOOLS.get(kind, []):
+        exe = shutil.which(binary)
+        if exe:
+            return [exe, *args]
+    return None
+
+
+class _CountingReader(io.RawIOBase):
+    """Read-only raw stream over a decompressed source that counts the bytes read."""
+
+    def __init__(self, source: BinaryIO, on_close: Optional[Callable[[bool], None]] = None):
+        self._source = source
+        self._on_close = on_close
+        self.bytes_read = 0
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        n = self._source.readinto(buf) if hasattr(self._source, "readinto") else _readinto(self._source, buf)
+        if not n:
+            self.eof = True
+        self.bytes_read += n or 0
+        return n or 0
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._source.close()
+            finally:
+                if self._on_close is not None:
+                    self._on_close(self.eof)
+        super().close()
+
+
+def _readinto(source: BinaryIO, buf) -> int:
+    data = source.read(len(buf))
+    buf[: len(data)] = data
+    return len(data)
+
+
+def _python_open(path: Path, kind: str) -> BinaryIO:
+    if kind == "gzip":
+        import gzip
+
+        return gzip.open(path, "rb")
+    if kind == "bz2":
+        import bz2
+
+        return bz2.open(path, "rb")
+    if kind == "xz":
+        import lzma
+
+        return lzma.open(path, "rb")
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        raise RuntimeError(f"Cannot read {path.name}: install the `zstd` command or the `zstandard` package") from None
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+
+def _open_raw(path: Path) -> _CountingReader:
+    kind = compression_of(path)
+    if kind is None:
+        return _CountingReader(open(path, "rb", buffering=0))
+    cmd = external_tool(kind)
+    if cmd is None:
+        return _CountingReader(_python_open(path, kind))
+    proc = subprocess.Popen([*cmd, str(path)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+
+    def finish(at_eof: bool) -> None:
+        if not at_eof and proc.poll() is None:
+            # the reader stopped early (nrows): stop the decompressor too
+            proc.kill()
+        _, err = proc.communicate()
+        if at_eof and proc.returncode != 0:
+            raise OSError(f"{Path(cmd[0]).name} failed on {path.name}: {err.decode(errors='replace').strip()}")
+
+    return _CountingReader(proc.stdout, on_close=finish)
+
+
+@contextmanager
+def open_stream(path: Path) -> Iterator[io.BufferedReader]:
+    """Binary stream of the decompressed contents of `path` (plain files too).
+
+    The stream's `raw.bytes_read` is the number of uncompressed bytes read.
+    """
+    raw = _open_raw(Path(path))
+    stream = io.BufferedReader(raw, buffer_size=BUFFER_SIZE)
+    try:
+        yield stream
+    finally:
+        stream.close()
+
+
+def read_csv(path: Path, **kwargs: Any):
+    """`pd.read_csv` over `open_stream(path)`.
+
+    When the whole file was read (no `nrows`), the uncompressed size is
+    stored in `df.attrs["uncompressed_bytes"]`.
+    """
+    import pandas as pd
+
+    with open_stream(path) as fh:
+        df = pd.read_csv(fh, **kwargs)
+        if kwargs.get("nrows") is None:
+            df.attrs["uncompressed_bytes"] = fh.raw.bytes_read
+    return df
+
+
+def iter_csv(path: Path, chunksize: int, **kwargs: Any):
+    """Chunks of `pd.read_csv(..., chunksize=chunksize)` over `open_stream(path)`."""
+    import pandas as pd
+
+    with open_stream(path) as fh:
+        with pd.read_csv(fh, chunksize=chunksize, **kwargs) as reader:
+            yield from reader
+
+
+def sizes(path: Path, uncompressed: Optional[int] = None) -> Dict[str, Any]:
+    """Inventory fields: compression, compressed_bytes, uncompressed_bytes.
+
+    `uncompressed` is the byte count measured while parsing, when known. For
+    compressed files without one it is counted by streaming the file.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    kind = compression_of(path)
+    if kind is None:
+        return {"compression": None, "compressed_bytes": size, "uncompressed_bytes": size}
+    if uncompressed is None:
+        with open_stream(path) as fh:
+            while fh.read(BUFFER_SIZE):
+                pass
+            uncompressed = fh.raw.bytes_read
+    return {"compression": kind, "compressed_bytes": size, "uncompressed_bytes": uncompressed}
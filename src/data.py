@@ -1,9 +1,15 @@
 """Utilities for loading and cleaning tabular data from `db/`.
 
 Functions:
-- load_csv(path_or_name) -> pd.DataFrame
+- load_csv(path_or_name, source_column=None, max_workers=None,
+           locale_numbers=True, usecols=None, dtype=None,
+           sample=None, stratify_by=None, seed=0) -> pd.DataFrame
+  (a path, glob pattern, directory or list of paths)
 - summarize_df(df, top=5) -> dict
-- clean_df(df, drop_duplicates=True, fillna=None) -> pd.DataFrame
+- clean_df(df, drop_duplicates=True, fillna=None, memory_budget=None,
+           subset=None, keep_latest=None) -> pd.DataFrame
+
+Deduplication across files (overlapping exports) lives in `dedupe.py`.
 
 This module is intentionally small and documented so you can follow the
 implementation step-by-step for learning purposes.
@@ -11,56 +17,287 @@ implementation step-by-step for learning purposes.
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+try:
+    from src import compression, dedupe, membudget, numparse, sampling
+except Exception:
+    import compression  # type: ignore
+    import dedupe  # type: ignore
+    import membudget  # type: ignore
+    import numparse  # type: ignore
+    import sampling  # type: ignore
+
 
 DB_DIR = Path(__file__).resolve().parents[1] / "db"
 
 
-def load_csv(path_or_name: str | Path, verbose: bool = False) -> pd.DataFrame:
+def load_csv(
+    path_or_name: Union[str, Path, Sequence[Union[str, Path]]],
+    verbose: bool = False,
+    source_column: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    locale_numbers: bool = True,
+    usecols: Optional[Sequence[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+    sample: Optional[int] = None,
+    stratify_by: Optional[str] = None,
+    seed: int = 0,
+) -> pd.DataFrame:
     """Load a CSV (or Excel) file from disk.
 
     The function accepts a filename (relative to `db/`) or an absolute path.
     It will try several encodings and separators for CSVs. If the file looks
-    like Excel (xlsx/xls) it will use `pd.read_excel`.
+    like Excel (xlsx/xls) it will use `pd.read_excel`. Compressed CSVs
+    (`.csv.gz`, `.csv.bz2`, `.csv.xz`, `.csv.zst`) are decompressed while
+    parsing (see `compression.py`).
+
+    A glob pattern (`"ventas_*.csv"`), a directory (all its CSVs) or a list
+    of paths loads every file, in parallel processes when there are several
+    (`max_workers`, default: one per CPU). All files must have the same
+    columns (in any order); the frames are concatenated once at the end.
+    With `source_column` each row records the file it came from (as a
+    categorical). The file list is kept in `df.attrs["sources"]`.
+
+    With `locale_numbers` (the default) text columns holding formatted
+    numbers such as `1.234,56` are converted per column (see `numparse.py`);
+    `df.attrs["number_failures"]` counts the values that did not parse and
+    `df.attrs["number_ambiguous"]` lists columns left as text because their
+    values fit both formats (e.g. only "1.250"-style amounts).
+    Columns named in `dtype` keep the type given there.
+
+    `usecols` and `dtype` are passed to `pd.read_csv` to parse only (and
+    with known types) the columns a caller needs.
+
+    With `sample=N` the files are streamed once and only a reproducible
+    random sample of N rows is kept (N per value of `stratify_by`), see
+    `sampling.py`. The index holds each row's position in the full load;
+    `df.attrs["sample_fraction"]` (a dict by stratum when stratified) is
+    the share of rows kept, to scale sums and counts back up.
 
     Raises any exception from pandas if reading fails.
     """
-    p = Path(path_or_name)
-    if not p.is_absolute():
-        p = DB_DIR / p
-
+    if sample is not None or stratify_by is not None:
+        if sample is None:
+            raise ValueError("stratify_by needs sample=N")
+        files = expand_paths(path_or_name) if _is_multi(path_or_name) else [_resolve(path_or_name)]
+        missing = [p for p in files if not p.exists()]
+        if missing or not files:
+            raise FileNotFoundError(f"File not found: {missing[0] if missing else path_or_name}")
+        read_kwargs = {k: v for k, v in (("usecols", usecols), ("dtype", dtype)) if v is not None}
+        return _load_sample(files, sample, stratify_by, seed, source_column, locale_numbers, verbose, read_kwargs)
+    if _is_multi(path_or_name):
+        return _load_many(expand_paths(path_or_name), source_column, max_workers, verbose, locale_numbers, usecols, dtype)
+    p = _resolve(path_or_name)
     if not p.exists():
         raise FileNotFoundError(f"File not found: {p}")
+    df = _load_one(p, verbose, locale_numbers, usecols, dtype)
+    if source_column is not None:
+        df[source_column] = pd.Categorical([p.name] * len(df), categories=[p.name])
+    df.attrs["sources"] = [str(p)]
+    return df
+
+
+def _resolve(path_or_name: Union[str, Path]) -> Path:
+    p = Path(path_or_name)
+    return p if p.is_absolute() else DB_DIR / p
+
+
+def _is_multi(path_or_name: Any) -> bool:
+    if isinstance(path_or_name, (list, tuple)):
+        return True
+    if any(ch in str(path_or_name) for ch in "*?["):
+        return True
+    return _resolve(path_or_name).is_dir()
+
+
+def expand_paths(path_or_name: Union[str, Path, Sequence[Union[str, Path]]]) -> List[Path]:
+    """Files named by a path, glob pattern or directory (relative to `db/`), or a list of those."""
+    items = list(path_or_name) if isinstance(path_or_name, (list, tuple)) else [path_or_name]
+    return dedupe.expand_paths([_resolve(item) for item in items])
 
+
+def _sep_order(p: Path, seps: Sequence[str]) -> List[str]:
+    """`seps` ordered by how often they appear in the header line (stable on ties)."""
+    try:
+        with compression.open_stream(p) as fh:
+            header = fh.readline(1 << 16).decode("latin1")
+    except Exception:
+        return list(seps)
+    return sorted(seps, key=lambda sep: -header.count(sep))
+
+
+def _load_one(
+    p: Path,
+    verbose: bool = False,
+    locale_numbers: bool = True,
+    usecols: Optional[Sequence[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
     suffix = p.suffix.lower()
     if suffix in (".xlsx", ".xls") or p.name.lower().endswith(".xlsx"):
         if verbose:
             print(f"Reading Excel: {p}")
-        return pd.read_excel(p)
+        return pd.read_excel(p, usecols=usecols, dtype=dtype)
+    read_kwargs = {k: v for k, v in (("usecols", usecols), ("dtype", dtype)) if v is not None}
+    df = _read_csv_any(p, verbose, **read_kwargs)
+    return numparse.convert_frame(df, skip=dtype or ()) if locale_numbers else df
+
+
+def _dialects(p: Path) -> Iterator[Tuple[str, str]]:
+    """(encoding, separator) pairs to try on `p`, most likely first."""
+    # `;` exports use `,` as decimal mark, so try the separator of the header first
+    seps = _sep_order(p, [",", ";", "\t"])
+    for enc in ["utf-8", "latin1", "cp1252"]:
+        for sep in seps:
+            yield enc, sep
+
 
+def _read_csv_any(p: Path, verbose: bool = False, **read_kwargs: Any) -> pd.DataFrame:
     # For CSV-like files, try common encodings/separators
-    encodings = ["utf-8", "latin1", "cp1252"]
-    seps = [",", ";", "\t"]
     last_err: Optional[Exception] = None
-    for enc in encodings:
-        for sep in seps:
+    for enc, sep in _dialects(p):
+        try:
+            if verbose:
+                print(f"Trying read_csv(path={p}, encoding={enc}, sep={sep})")
+            # the tolerant python engine picks the dialect on a sample;
+            # the whole file then goes through the much faster C parser
+            compression.read_csv(p, encoding=enc, sep=sep, engine="python", nrows=1000, **read_kwargs)
             try:
-                if verbose:
-                    print(f"Trying read_csv(path={p}, encoding={enc}, sep={sep})")
-                df = pd.read_csv(p, encoding=enc, sep=sep, engine="python")
-                return df
-            except Exception as e:
-                last_err = e
-                continue
+                return compression.read_csv(p, encoding=enc, sep=sep, **read_kwargs)
+            except Exception:
+                return compression.read_csv(p, encoding=enc, sep=sep, engine="python", **read_kwargs)
+        except Exception as e:
+            last_err = e
+            continue
 
     # If we reached here, we could not read it
     raise last_err if last_err is not None else ValueError("Could not read file")
 
 
+def sniff_dialect(p: Path, verbose: bool = False, **read_kwargs: Any) -> Tuple[str, str]:
+    """(encoding, separator) of the first candidate that parses a sample of `p`."""
+    last_err: Optional[Exception] = None
+    for enc, sep in _dialects(p):
+        try:
+            if verbose:
+                print(f"Trying read_csv(path={p}, encoding={enc}, sep={sep})")
+            compression.read_csv(p, encoding=enc, sep=sep, engine="python", nrows=1000, **read_kwargs)
+            return enc, sep
+        except Exception as e:
+            last_err = e
+    raise last_err if last_err is not None else ValueError("Could not read file")
+
+
+def _iter_chunks(p: Path, chunksize: int, verbose: bool = False, **read_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """Chunks of `p`, read with the dialect found by `sniff_dialect`."""
+    if p.suffix.lower() in (".xlsx", ".xls"):
+        yield pd.read_excel(p, **read_kwargs)
+        return
+    enc, sep = sniff_dialect(p, verbose, **read_kwargs)
+    yield from compression.iter_csv(p, chunksize, encoding=enc, sep=sep, **read_kwargs)
+
+
+def _load_sample(
+    files: List[Path],
+    n: int,
+    stratify_by: Optional[str],
+    seed: int,
+    source_column: Optional[str],
+    locale_numbers: bool,
+    verbose: bool,
+    read_kwargs: Dict[str, Any],
+) -> pd.DataFrame:
+    """One streaming pass over `files` keeping a reservoir sample (see `sampling.py`)."""
+    names = [p.name for p in files]
+    if len(set(names)) < len(names):
+        names = [str(p) for p in files]
+    columns: List[Any] = []
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        for p, name in zip(files, names):
+            for chunk in _iter_chunks(p, sampling.CHUNK_ROWS, verbose, **read_kwargs):
+                if not columns:
+                    columns.extend(chunk.columns)
+                elif set(chunk.columns) != set(columns):
+                    missing = [c for c in columns if c not in chunk.columns]
+                    extra = [c for c in chunk.columns if c not in columns]
+                    raise ValueError(f"Schema mismatch in {p.name}: missing {missing}, extra {extra} (vs {files[0].name})")
+                if source_column is not None:
+                    chunk[source_column] = name
+                yield chunk
+
+    df = sampling.reservoir_sample(chunks(), n, stratify_by=stratify_by, seed=seed)
+    if source_column is not None:
+        df[source_column] = pd.Categorical(df[source_column], categories=names)
+    if locale_numbers:
+        # formats are detected on the sample, which is what gets converted
+        numparse.convert_frame(df, skip=read_kwargs.get("dtype") or ())
+    df.attrs["sources"] = [str(p) for p in files]
+    return df
+
+
+def _load_many(
+    files: List[Path],
+    source_column: Optional[str],
+    max_workers: Optional[int],
+    verbose: bool,
+    locale_numbers: bool = True,
+    usecols: Optional[Sequence[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """Read `files` (in worker processes when there are several) and concatenate them once."""
+    if not files:
+        raise FileNotFoundError("No files matched")
+    if max_workers is None:
+        max_workers = min(len(files), os.cpu_count() or 1)
+    if max_workers <= 1 or len(files) == 1:
+        frames = [_load_one(p, verbose, locale_numbers, usecols, dtype) for p in files]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+
+        load = partial(_load_one, verbose=verbose, locale_numbers=locale_numbers, usecols=usecols, dtype=dtype)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(pool.map(load, files, chunksize=max(1, len(files) // (4 * max_workers))))
+
+    columns = list(frames[0].columns)
+    for p, frame in zip(files[1:], frames[1:]):
+        if list(frame.columns) != columns:
+            missing = [c for c in columns if c not in frame.columns]
+            extra = [c for c in frame.columns if c not in columns]
+            if missing or extra:
+                raise ValueError(f"Schema mismatch in {p.name}: missing {missing}, extra {extra} (vs {files[0].name})")
+    lengths = [len(frame) for frame in frames]
+    formats: Dict[str, str] = {}
+    failures: Dict[str, int] = {}
+    ambiguous: List[str] = []
+    for frame in frames:
+        formats.update(frame.attrs.get("number_formats", {}))
+        ambiguous.extend(c for c in frame.attrs.get("number_ambiguous", []) if c not in ambiguous)
+        for col, n in frame.attrs.get("number_failures", {}).items():
+            failures[col] = failures.get(col, 0) + n
+    # same columns in another order are aligned by name
+    out = pd.concat(frames, ignore_index=True)
+    del frames
+    if source_column is not None:
+        names = [p.name for p in files]
+        if len(set(names)) < len(names):
+            names = [str(p) for p in files]
+        out[source_column] = pd.Categorical.from_codes(np.repeat(np.arange(len(files)), lengths), categories=names)
+    out.attrs["sources"] = [str(p) for p in files]
+    if locale_numbers:
+        out.attrs["number_formats"] = formats
+        out.attrs["number_failures"] = failures
+        out.attrs["number_ambiguous"] = ambiguous
+    return out
+
+
 def summarize_df(df: pd.DataFrame, top: int = 5) -> Dict[str, Any]:
     """Return a summary dictionary for a DataFrame.
 
@@ -116,21 +353,41 @@ def clean_df(
     drop_duplicates: bool = True,
     fillna: Optional[Dict[str, Any]] = None,
     strip_strings: bool = True,
+    memory_budget: Any = None,
+    subset: Optional[List[str]] = None,
+    keep_latest: Optional[str] = None,
 ) -> pd.DataFrame:
     """Perform lightweight cleaning:
 
-    - Optionally drop duplicate rows.
+    - Optionally drop duplicate rows. By default a row is a duplicate when
+      all of its columns match; with `subset` only those key columns are
+      compared. With `keep_latest` (a timestamp column) the newest copy of
+      each key is kept instead of the first one; without `subset` the key
+      is every column except `keep_latest`.
     - Optionally fill NA values using `fillna` mapping or a scalar.
     - Optionally strip string columns of leading/trailing whitespace.
 
+    With a `memory_budget` (bytes, "2GB", a `membudget.MemoryBudget`, or
+    AURELION_MEMORY_BUDGET in the environment) the frame is cleaned in chunks
+    sized to the budget instead of copying it whole; see `_clean_df_chunked`.
+    The budget bounds the cleaning working set: the cleaned frame that is
+    returned must still fit in memory.
+
     Returns a new DataFrame (does not modify the input in place).
     """
+    budget = membudget.MemoryBudget.resolve(memory_budget)
+    if budget is not None:
+        return _clean_df_chunked(df, drop_duplicates, fillna, strip_strings, budget, subset, keep_latest)
+
     out = df.copy()
     if drop_duplicates:
-        out = out.drop_duplicates()
+        if subset is None and keep_latest is None:
+            out = out.drop_duplicates()
+        else:
+            out = dedupe.drop_duplicate_keys(out, subset, keep_latest)
 
     if strip_strings:
-        for col in out.select_dtypes(include=["object"]).columns:
+        for col in [c for c in out.columns if numparse.is_text(out[c])]:
             try:
                 out[col] = out[col].astype(str).str.strip()
             except Exception:
@@ -143,6 +400,66 @@ def clean_df(
     return out
 
 
+def _clean_df_chunked(
+    df: pd.DataFrame,
+    drop_duplicates: bool,
+    fillna: Optional[Dict[str, Any]],
+    strip_strings: bool,
+    budget: "membudget.MemoryBudget",
+    subset: Optional[List[str]] = None,
+    keep_latest: Optional[str] = None,
+) -> pd.DataFrame:
+    """Chunked `clean_df` that keeps its working set under `budget`.
+
+    Duplicates are found from 64-bit row hashes (8 bytes per row) computed
+    chunk by chunk, so rows are never compared as whole frames; the chance of
+    a false duplicate is negligible at these sizes. With `keep_latest` the
+    timestamps are collected the same way and the winners picked at the end
+    (`dedupe.keep_mask`). Cleaned chunks are spilled to disk when memory
+    runs short and concatenated once at the end.
+
+    The budget only bounds the per-chunk working set. Spilled parts are
+    read back for the final concatenation, so the returned frame (plus the
+    parts being concatenated) must fit; spilling only lowers the peak
+    while the chunks are being cleaned.
+    """
+    keep = None
+    if drop_duplicates:
+        hashes, stamps = [], []
+        for chunk in membudget.iter_row_chunks(df, budget, copies=1.5):
+            hashes.append(dedupe.fingerprint(chunk, subset, exclude=keep_latest))
+            if keep_latest is not None:
+                stamps.append(dedupe.timestamp_key(chunk[keep_latest]))
+        all_hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype="uint64")
+        keep = dedupe.keep_mask(all_hashes, np.concatenate(stamps) if stamps else None)
+
+    string_cols = [c for c in df.columns if numparse.is_text(df[c])] if strip_strings else []
+    parts = membudget.ChunkCollector(budget)
+    pos = 0
+    for chunk in membudget.iter_row_chunks(df, budget):
+        n = len(chunk)
+        if keep is not None:
+            chunk = chunk[keep[pos:pos + n]]
+        pos += n
+        chunk = chunk.copy()
+        for col in string_cols:
+            try:
+                chunk[col] = chunk[col].astype(str).str.strip()
+            except Exception:
+                # ignore columns that cannot be converted to str
+                pass
+        if fillna is not None:
+            chunk = chunk.fillna(fillna)
+        parts.add(chunk)
+
+    try:
+        out = pd.concat(list(parts)) if len(parts) else df.iloc[:0].copy()
+    finally:
+        budget.cleanup()
+    budget.report_if_degraded("clean_df")
+    return out
+
+
 if __name__ == "__main__":
     # small demo when run directly
     print("Demo: scanning db/ for CSV files...")
@@ -0,0 +1,175 @@
+"""Fast parsing of date columns that repeat the same few values.
+
+A year of sales has ~365 distinct `fecha` values however many rows there
+are, so `parse_dates` parses each distinct value once, with one explicit
+format, and maps the results back to the rows through integer codes.
+
+The format is inferred from a sample of distinct values (FORMATS, where
+day-first comes before month-first, then `guess_datetime_format` guesses)
+and cached per source file: the `sources` listed in `s.attrs` (set by
+`data.load_csv`) plus the column name. Cached formats are kept in memory
+and in `.cache/date_formats.json`; one that stops fitting the data is
+inferred again.
+
+    s = parse_dates(ventas["fecha"])          # datetime64[ns], NaT on failures
+    infer_format(ventas["fecha"])             # "%d/%m/%Y"
+"""
+from __future__ import annotations
+
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_PATH = ROOT / ".cache" / "date_formats.json"
+
+# tried in order before the guessed formats; the first best fit wins
+FORMATS: List[str] = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M:%S",
+    "%Y/%m/%d",
+    "%Y%m%d",
+]
+
+# share of the distinct values a format must parse to be used
+MIN_SHARE = 0.95
+SAMPLE_UNIQUES = 500
+
+_cache: Optional[Dict[str, str]] = None
+
+
+def _load_cache() -> Dict[str, str]:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _store(key: str, fmt: str) -> None:
+    cache = _load_cache()
+    if cache.get(key) == fmt:
+        return
+    cache[key] = fmt
+    # forget files that are gone (temporary exports, test runs)
+    for stale in [k for k in cache if k != key and not _source_paths(k)[0].exists()]:
+        del cache[stale]
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass  # the in-memory cache still works
+
+
+def cache_key(sources: Optional[Iterable[str]], column: object) -> Optional[str]:
+    """Cache key of `column` read from `sources`, or None without sources."""
+    if not sources:
+        return None
+    return "|".join(str(Path(p).resolve()) for p in sources) + f"::{column}"
+
+
+def _source_paths(key: str) -> List[Path]:
+    return [Path(p) for p in key.rsplit("::", 1)[0].split("|")]
+
+
+def _share(values: pd.Series, fmt: str) -> float:
+    return float(pd.to_datetime(values, format=fmt, errors="coerce").notna().mean())
+
+
+def infer_format(s: pd.Series, sample: int = SAMPLE_UNIQUES) -> Optional[str]:
+    """Best explicit format for the text dates in `s`, or None if none fits."""
+    from pandas.tseries.api import guess_datetime_format
+
+    values = pd.Series(pd.unique(s.dropna().astype(str).str.strip()), dtype=object)
+    values = values[values != ""].iloc[:sample]
+    if values.empty:
+        return None
+    # FORMATS first so that ties resolve in their order (`%Y-%m-%d` over
+    # the day-first guess `%Y-%d-%m` when every day is <= 12)
+    candidates = list(FORMATS)
+    for first in values.iloc[:5]:
+        for dayfirst in (True, False):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                guessed = guess_datetime_format(first, dayfirst=dayfirst)
+            if guessed and guessed not in candidates:
+                candidates.append(guessed)
+    best, best_share = None, 0.0
+    for fmt in candidates:
+        share = _share(values, fmt)
+        if share > best_share:
+            best, best_share = fmt, share
+        if share == 1.0:
+            break
+    return best if best_share >= MIN_SHARE else None
+
+
+def _naive(parsed: pd.Series) -> pd.Series:
+    if getattr(parsed.dt, "tz", None) is not None:
+        parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    return parsed.astype("datetime64[ns]")
+
+
+def _guess(text: pd.Series) -> pd.Series:
+    """Each value parsed on its own, day-first (pandas' element-wise inference)."""
+    try:
+        return _naive(pd.to_datetime(text, format="mixed", dayfirst=True, errors="coerce"))
+    except (ValueError, TypeError):
+        # mixed UTC offsets
+        return _naive(pd.to_datetime(text, format="mixed", dayfirst=True, errors="coerce", utc=True))
+
+
+def parse_dates(
+    s: pd.Series,
+    fmt: Optional[str] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> pd.Series:
+    """`s` as datetime64, parsing each distinct value once (NaT where it fails).
+
+    `fmt` forces a format; otherwise the cached one for (`sources`, column)
+    is used, or one is inferred. `sources` defaults to `s.attrs["sources"]`.
+    Values the format does not fit are parsed one by one, day-first.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    codes, uniques = pd.factorize(s)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+
+    if fmt is None:
+        key = cache_key(sources if sources is not None else s.attrs.get("sources"), s.name)
+        fmt = _load_cache().get(key) if key else None
+        if fmt is not None and _share(text.iloc[:SAMPLE_UNIQUES], fmt) < MIN_SHARE:
+            fmt = None
+        if fmt is None:
+            fmt = infer_format(text)
+            if fmt is not None and key:
+                _store(key, fmt)
+
+    if fmt is not None:
+        parsed = _naive(pd.to_datetime(text, format=fmt, errors="coerce"))
+    else:
+        parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    rest = parsed.isna() & (text != "")
+    if rest.any():
+        parsed[rest] = _guess(text[rest])
+    # code -1 (missing) picks the trailing NaT
+    values = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(values[codes], index=s.index, name=s.name)
@@ -0,0 +1,358 @@
+"""Key-based deduplication across chunks and files.
+
+Rows are identified by a 64-bit fingerprint of their key columns
+(`fingerprint`). With `latest` set, the copy with the largest timestamp wins
+(ties go to the row read last, i.e. the newer export); otherwise the first
+copy wins. Two strategies stream the input instead of loading it together:
+
+- "hash": fingerprints are kept in a compact `FingerprintSet` (8 bytes per
+  distinct key). keep-first is a single pass; keep-latest keeps a fingerprint and a
+  timestamp per row (`BYTES_PER_KEY` with the sort), picks the winners, then
+  re-reads the input.
+- "external": each chunk is sorted by (fingerprint, timestamp) and written to
+  a run file; the runs are merged block by block and the first row of each
+  fingerprint is emitted. Memory stays at one block per run, whatever the
+  input size. Output comes out in fingerprint order, not input order.
+
+`method="auto"` picks "external" only when a memory budget is set and the
+estimated fingerprint arrays would not fit in it.
+
+    # years of overlapping daily exports -> one deduplicated file
+    python src/dedupe.py "exports/ventas_*.csv" --key id_venta --latest fecha -o ventas.csv
+"""
+from __future__ import annotations
+
+import glob
+import pickle
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src import compression, dates, membudget
+except Exception:
+    import compression  # type: ignore
+    import dates  # type: ignore
+    import membudget  # type: ignore
+
+
+CHUNK_ROWS = 200_000
+# rows per block in the external runs (and per merged output chunk)
+BLOCK_ROWS = 50_000
+# fingerprint + timestamp + sequence number per row in keep-latest mode
+BYTES_PER_KEY = 24
+
+_FP, _TS, _SEQ = "__fp", "__ts", "__seq"
+
+PathLike = Union[str, Path]
+
+
+def fingerprint(df: pd.DataFrame, subset: Optional[Sequence[str]] = None, exclude: Optional[str] = None) -> np.ndarray:
+    """64-bit hash of each row's `subset` columns (all columns but `exclude` by default).
+
+    Keep-latest callers pass their timestamp column as `exclude`: copies that
+    differ only in the timestamp are the same key.
+    """
+    cols = list(subset) if subset is not None else [c for c in df.columns if c != exclude]
+    if not len(df):
+        return np.empty(0, dtype="uint64")
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+
+def timestamp_key(s: pd.Series) -> np.ndarray:
+    """Sortable int64/float64 key of a timestamp column; missing values sort first."""
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        return s.to_numpy(dtype="float64", na_value=-np.inf)
+    if not pd.api.types.is_datetime64_any_dtype(s.dtype):
+        s = dates.parse_dates(s)
+    if getattr(s.dt, "tz", None) is not None:
+        s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+    # NaT is the smallest int64, so it never beats a real timestamp
+    return s.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def keep_mask(fps: np.ndarray, ts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Boolean mask of the rows to keep: first per fingerprint, or latest by `ts`."""
+    if ts is None:
+        return ~pd.Series(fps).duplicated().to_numpy()
+    n = len(fps)
+    # ascending by (fp, ts, position): the last row of each fp group wins
+    order = np.lexsort((np.arange(n), ts, fps))
+    sorted_fp = fps[order]
+    last = np.ones(n, dtype=bool)
+    if n > 1:
+        last[:-1] = sorted_fp[1:] != sorted_fp[:-1]
+    mask = np.zeros(n, dtype=bool)
+    mask[order[last]] = True
+    return mask
+
+
+def drop_duplicate_keys(df: pd.DataFrame, subset: Optional[Sequence[str]] = None, latest: Optional[str] = None) -> pd.DataFrame:
+    """In-memory key deduplication with the same rules as the streaming paths."""
+    ts = timestamp_key(df[latest]) if latest is not None else None
+    return df[keep_mask(fingerprint(df, subset, exclude=latest), ts)]
+
+
+class FingerprintSet:
+    """Set of uint64 fingerprints stored as a few sorted arrays.
+
+    New keys go into a fresh sorted level; levels of similar size are merged
+    (like a log-structured merge tree), so adding n keys costs O(n log n)
+    overall and a lookup is one `searchsorted` per level.
+    """
+
+    def __init__(self) -> None:
+        self._levels: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self._levels)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self._levels)
+
+    def contains(self, fps: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(fps), dtype=bool)
+        for level in self._levels:
+            idx = np.minimum(np.searchsorted(level, fps), len(level) - 1)
+            found |= level[idx] == fps
+        return found
+
+    def add(self, fps: np.ndarray) -> None:
+        arr = np.unique(fps)
+        while self._levels and len(self._levels[-1]) <= 2 * len(arr):
+            arr = np.union1d(self._levels.pop(), arr)
+        if len(arr):
+            self._levels.append(arr)
+
+    def add_new(self, fps: np.ndarray) -> np.ndarray:
+        """Mask of the first occurrence of each key not seen before; adds them."""
+        new = ~pd.Series(fps).duplicated().to_numpy() & ~self.contains(fps)
+        self.add(fps[new])
+        return new
+
+
+# -- input -----------------------------------------------------------------
+def expand_paths(paths: Union[PathLike, Iterable[PathLike]]) -> List[Path]:
+    """Files from a path, a glob pattern, a directory (its CSVs) or a list of those."""
+    items = [paths] if isinstance(paths, (str, Path)) else list(paths)
+    out: List[Path] = []
+    for item in items:
+        p = Path(item)
+        if p.is_dir():
+            out.extend(sorted(q for q in p.iterdir() if q.is_file() and compression.is_csv(q)))
+        elif p.exists():
+            out.append(p)
+        else:
+            matches = sorted(glob.glob(str(item)))
+            if not matches:
+                raise FileNotFoundError(f"File not found: {item}")
+            out.extend(Path(m) for m in matches)
+    return out
+
+
+def iter_csv_chunks(paths: Sequence[Path], key_cols: Optional[Sequence[str]], chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Chunks of every file in order. Key columns are read as text so the
+    same key hashes the same in every file (an int column with nulls would
+    otherwise come back as float in some chunks only)."""
+    try:
+        from src.inventory import read_csv_detect
+    except Exception:
+        from inventory import read_csv_detect  # type: ignore
+
+    for p in paths:
+        _, enc, sep = read_csv_detect(p, nrows=1000)
+        dtype: Any = str if key_cols is None else {c: str for c in key_cols}
+        yield from compression.iter_csv(p, chunksize, encoding=enc, sep=sep, dtype=dtype)
+
+
+def _estimate_rows(paths: Sequence[Path]) -> int:
+    total = sum(p.stat().st_size for p in paths)
+    if not paths or not total:
+        return 0
+    with open(paths[0], "rb") as fh:
+        head = fh.read(1 << 16)
+    per_line = len(head) / max(head.count(b"\n"), 1)
+    return int(total / max(per_line, 1.0))
+
+
+def choose_method(paths: Sequence[Path], budget: Optional["membudget.MemoryBudget"]) -> str:
+    if budget is None:
+        return "hash"
+    return "external" if _estimate_rows(paths) * BYTES_PER_KEY > budget.soft_limit - budget.check() else "hash"
+
+
+# -- strategies ------------------------------------------------------------
+def _hash_first(chunks: Iterable[pd.DataFrame], subset) -> Iterator[pd.DataFrame]:
+    seen = FingerprintSet()
+    for chunk in chunks:
+        yield chunk[seen.add_new(fingerprint(chunk, subset))]
+
+
+def _hash_latest(make_chunks, subset, latest: str) -> Iterator[pd.DataFrame]:
+    fps, ts = [], []
+    for chunk in make_chunks():
+        fps.append(fingerprint(chunk, subset, exclude=latest))
+        ts.append(timestamp_key(chunk[latest]))
+    if not fps:
+        return
+    keep = keep_mask(np.concatenate(fps), np.concatenate(ts))
+    del fps, ts
+    pos = 0
+    for chunk in make_chunks():
+        n = len(chunk)
+        yield chunk[keep[pos:pos + n]]
+        pos += n
+
+
+def _sort_cols(latest: Optional[str]):
+    # first row of each fp group after sorting is the one to keep
+    if latest is None:
+        return [_FP, _SEQ], [True, True]
+    return [_FP, _TS, _SEQ], [True, False, False]
+
+
+def _write_run(path: Path, df: pd.DataFrame, block_rows: int) -> None:
+    with open(path, "wb") as fh:
+        for start in range(0, len(df), block_rows):
+            pickle.dump(df.iloc[start:start + block_rows], fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path: Path) -> Iterator[pd.DataFrame]:
+    with open(path, "rb") as fh:
+        while True:
+            try:
+                yield pickle.load(fh)
+            except EOFError:
+                return
+
+
+def _external(chunks: Iterable[pd.DataFrame], subset, latest: Optional[str], block_rows: int,
+              spill_dir: Optional[Path] = None) -> Iterator[pd.DataFrame]:
+    by, ascending = _sort_cols(latest)
+    tmp = Path(tempfile.mkdtemp(prefix="aurelion_dedupe_", dir=spill_dir))
+    try:
+        runs: List[Path] = []
+        seq = 0
+        columns = None
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+            if not len(chunk):
+                continue
+            extra = {_FP: fingerprint(chunk, subset, exclude=latest), _SEQ: np.arange(seq, seq + len(chunk))}
+            if latest is not None:
+                extra[_TS] = timestamp_key(chunk[latest])
+            seq += len(chunk)
+            run = chunk.assign(**extra).sort_values(by, ascending=ascending, kind="stable")
+            path = tmp / f"run{len(runs):06d}.pkl"
+            _write_run(path, run, block_rows)
+            runs.append(path)
+        yield from _merge_runs(runs, by, ascending, block_rows)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _merge_runs(runs: List[Path], by, ascending, block_rows: int) -> Iterator[pd.DataFrame]:
+    readers = [_read_run(p) for p in runs]
+    bufs: List[Optional[pd.DataFrame]] = [next(r, None) for r in readers]
+    pending: List[pd.DataFrame] = []
+    pending_rows = 0
+    while any(b is not None for b in bufs):
+        active = [i for i, b in enumerate(bufs) if b is not None]
+        bound = min(bufs[i][_FP].iat[-1] for i in active)
+        taken = []
+        for i in active:
+            buf = bufs[i]
+            # a key may continue into the next block: load until it ends
+            while buf[_FP].iat[-1] == bound:
+                nxt = next(readers[i], None)
+                if nxt is None:
+                    break
+                buf = pd.concat([buf, nxt])
+            k = int(np.searchsorted(buf[_FP].to_numpy(), bound, side="right"))
+            taken.append(buf.iloc[:k])
+            rest = buf.iloc[k:]
+            bufs[i] = rest if len(rest) else next(readers[i], None)
+        merged = pd.concat(taken).sort_values(by, ascending=ascending, kind="stable")
+        merged = merged[~merged[_FP].duplicated()]
+        pending.append(merged.drop(columns=[c for c in (_FP, _TS, _SEQ) if c in merged.columns]))
+        pending_rows += len(merged)
+        if pending_rows >= block_rows:
+            yield pd.concat(pending)
+            pending, pending_rows = [], 0
+    if pending:
+        yield pd.concat(pending)
+
+
+def dedupe_chunks(
+    paths: Union[PathLike, Iterable[PathLike]],
+    subset: Optional[Sequence[str]] = None,
+    latest: Optional[str] = None,
+    method: str = "auto",
+    chunksize: int = CHUNK_ROWS,
+    memory_budget: Any = None,
+) -> Iterator[pd.DataFrame]:
+    """Deduplicated chunks of one or more CSVs (paths, globs or directories).
+
+    Args:
+        subset: key columns; when None all columns (read as text) except `latest`.
+        latest: timestamp column; keep the newest copy of each key.
+        method: "hash", "external" or "auto" (see the module docstring).
+        memory_budget: as in `data.clean_df`; only used to choose the method
+            and where external runs are written.
+    """
+    files = expand_paths(paths)
+    budget = membudget.MemoryBudget.resolve(memory_budget)
+    if method == "auto":
+        method = choose_method(files, budget)
+    make_chunks = lambda: iter_csv_chunks(files, subset, chunksize)  # noqa: E731
+    if method == "hash":
+        if latest is None:
+            return _hash_first(make_chunks(), subset)
+        return _hash_latest(make_chunks, subset, latest)
+    if method == "external":
+        spill = budget._spill_root if budget is not None else None
+        return _external(make_chunks(), subset, latest, min(BLOCK_ROWS, chunksize), spill)
+    raise ValueError(f"Unknown dedupe method: {method!r}")
+
+
+def dedupe_csv(paths, out: PathLike, **kwargs: Any) -> int:
+    """Write the deduplicated rows of `paths` to one CSV; return the row count."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    header = True
+    with open(out, "w", encoding="utf-8", newline="") as fh:
+        for chunk in dedupe_chunks(paths, **kwargs):
+            chunk.to_csv(fh, index=False, header=header)
+            header = False
+            rows += len(chunk)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Deduplicate rows across CSV files")
+    ap.add_argument("paths", nargs="+", help="CSV files, directories or glob patterns")
+    ap.add_argument("-o", "--out", type=Path, required=True)
+    ap.add_argument("--key", action="append", help="key column (repeatable); default: whole row")
+    ap.add_argument("--latest", default=None, help="timestamp column; keep the newest copy")
+    ap.add_argument("--method", choices=["auto", "hash", "external"], default="auto")
+    ap.add_argument("--memory-budget", default=None)
+    args = ap.parse_args(argv)
+
+    rows = dedupe_csv(args.paths, args.out, subset=args.key, latest=args.latest,
+                      method=args.method, memory_budget=args.memory_budget)
+    print(f"{rows} rows written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,81 @@
+from pathlib import Path
+
+try:
+    from src import metrics, preload
+except Exception:
+    import metrics  # type: ignore
+    import preload  # type: ignore
+
+
+# Valores de la documentación original; se muestran si todavía no hay datos en db/
+REFERENCIA = {
+    'clientes': 100,
+    'productos': 100,
+    'ventas': 120,
+    'detalle': 343,
+    'densidad': 2.85,
+    'medios_pago': {'tarjeta': None, 'qr': None, 'transferencia': None, 'efectivo': None},
+    'tablas': {
+        'ventas': {'rows': 120, 'columnas': ['id_venta (PK, INT)', 'fecha (DATE)', 'id_cliente (FK, INT)',
+                                             'nombre_cliente (VARCHAR(100))', 'email (VARCHAR(150))',
+                                             'medio_pago (ENUM)']},
+        'productos': {'rows': 100, 'columnas': ['id_producto (PK, INT)', 'nombre_producto (VARCHAR(200))',
+                                                'categoria (VARCHAR(100))', 'precio_unitario (DECIMAL(10,2))']},
+        'detalle_ventas': {'rows': 343, 'columnas': ['id_venta (FK, INT)', 'id_producto (FK, INT)',
+                                                     'nombre_producto (VARCHAR(200))', 'cantidad (INT)',
+                                                     'precio_unitario (DECIMAL(10,2))', 'importe (DECIMAL(12,2))']},
+        'clientes': {'rows': 100, 'columnas': ['id_cliente (PK, INT)', 'nombre_cliente (VARCHAR(100))',
+                                               'email (VARCHAR(150))', 'ciudad (VARCHAR(100))',
+                                               'fecha_alta (DATE)']},
+    },
+    'generated_at': None,
+}
+
+DESCRIPCIONES = {
+    'ventas': 'Tabla principal de transacciones de venta',
+    'productos': 'Catálogo de productos disponibles',
+    'detalle_ventas': 'Tabla pivote que relaciona ventas con productos',
+    'clientes': 'Registro de clientes del sistema',
+}
+
+
 class SistemaGestionVentas:
-    def __init__(self):
-        self.documentacion = {
+    def __init__(self, db_dir: Path = metrics.DB_DIR, snapshot_path: Path = metrics.SNAPSHOT_PATH):
+        # El snapshot se carga en segundo plano apenas se crea el menú (y se
+        # actualiza sólo si cambió algún CSV); las opciones del menú nunca leen
+        # las tablas y sólo esperan si la carga todavía no terminó.
+        self._preload = preload.Preloader()
+        self._preload.submit('metricas', self._cargar_metricas, db_dir, snapshot_path)
+        self._metricas = None
+
+    @staticmethod
+    def _cargar_metricas(db_dir, snapshot_path):
+        resumen = metrics.summary(metrics.load_current(db_dir, snapshot_path))
+        metricas = dict(resumen or REFERENCIA)
+        orden = list(DESCRIPCIONES)
+        metricas['tablas'] = dict(sorted(
+            metricas['tablas'].items(),
+            key=lambda item: orden.index(item[0]) if item[0] in orden else len(orden),
+        ))
+        return resumen is not None, metricas
+
+    def _esperar_metricas(self):
+        if self._metricas is None:
+            self._desde_datos, self._metricas = self._preload.get('metricas', 'métricas')
+
+    @property
+    def metricas(self):
+        self._esperar_metricas()
+        return self._metricas
+
+    @property
+    def desde_datos(self):
+        self._esperar_metricas()
+        return self._desde_datos
+
+    @property
+    def documentacion(self):
+        return {
             'tema': "Sistema de Gestión de Ventas para E-commerce - Plataforma integral para administrar operaciones comerciales digitales",
             'problema': """
 Problemáticas identificadas en la gestión manual del e-commerce:
@@ -28,27 +103,50 @@ Beneficios implementados:
             """,
             'tablas': """
 Tablas disponibles en el sistema:
-1. ventas (120 registros)
-2. productos (100 registros) 
-3. detalle_ventas (343 registros)
-4. clientes (100 registros)
+""" + self._lista_tablas() + """
 
 Relaciones principales:
 • Clientes 1:N Ventas
 • Ventas 1:N Detalle_Ventas  
 • Productos 1:N Detalle_Ventas
             """,
-            'metricas': """
-Métricas del sistema basadas en la documentación:
-• Total clientes: 100 registros
-• Total productos: 100 registros  
-• Total ventas: 120 transacciones
-• Detalles de venta: 343 registros
-• Densidad productos/venta: 2.85 promedio
-• Medios de pago: tarjeta, qr, transferencia, efectivo
+            'metricas': f"""
+Métricas del sistema {self._origen()}:
+• Total clientes: {self._n('clientes')} registros
+• Total productos: {self._n('productos')} registros
+• Total ventas: {self._n('ventas')} transacciones
+• Detalles de venta: {self._n('detalle')} registros
+• Densidad productos/venta: {self._densidad()} promedio
+• Medios de pago: {', '.join(self.metricas['medios_pago']) or 's/d'}
             """
         }
 
+    def _origen(self):
+        if not self.desde_datos:
+            return "basadas en la documentación"
+        return f"según los datos de db/ (snapshot {self.metricas['generated_at']})"
+
+    def _n(self, clave):
+        valor = self.metricas.get(clave)
+        return "s/d" if valor is None else str(valor)
+
+    def _densidad(self):
+        valor = self.metricas.get('densidad')
+        return "s/d" if valor is None else f"{valor:.2f}"
+
+    def _lista_tablas(self):
+        return "\n".join(
+            f"{i}. {nombre} ({info['rows']} registros)"
+            for i, (nombre, info) in enumerate(self.metricas['tablas'].items(), 1)
+        )
+
+    def _medios_pago(self):
+        medios = self.metricas['medios_pago']
+        total = sum(v for v in medios.values() if v)
+        if not total:
+            return ", ".join(medios)
+        return ", ".join(f"{m} {100 * v / total:.0f}%" for m, v in medios.items())
+
     def mostrar_menu(self):
         print("\n" + "=" * 60)
         print("       SISTEMA DE GESTIÓN DE VENTAS - E-COMMERCE")
@@ -73,29 +171,11 @@ Métricas del sistema basadas en la documentación:
         print("=" * 60)
 
         estructuras = {
-            'ventas (120 registros)': {
-                'columnas': ['id_venta (PK, INT)', 'fecha (DATE)', 'id_cliente (FK, INT)',
-                             'nombre_cliente (VARCHAR(100))', 'email (VARCHAR(150))',
-                             'medio_pago (ENUM)'],
-                'descripcion': 'Tabla principal de transacciones de venta'
-            },
-            'productos (100 registros)': {
-                'columnas': ['id_producto (PK, INT)', 'nombre_producto (VARCHAR(200))',
-                             'categoria (VARCHAR(100))', 'precio_unitario (DECIMAL(10,2))'],
-                'descripcion': 'Catálogo de productos disponibles'
-            },
-            'detalle_ventas (343 registros)': {
-                'columnas': ['id_venta (FK, INT)', 'id_producto (FK, INT)',
-                             'nombre_producto (VARCHAR(200))', 'cantidad (INT)',
-                             'precio_unitario (DECIMAL(10,2))', 'importe (DECIMAL(12,2))'],
-                'descripcion': 'Tabla pivote que relaciona ventas con productos'
-            },
-            'clientes (100 registros)': {
-                'columnas': ['id_cliente (PK, INT)', 'nombre_cliente (VARCHAR(100))',
-                             'email (VARCHAR(150))', 'ciudad (VARCHAR(100))',
-                             'fecha_alta (DATE)'],
-                'descripcion': 'Registro de clientes del sistema'
+            f"{tabla} ({info['rows']} registros)": {
+                'columnas': info['columnas'],
+                'descripcion': DESCRIPCIONES.get(tabla, 'Tabla de datos')
             }
+            for tabla, info in self.metricas['tablas'].items()
         }
 
         for tabla, info in estructuras.items():
@@ -110,12 +190,12 @@ Métricas del sistema basadas en la documentación:
         print("=" * 60)
 
         metricas = [
-            ("Total Clientes", "100", "Registros únicos en sistema"),
-            ("Total Productos", "100", "Inventario activo"),
-            ("Total Ventas", "120", "Transacciones completadas"),
-            ("Detalles de Ventas", "343", "Items vendidos en total"),
-            ("Productos por Venta", "2.85", "Densidad promedio"),
-            ("Medios de Pago", "4 tipos", "tarjeta, qr, transferencia, efectivo"),
+            ("Total Clientes", self._n('clientes'), "Registros únicos en sistema"),
+            ("Total Productos", self._n('productos'), "Inventario activo"),
+            ("Total Ventas", self._n('ventas'), "Transacciones completadas"),
+            ("Detalles de Ventas", self._n('detalle'), "Items vendidos en total"),
+            ("Productos por Venta", self._densidad(), "Densidad promedio"),
+            ("Medios de Pago", f"{len(self.metricas['medios_pago'])} tipos", self._medios_pago()),
             ("Relaciones", "1:N principales", "Clientes→Ventas, Ventas→Detalles, Productos→Detalles")
         ]
 
@@ -123,17 +203,20 @@ Métricas del sistema basadas en la documentación:
             print(f"• {nombre}: {valor} - {descripcion}")
 
         print(f"\n💡 Observación: La tabla detalle_ventas funciona como tabla pivote")
-        print("  conectando ventas con productos, con un promedio de 2.85 productos por venta")
+        print(f"  conectando ventas con productos, con un promedio de {self._densidad()} productos por venta")
+        print(f"  Fuente: {self._origen()}")
 
     def mostrar_diagrama(self):
         print("\n" + "🔄 DIAGRAMA DE RELACIONES Y FLUJO DEL SISTEMA")
         print("=" * 60)
-        print("""
+        c, v, p, d = (self._n(k) for k in ('clientes', 'ventas', 'productos', 'detalle'))
+        detalle_titulo = f"DETALLE_VENTAS ({d})".ljust(20)
+        print(f"""
         RELACIONES ENTRE TABLAS (Modelo Entidad-Relación):
 
-        CLIENTES (100) ||--o{ VENTAS (120) : realiza
-        VENTAS (120) ||--o{ DETALLE_VENTAS (343) : contiene  
-        PRODUCTOS (100) ||--o{ DETALLE_VENTAS (343) : aparece_en
+        CLIENTES ({c}) ||--o{{ VENTAS ({v}) : realiza
+        VENTAS ({v}) ||--o{{ DETALLE_VENTAS ({d}) : contiene
+        PRODUCTOS ({p}) ||--o{{ DETALLE_VENTAS ({d}) : aparece_en
 
         FLUJO DEL SISTEMA:
 
@@ -152,7 +235,7 @@ Métricas del sistema basadas en la documentación:
                                         │
                                         ▼
                             ┌─────────────────────┐
-                            │ DETALLE_VENTAS (343)│
+                            │ {detalle_titulo}│
                             │                     │
                             │ • id_venta (FK)     │
                             │ • id_producto (FK)  │
@@ -212,6 +295,9 @@ Métricas del sistema basadas en la documentación:
                 print("¡Gracias por usar el Sistema de Gestión de Ventas!")
                 print("Documentación basada en el proyecto E-commerce")
                 print("=" * 50)
+                # si el refresco de métricas sigue corriendo, la salida espera
+                # a que termine (ver src/preload.py)
+                self._preload.shutdown()
                 break
             else:
                 print("\n❌ Opción inválida. Por favor, seleccione 1-6.")
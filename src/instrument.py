@@ -0,0 +1,215 @@
+"""Opt-in per-stage timing and memory instrumentation.
+
+Wrap a unit of work with the `stage` context manager (or the `traced`
+decorator) to record wall time, CPU time, tracemalloc peak and rows
+processed:
+
+    with stage("load_ventas") as st:
+        df = load_df(p)
+        st.rows = len(df)
+
+Instrumentation is off unless an environment variable is set (a `.env` file
+in the working directory is honoured through python-dotenv):
+
+- AURELION_TRACE=1            JSON lines to stderr, one per stage
+- AURELION_TRACE=path.jsonl   JSON lines appended to that file
+- AURELION_TRACE_CHROME=path  also write a Chrome trace (chrome://tracing,
+                              Perfetto) when the process exits
+
+When off, `stage` returns a shared no-op object and `traced` calls the
+function directly, so the cost is a cached flag check.
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+ENV_VAR = "AURELION_TRACE"
+CHROME_ENV_VAR = "AURELION_TRACE_CHROME"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_config: Optional[Dict[str, Optional[str]]] = None
+_lock = threading.Lock()
+_stack = threading.local()
+_chrome_events: List[Dict[str, Any]] = []
+_started_tracemalloc = False
+
+
+def _load_config() -> Dict[str, Optional[str]]:
+    global _config
+    if _config is None:
+        try:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+        except ImportError:
+            pass
+        target = os.environ.get(ENV_VAR, "").strip()
+        chrome = os.environ.get(CHROME_ENV_VAR, "").strip()
+        if target.lower() in ("", "0", "false", "no", "off"):
+            target = ""
+        _config = {"target": target or None, "chrome": chrome or None}
+        if chrome:
+            atexit.register(write_chrome_trace, chrome)
+    return _config
+
+
+def enabled() -> bool:
+    cfg = _load_config()
+    return bool(cfg["target"] or cfg["chrome"])
+
+
+def configure(target: Optional[str] = None, chrome: Optional[str] = None) -> None:
+    """Override the environment (mainly for tests); `None` for both disables."""
+    global _config, _started_tracemalloc
+    _config = {"target": target, "chrome": chrome}
+    _chrome_events.clear()
+    if not (target or chrome) and _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+class _NoopStage:
+    """Returned by `stage` when instrumentation is off; ignores everything."""
+
+    rows = None
+
+    def __enter__(self) -> "_NoopStage":
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopStage()
+
+
+class Stage:
+    """A running measurement; set `rows` (and any `extra`) inside the block."""
+
+    def __init__(self, name: str, rows: Optional[int] = None, **extra: Any):
+        self.name = name
+        self.rows = rows
+        self.extra = extra
+        self._child_peak = 0
+
+    def __enter__(self) -> "Stage":
+        global _started_tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        stack = _stack.__dict__.setdefault("items", [])
+        if stack:
+            # fold the parent's peak so far before resetting it for this stage
+            stack[-1]._child_peak = max(stack[-1]._child_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+        stack.append(self)
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        wall = time.perf_counter() - self._t0
+        cpu = time.process_time() - self._c0
+        peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+        stack = _stack.items
+        stack.pop()
+        if stack:
+            stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        record = {
+            "stage": self.name,
+            "start": round(self._start, 6),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "peak_mb": round(max(peak - self._base, 0) / 2**20, 3),
+            "rows": self.rows,
+            "ok": exc_type is None,
+            "pid": os.getpid(),
+        }
+        record.update(self.extra)
+        _emit(record, thread_id=threading.get_ident())
+        return False
+
+
+def _emit(record: Dict[str, Any], thread_id: int) -> None:
+    cfg = _load_config()
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if cfg["target"]:
+            if cfg["target"].lower() in ("1", "true", "yes", "on", "stderr"):
+                print(line, file=sys.stderr)
+            else:
+                with open(cfg["target"], "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+        if cfg["chrome"]:
+            _chrome_events.append(
+                {
+                    "name": record["stage"],
+                    "ph": "X",
+                    "ts": int(record["start"] * 1e6),
+                    "dur": int(record["wall_s"] * 1e6),
+                    "pid": record["pid"],
+                    "tid": thread_id,
+                    "args": {k: v for k, v in record.items() if k not in ("stage", "start", "wall_s", "pid")},
+                }
+            )
+
+
+def stage(name: str, rows: Optional[int] = None, **extra: Any):
+    """Context manager measuring one stage (a no-op when tracing is off)."""
+    if not enabled():
+        return _NOOP
+    return Stage(name, rows=rows, **extra)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of `stage`; `rows` is taken from `len(result)` if possible."""
+
+    def decorate(func: F) -> F:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled():
+                return func(*args, **kwargs)
+            with Stage(label) as st:
+                result = func(*args, **kwargs)
+                st.rows = rows_of(result)
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def rows_of(obj: Any) -> Optional[int]:
+    """Row count of a DataFrame-like result, else None."""
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(obj, list):
+        return len(obj)
+    return None
+
+
+def write_chrome_trace(path: str) -> None:
+    """Write the collected events in Chrome trace format."""
+    if not _chrome_events:
+        return
+    with _lock:
+        events = list(_chrome_events)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
@@ -1,50 +1,96 @@
 """Inventory CSV files under the `db/` folder.
 
-This script scans the `db/` directory for CSV files, attempts to read
-each file with a few common encodings and separators, and produces
-`db/inventory.csv` with a summary for each file.
+This script scans the `db/` directory for CSV files (plain or compressed:
+`.csv.gz`, `.csv.bz2`, `.csv.xz`, `.csv.zst`, decompressed while parsing; see
+`compression.py`), attempts to read each file with a few common encodings
+and separators, and produces `db/inventory.csv` with a summary for each file.
 
 Usage:
     python src/inventory.py
+    python src/inventory.py --query "column == 'fecha' and dtype == 'object'"
 
-The output `db/inventory.csv` contains one row per file with these columns:
-- filename, path, status (ok|error), rows, cols, total_missing,
-- cols_with_missing, columns (JSON), dtypes (JSON), sample_head (string), error
+The inventory is stored as two tables under `db/inventory/` (Parquet when
+pyarrow is installed, CSV otherwise):
+- files:   filename, path, compression, compressed_bytes, uncompressed_bytes,
+           status (ok|error), rows, cols, total_missing, cols_with_missing,
+           sample_head, error
+- columns: filename, position, column, dtype, missing, distinct (estimate),
+           min, max
+so schema questions are one vectorized filter (`query_columns`) instead of
+parsing JSON per row.
+
+`db/inventory.csv` is still written as a compatibility view with one row per
+file: the `files` fields plus `columns` (JSON) and `dtypes` (JSON).
 
 """
 from __future__ import annotations
 
+import importlib.util
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+try:
+    from src import compression, instrument, membudget, pipeline, sketch
+except Exception:
+    import compression  # type: ignore
+    import instrument  # type: ignore
+    import membudget  # type: ignore
+    import pipeline  # type: ignore
+    import sketch  # type: ignore
+
 
 DB_DIR = Path(__file__).resolve().parents[1] / "db"
 INVENTORY_CSV = DB_DIR / "inventory.csv"
+INVENTORY_DIR = DB_DIR / "inventory"
+
+FILE_FIELDS = [
+    "filename",
+    "path",
+    "compression",
+    "compressed_bytes",
+    "uncompressed_bytes",
+    "status",
+    "rows",
+    "cols",
+    "total_missing",
+    "cols_with_missing",
+    "sample_head",
+    "error",
+]
+PROFILE_FIELDS = ["filename", "position", "column", "dtype", "missing", "distinct", "min", "max"]
 
 
 def find_candidate_csvs(db_dir: Path) -> List[Path]:
     """Return a list of files in db_dir that look like CSVs.
 
-    We accept files whose name endswith '.csv' (case-insensitive).
+    We accept files whose name endswith '.csv' (case-insensitive), or
+    '.csv' plus a compression suffix ('.gz', '.bz2', '.xz', '.zst').
     """
     files: List[Path] = []
     if not db_dir.exists():
         return files
     for p in db_dir.iterdir():
-        if p.is_file() and p.name.lower().endswith(".csv"):
+        if p.is_file() and compression.is_csv(p):
             files.append(p)
     return sorted(files)
 
 
-def try_read_csv(path: Path) -> pd.DataFrame:
+def try_read_csv(path: Path, nrows: Optional[int] = None) -> pd.DataFrame:
     """Try reading a CSV using several encodings and separators.
 
     Raises the last exception if all attempts fail.
     """
+    df, _, _ = read_csv_detect(path, nrows=nrows)
+    return df
+
+
+def read_csv_detect(path: Path, nrows: Optional[int] = None):
+    """Like `try_read_csv` but also return the (encoding, sep) that worked."""
     encodings = ["utf-8", "latin1", "cp1252"]
     seps = [",", ";", "\t"]
     last_err: Optional[Exception] = None
@@ -52,8 +98,8 @@ def try_read_csv(path: Path) -> pd.DataFrame:
         for sep in seps:
             try:
                 # engine='python' is more tolerant with malformed CSVs
-                df = pd.read_csv(path, encoding=enc, sep=sep, engine="python")
-                return df
+                df = compression.read_csv(path, encoding=enc, sep=sep, engine="python", nrows=nrows)
+                return df, enc, sep
             except Exception as e:
                 last_err = e
                 continue
@@ -90,69 +136,314 @@ def summarize_df(df: pd.DataFrame) -> Dict[str, Any]:
     }
 
 
-def inventory_db(db_dir: Path) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    candidates = find_candidate_csvs(db_dir)
-    for p in candidates:
-        row: Dict[str, Any] = {
-            "filename": p.name,
-            "path": str(p),
-            "status": "error",
-            "rows": None,
-            "cols": None,
-            "total_missing": None,
-            "cols_with_missing": None,
-            "columns": None,
-            "dtypes": None,
-            "sample_head": None,
-            "error": None,
-        }
-        try:
+class ColumnProfiler:
+    """Per-column dtype, missing count, distinct estimate and min/max, fed chunk by chunk.
+
+    A column whose dtype differs between chunks is reported as `object`;
+    min/max are compared as numbers for numeric columns and as text
+    otherwise, and stored as text.
+    """
+
+    def __init__(self) -> None:
+        self._cols: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for pos, col in enumerate(chunk.columns):
+            s = chunk[col]
+            info = self._cols.setdefault(str(col), {
+                "position": pos, "dtype": str(s.dtype), "missing": 0,
+                "distinct": sketch.DistinctSketch(), "min": None, "max": None,
+            })
+            if info["dtype"] != str(s.dtype):
+                info["dtype"] = "object"
+            values = s.dropna()
+            info["missing"] += len(s) - len(values)
+            if not len(values):
+                continue
+            info["distinct"].update(values)
+            if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+                lo, hi = values.min(), values.max()
+            else:
+                text = values.astype(str)
+                lo, hi = text.min(), text.max()
+            if info["min"] is not None and isinstance(lo, str) != isinstance(info["min"], str):
+                # numbers in one chunk, text in another: compare everything as text
+                lo, hi = str(lo), str(hi)
+                info["min"], info["max"] = str(info["min"]), str(info["max"])
+            info["min"] = lo if info["min"] is None else min(info["min"], lo)
+            info["max"] = hi if info["max"] is None else max(info["max"], hi)
+
+    def profile(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "position": info["position"],
+                "column": col,
+                "dtype": info["dtype"],
+                "missing": int(info["missing"]),
+                "distinct": info["distinct"].estimate(),
+                "min": None if info["min"] is None else str(info["min"]),
+                "max": None if info["max"] is None else str(info["max"]),
+            }
+            for col, info in self._cols.items()
+        ]
+
+
+def summarize_csv_chunked(path: Path, budget: "membudget.MemoryBudget", sample_rows: int = 10_000) -> Dict[str, Any]:
+    """`summarize_df` for a file read in budget-sized chunks.
+
+    Encoding and separator are detected on the first `sample_rows` rows, which
+    also give the bytes-per-row estimate. Counts are accumulated per chunk;
+    a column whose dtype differs between chunks is reported as `object`, as
+    pandas would when reading the whole file.
+    """
+    sample, enc, sep = read_csv_detect(path, nrows=sample_rows)
+    rows_per_chunk = budget.chunk_rows(budget.bytes_per_row(sample))
+    del sample
+
+    rows = 0
+    missing: Dict[str, int] = {}
+    dtypes: Dict[str, str] = {}
+    head: Optional[pd.DataFrame] = None
+    profiler = ColumnProfiler()
+    with compression.open_stream(path) as fh, pd.read_csv(fh, encoding=enc, sep=sep, engine="python", chunksize=rows_per_chunk) as reader:
+        while True:
+            try:
+                chunk = reader.get_chunk(rows_per_chunk)
+            except StopIteration:
+                break
+            if head is None:
+                head = chunk.head(3)
+            rows += len(chunk)
+            profiler.update(chunk)
+            for col, n in chunk.isna().sum().items():
+                missing[str(col)] = missing.get(str(col), 0) + int(n)
+            for col, dtype in chunk.dtypes.items():
+                prev = dtypes.setdefault(str(col), str(dtype))
+                if prev != str(dtype):
+                    dtypes[str(col)] = "object"
+            rows_per_chunk = budget.adapt(rows_per_chunk)
+        uncompressed = fh.raw.bytes_read
+
+    summary = summarize_df(head if head is not None else compression.read_csv(path, encoding=enc, sep=sep, engine="python", nrows=0))
+    summary.update({
+        "uncompressed_bytes": uncompressed,
+        "profile": profiler.profile(),
+        "rows": rows,
+        "dtypes": dtypes or summary["dtypes"],
+        "total_missing": int(sum(missing.values())),
+        "cols_with_missing": int(sum(1 for v in missing.values() if v > 0)),
+    })
+    return summary
+
+
+def inventory_file(p: Path, memory_budget: Any = None) -> Dict[str, Any]:
+    """Build the inventory row for a single file (errors are recorded, not raised).
+
+    With a `memory_budget` the file is summarized chunk by chunk instead of
+    being loaded whole (see `membudget`).
+    """
+    row: Dict[str, Any] = {
+        "filename": p.name,
+        "path": str(p),
+        "compression": compression.compression_of(p),
+        "compressed_bytes": None,
+        "uncompressed_bytes": None,
+        "status": "error",
+        "rows": None,
+        "cols": None,
+        "total_missing": None,
+        "cols_with_missing": None,
+        "columns": None,
+        "dtypes": None,
+        "sample_head": None,
+        "error": None,
+        "profile": [],
+    }
+    try:
+        budget = membudget.MemoryBudget.resolve(memory_budget)
+        if budget is not None:
+            summary = summarize_csv_chunked(p, budget)
+            budget.report_if_degraded(f"inventory:{p.name}")
+        else:
             df = try_read_csv(p)
             summary = summarize_df(df)
-            row.update({
-                "status": "ok",
-                "rows": summary["rows"],
-                "cols": summary["cols"],
-                "total_missing": summary["total_missing"],
-                "cols_with_missing": summary["cols_with_missing"],
-                "columns": json.dumps(summary["columns"], ensure_ascii=False),
-                "dtypes": json.dumps(summary["dtypes"], ensure_ascii=False),
-                "sample_head": summary["sample_head"],
-            })
-        except Exception as e:
-            row["error"] = str(e)
+            summary["uncompressed_bytes"] = df.attrs.get("uncompressed_bytes")
+            profiler = ColumnProfiler()
+            profiler.update(df)
+            summary["profile"] = profiler.profile()
+            del df
+        row.update(compression.sizes(p, summary["uncompressed_bytes"]))
+        row.update({
+            "status": "ok",
+            "rows": summary["rows"],
+            "cols": summary["cols"],
+            "total_missing": summary["total_missing"],
+            "cols_with_missing": summary["cols_with_missing"],
+            "columns": json.dumps(summary["columns"], ensure_ascii=False),
+            "dtypes": json.dumps(summary["dtypes"], ensure_ascii=False),
+            "sample_head": summary["sample_head"],
+            "profile": summary["profile"],
+        })
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def inventory_db(db_dir: Path, memory_budget: Any = None) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    for p in find_candidate_csvs(db_dir):
+        with instrument.stage(f"inventory:{p.name}") as st:
+            row = inventory_file(p, memory_budget=memory_budget)
+            st.rows = row["rows"]
         results.append(row)
     return results
 
 
+def inventory_tables(results: Sequence[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(files, columns) tables from `inventory_file` rows."""
+    files = pd.DataFrame([{k: r.get(k) for k in FILE_FIELDS} for r in results], columns=FILE_FIELDS)
+    profile = [dict(c, filename=r["filename"]) for r in results for c in (r.get("profile") or [])]
+    columns = pd.DataFrame(profile, columns=PROFILE_FIELDS)
+    for col in ("compressed_bytes", "uncompressed_bytes", "rows", "cols", "total_missing", "cols_with_missing"):
+        files[col] = files[col].astype("Int64")
+    for col in ("position", "missing", "distinct"):
+        columns[col] = columns[col].astype("int64")
+    for col in ("min", "max"):
+        columns[col] = columns[col].astype(object)
+    return files, columns
+
+
+def store_format() -> str:
+    """'parquet' when pyarrow is installed, else 'csv'."""
+    return "parquet" if importlib.util.find_spec("pyarrow") is not None else "csv"
+
+
+def store_paths(store_dir: Path, fmt: Optional[str] = None) -> Dict[str, Path]:
+    fmt = fmt or store_format()
+    return {name: Path(store_dir) / f"{name}.{fmt}" for name in ("files", "columns")}
+
+
+def write_store(results: Sequence[Dict[str, Any]], store_dir: Path = INVENTORY_DIR) -> Dict[str, Path]:
+    """Write the files and columns tables; return their paths."""
+    Path(store_dir).mkdir(parents=True, exist_ok=True)
+    paths = store_paths(store_dir)
+    for name, table in zip(("files", "columns"), inventory_tables(results)):
+        if paths[name].suffix == ".parquet":
+            table.to_parquet(paths[name], index=False)
+        else:
+            table.to_csv(paths[name], index=False)
+    return paths
+
+
+def load_store(store_dir: Path = INVENTORY_DIR) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read back (files, columns) from whichever format was written."""
+    for fmt in ("parquet", "csv"):
+        paths = store_paths(store_dir, fmt)
+        if all(p.exists() for p in paths.values()):
+            if fmt == "parquet":
+                return pd.read_parquet(paths["files"]), pd.read_parquet(paths["columns"])
+            return (pd.read_csv(paths["files"]),
+                    pd.read_csv(paths["columns"], dtype={"column": str, "dtype": str, "min": str, "max": str}))
+    raise FileNotFoundError(f"No inventory store in {store_dir}; run python src/inventory.py")
+
+
+def compat_view(files: pd.DataFrame, columns: pd.DataFrame) -> pd.DataFrame:
+    """The legacy one-row-per-file layout with `columns` and `dtypes` as JSON."""
+    per_file: Dict[str, Tuple[str, str]] = {}
+    for name, group in columns.sort_values(["filename", "position"]).groupby("filename", sort=False):
+        names = group["column"].astype(str).tolist()
+        per_file[name] = (
+            json.dumps(names, ensure_ascii=False),
+            json.dumps(dict(zip(names, group["dtype"].astype(str))), ensure_ascii=False),
+        )
+    view = files.copy()
+    view["columns"] = [per_file.get(f, (None, None))[0] for f in view["filename"]]
+    view["dtypes"] = [per_file.get(f, (None, None))[1] for f in view["filename"]]
+    view.loc[view["status"] != "ok", ["columns", "dtypes"]] = None
+    legacy = FILE_FIELDS[:FILE_FIELDS.index("sample_head")] + ["columns", "dtypes", "sample_head", "error"]
+    return view[legacy]
+
+
+def query_columns(expr: Optional[str] = None, store_dir: Path = INVENTORY_DIR, **equals: Any) -> pd.DataFrame:
+    """Column profiles (joined with their file's path, status and rows) matching a filter.
+
+    `equals` are column == value filters (a list/tuple means "any of");
+    `expr` is a `DataFrame.query` expression over the same fields:
+
+        query_columns(column="fecha", dtype="object")
+        query_columns("missing > 0 and distinct < 10")
+    """
+    files, columns = load_store(store_dir)
+    out = columns.merge(files[["filename", "path", "status", "rows"]], on="filename", how="left")
+    mask = np.ones(len(out), dtype=bool)
+    for field, value in equals.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        mask &= out[field].isin(values).to_numpy()
+    out = out[mask]
+    if expr:
+        out = out.query(expr)
+    return out.reset_index(drop=True)
+
+
 def write_inventory(results: List[Dict[str, Any]], out_path: Path) -> None:
+    """Write the legacy CSV view of `results` to `out_path`."""
     if not out_path.parent.exists():
         out_path.parent.mkdir(parents=True, exist_ok=True)
-    df = pd.DataFrame(results)
-    # ensure a stable column order
-    cols = [
-        "filename",
-        "path",
-        "status",
-        "rows",
-        "cols",
-        "total_missing",
-        "cols_with_missing",
-        "columns",
-        "dtypes",
-        "sample_head",
-        "error",
-    ]
-    df = df.reindex(columns=cols)
-    df.to_csv(out_path, index=False)
-
-
-def main() -> int:
+    compat_view(*inventory_tables(results)).to_csv(out_path, index=False)
+
+
+def _write_stage(out_path: Path, store_dir: Optional[Path] = None, **rows: Dict[str, Any]) -> Path:
+    results = [rows[k] for k in sorted(rows)]
+    if store_dir is not None:
+        write_store(results, store_dir)
+    write_inventory(results, out_path)
+    return out_path
+
+
+def build_graph(
+    db_dir: Path,
+    out_path: Path,
+    cache_dir: Path = pipeline.DEFAULT_CACHE_DIR,
+    store_dir: Optional[Path] = None,
+) -> "pipeline.TaskGraph":
+    """One memoized stage per file plus a final write stage.
+
+    Files whose contents did not change reuse their previous summary, so
+    only new or modified files are read again. The store goes to
+    `store_dir` (default: `inventory/` next to `out_path`).
+    """
+    g = pipeline.TaskGraph(cache_dir)
+    deps: Dict[str, str] = {}
+    store_dir = Path(store_dir) if store_dir is not None else Path(out_path).parent / "inventory"
+    # the inventory itself lives in db/; never summarize our own output
+    candidates = [p for p in find_candidate_csvs(db_dir) if p.resolve() != Path(out_path).resolve()]
+    for i, p in enumerate(candidates):
+        name = f"inventory:{p.name}"
+        g.add(name, inventory_file, inputs={"p": p})
+        deps[f"row{i:06d}"] = name
+    outputs = [out_path, *store_paths(store_dir).values()]
+    g.add("inventory:write", _write_stage, deps=deps, params={"out_path": out_path, "store_dir": store_dir}, outputs=outputs)
+    return g
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Inventory the CSV files under db/")
+    ap.add_argument("--query", default=None, help="filter column profiles, e.g. \"column == 'fecha' and dtype == 'object'\"")
+    args = ap.parse_args(argv)
+
+    if args.query is not None:
+        hits = query_columns(args.query)
+        print(hits.to_string(index=False) if len(hits) else "No matching columns")
+        return 0
+
     print(f"Scanning CSV files under: {DB_DIR}")
-    results = inventory_db(DB_DIR)
-    write_inventory(results, INVENTORY_CSV)
-    print(f"Wrote inventory to: {INVENTORY_CSV}")
+    graph = build_graph(DB_DIR, INVENTORY_CSV, store_dir=INVENTORY_DIR)
+    graph.run()
+    results = [graph.value(dep) for dep in graph.stages["inventory:write"].deps.values()]
+    print(f"Files re-read: {sum(1 for n in graph.executed if n != 'inventory:write')} (reused: {len(graph.skipped)})")
+    print(f"Wrote inventory to: {INVENTORY_DIR} ({store_format()}) and {INVENTORY_CSV}")
     ok_count = sum(1 for r in results if r.get("status") == "ok")
     err_count = len(results) - ok_count
     print(f"Files scanned: {len(results)} (ok={ok_count}, error={err_count})")
@@ -0,0 +1,339 @@
+"""Fuzzy duplicate-customer detection over `clientes`.
+
+The same person often appears twice with small differences: accents, case,
+a typo in `nombre_cliente` or `email`. `clean_df(drop_duplicates=True)` only
+drops exact copies, and comparing every pair of customers is quadratic
+(10M customers are 5e13 pairs). Instead:
+
+1. normalize: names and emails are lower-cased, accents and punctuation
+   removed, `+tags` dropped from emails (`normalize_text`, `normalize_email`);
+2. block: records are grouped by a few cheap keys (email domain, a Spanish
+   phonetic key of the name, `ciudad`) and, inside each block, sorted and
+   compared only with their `window` nearest neighbours (sorted
+   neighbourhood, on the key and on the reversed key), so candidate pairs
+   grow linearly with the table;
+3. score: every candidate pair is scored at once with a bigram Dice
+   similarity on 128-bit bigram signatures (`popcount(a & b)`), for the name
+   and the email local part;
+4. cluster: pairs above `threshold` are edges; connected components (label
+   propagation with pointer jumping) are the duplicate clusters.
+
+`find_duplicates(clientes).canonical_map()` maps each duplicate id to the
+id of the first record of its cluster; pass it to
+`mi_analisis.compute_rfm(..., customer_map=...)` so a customer's purchases
+are aggregated once.
+
+    python src/matching.py db/clientes.csv --out reports/duplicados.csv
+"""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# neighbours compared on each side within a block
+WINDOW = 4
+THRESHOLD = 0.8
+NAME_WEIGHT = 0.6
+# bytes of a normalized string that enter its bigram signature
+SIGNATURE_WIDTH = 40
+
+# Spanish pronunciation rules for the phonetic key, applied in order
+_PHONETIC_RULES = [
+    (r"[^a-z ]", ""),
+    (r"ch", "1"),
+    (r"h", ""),
+    (r"qu", "k"),
+    (r"gu(?=[ei])", "g"),
+    (r"g(?=[ei])", "j"),
+    (r"c(?=[ei])", "s"),
+    (r"c", "k"),
+    (r"z", "s"),
+    (r"x", "ks"),
+    (r"[vw]", "b"),
+    (r"ll", "y"),
+    (r"\B[aeiouy]", ""),
+    (r"(.)\1+", r"\1"),
+    (r"\s+", " "),
+]
+
+
+def _on_uniques(func):
+    """Apply a Series -> Series string transform once per distinct value.
+
+    Names, cities and email domains repeat a lot, so the regex work runs on
+    the (much shorter) list of uniques and is gathered back by code.
+    """
+
+    def wrapper(s: pd.Series) -> pd.Series:
+        codes, uniques = pd.factorize(s.fillna("").astype(str))
+        done = func(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        return pd.Series(done[codes] if len(done) else np.array([""] * len(s), dtype=object), index=s.index, dtype=object)
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+@_on_uniques
+def normalize_text(s: pd.Series) -> pd.Series:
+    """Lower case ASCII without accents or punctuation, single spaces."""
+    s = s.str.lower().str.normalize("NFKD")
+    s = s.str.encode("ascii", "ignore").str.decode("ascii")
+    return s.str.replace(r"[^a-z0-9@.+ ]+", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+@_on_uniques
+def normalize_email(s: pd.Series) -> pd.Series:
+    """Normalized email: no spaces, no `+tag`, dots ignored in gmail local parts."""
+    s = normalize_text(s).str.replace(" ", "", regex=False)
+    s = s.str.replace(r"\+[^@]*(?=@)", "", regex=True)
+    gmail = s.str.endswith("@gmail.com")
+    if gmail.any():
+        s = s.where(~gmail, s.str.replace(r"\.(?=[^@]*@)", "", regex=True))
+    return s
+
+
+@_on_uniques
+def phonetic_key(names: pd.Series) -> pd.Series:
+    """Consonant skeleton of a normalized name ("Gonzalez" == "Gonsales")."""
+    s = names
+    for pattern, repl in _PHONETIC_RULES:
+        s = s.str.replace(pattern, repl, regex=True)
+    return s.str.strip()
+
+
+def _popcount(x: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype("int64")
+    table = np.array([bin(i).count("1") for i in range(256)], dtype="int64")
+    return table[x.view("uint8")].reshape(*x.shape, 8).sum(axis=-1)
+
+
+def bigram_signatures(s: pd.Series, width: int = SIGNATURE_WIDTH) -> np.ndarray:
+    """(n, 2) uint64: a 128-bit set of the hashed character bigrams of each string."""
+    raw = np.array((" " + s.fillna("")).str.encode("ascii", "ignore").tolist(), dtype=f"S{width}")
+    mat = raw.view("uint8").reshape(len(raw), width).astype("uint32")
+    sig = np.zeros((len(raw), 2), dtype="uint64")
+    one = np.uint64(1)
+    for j in range(width - 1):
+        a, b = mat[:, j], mat[:, j + 1]
+        valid = b != 0
+        if not valid.any():
+            break
+        h = (((a * 31 + b) * np.uint32(2654435761)) >> np.uint32(25)).astype("uint64")
+        low = valid & (h < 64)
+        high = valid & (h >= 64)
+        sig[low, 0] |= one << h[low]
+        sig[high, 1] |= one << (h[high] - np.uint64(64))
+    return sig
+
+
+def dice(sig: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Bigram Dice similarity of the pairs (left[k], right[k]); NaN if both are empty."""
+    a, b = sig[left], sig[right]
+    inter = _popcount(a & b).sum(axis=1)
+    total = _popcount(a).sum(axis=1) + _popcount(b).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, 2.0 * inter / total, np.nan)
+
+
+def window_pairs(block: pd.Series, order_key: pd.Series, window: int = WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairs of positions within `window` of each other after sorting each block
+    by `order_key`. Rows with an empty block key are not paired."""
+    codes, _ = pd.factorize(block.where(block != ""), use_na_sentinel=True)
+    rank, _ = pd.factorize(order_key, sort=True)
+    keep = np.flatnonzero(codes >= 0)
+    order = keep[np.lexsort((rank[keep], codes[keep]))]
+    sorted_codes = codes[order]
+    left: List[np.ndarray] = []
+    right: List[np.ndarray] = []
+    for k in range(1, window + 1):
+        if k >= len(order):
+            break
+        same = sorted_codes[:-k] == sorted_codes[k:]
+        left.append(order[:-k][same])
+        right.append(order[k:][same])
+    if not left:
+        return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+    return np.concatenate(left), np.concatenate(right)
+
+
+def connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Component label of each of `n` nodes: the smallest position in it."""
+    labels = np.arange(n)
+    if not len(left):
+        return labels
+    while True:
+        li, lj = labels[left], labels[right]
+        if np.array_equal(li, lj):
+            return labels
+        low = np.minimum(li, lj)
+        # hook the larger root onto the smaller one, then flatten the trees
+        np.minimum.at(labels, li, low)
+        np.minimum.at(labels, lj, low)
+        while True:
+            nxt = labels[labels]
+            if np.array_equal(nxt, labels):
+                break
+            labels = nxt
+
+
+def _one_swap(a: str, b: str) -> bool:
+    """True if `b` is `a` with two adjacent characters swapped."""
+    if len(a) != len(b):
+        return False
+    diff = [i for i in range(len(a)) if a[i] != b[i]]
+    return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+
+
+def _find_col(df: pd.DataFrame, *needles: str) -> Optional[str]:
+    for c in df.columns:
+        if any(n in c.lower() for n in needles):
+            return c
+    return None
+
+
+@dataclass
+class MatchResult:
+    """Scored candidate pairs and the duplicate clusters they form."""
+
+    pairs: pd.DataFrame
+    clusters: pd.DataFrame
+    id_col: str
+
+    def canonical_map(self) -> Dict[str, str]:
+        """{customer id: canonical id} for every record in a cluster of 2+."""
+        dup = self.clusters[self.clusters["size"] > 1]
+        return dict(zip(dup[self.id_col].astype(str), dup["canonical"].astype(str)))
+
+    def summary(self) -> str:
+        multi = self.clusters[self.clusters["size"] > 1]
+        n_clusters = multi["canonical"].nunique()
+        return (f"{len(self.pairs)} matching pairs, {n_clusters} duplicate clusters, "
+                f"{len(multi) - n_clusters} redundant records")
+
+
+def find_duplicates(
+    clientes: pd.DataFrame,
+    threshold: float = THRESHOLD,
+    window: int = WINDOW,
+    id_col: Optional[str] = None,
+    name_col: Optional[str] = None,
+    email_col: Optional[str] = None,
+    city_col: Optional[str] = None,
+) -> MatchResult:
+    """Cluster likely duplicate customers (see the module docstring).
+
+    Columns are detected by name (`id_cliente`, `nombre*`, `*mail*`,
+    `ciudad`) unless given. Pairs with the same normalized email always
+    match; otherwise the score is a weighted mix of name and email
+    similarity (name only when an email is missing). Records whose names
+    carry different numbers, or whose emails carry different digits (other
+    than two swapped ones), never match.
+    """
+    id_col = id_col or _find_col(clientes, "id_cliente", "cliente_id", "customer_id") or clientes.columns[0]
+    name_col = name_col or _find_col(clientes, "nombre", "name")
+    email_col = email_col or _find_col(clientes, "mail")
+    city_col = city_col or _find_col(clientes, "ciudad", "city")
+    if name_col is None and email_col is None:
+        raise ValueError("clientes needs a name or an email column")
+
+    n = len(clientes)
+    empty = pd.Series([""] * n, index=clientes.index, dtype=object)
+    name = normalize_text(clientes[name_col]) if name_col else empty
+    email = normalize_email(clientes[email_col]) if email_col else empty
+    local = _on_uniques(lambda x: x.str.split("@").str[0].fillna(""))(email)
+    domain = _on_uniques(lambda x: x.str.split("@").str[1].fillna(""))(email)
+    digits = _on_uniques(lambda x: x.str.replace(r"\D", "", regex=True))(name).to_numpy(dtype=object)
+    email_digits = _on_uniques(lambda x: x.str.replace(r"\D", "", regex=True))(local).to_numpy(dtype=object)
+    phon = phonetic_key(name)
+    reverse = _on_uniques(lambda x: x.str[::-1])
+
+    # each block is also scanned on the reversed key, which brings together
+    # records whose typo is near the start
+    passes = [("email", domain, local), ("email", domain, reverse(local)), ("phonetic", phon, email)]
+    if city_col is not None:
+        city = normalize_text(clientes[city_col])
+        passes += [("ciudad", city, name), ("ciudad", city, reverse(name))]
+    lefts, rights, blocks = [], [], []
+    for label, block, order_key in passes:
+        i, j = window_pairs(block.reset_index(drop=True), order_key.reset_index(drop=True), window)
+        lefts.append(np.minimum(i, j))
+        rights.append(np.maximum(i, j))
+        blocks.append(np.full(len(i), label, dtype=object))
+    left = np.concatenate(lefts)
+    right = np.concatenate(rights)
+    block_of = np.concatenate(blocks)
+    # the same pair can come from several passes; keep its first one
+    _, first = np.unique(left.astype("int64") * n + right, return_index=True)
+    left, right, block_of = left[first], right[first], block_of[first]
+
+    name_sim = dice(bigram_signatures(name.reset_index(drop=True)), left, right)
+    email_sim = dice(bigram_signatures(local.reset_index(drop=True)), left, right)
+    emails = email.to_numpy(dtype=object)
+    same_email = (emails[left] == emails[right]) & (emails[left] != "")
+    has_email = (emails[left] != "") & (emails[right] != "")
+    score = np.where(
+        has_email,
+        NAME_WEIGHT * np.nan_to_num(name_sim) + (1 - NAME_WEIGHT) * np.nan_to_num(email_sim),
+        np.nan_to_num(name_sim),
+    )
+    # numbers in a name are not typos: "Cliente 17" and "Cliente 71" are different people
+    other_number = (digits[left] != digits[right]) & (digits[left] != "") & (digits[right] != "")
+    other_email = (email_digits[left] != email_digits[right]) & (email_digits[left] != "") & (email_digits[right] != "")
+    # ... but two swapped digits in an email are a typo (checked only where it matters)
+    for k in np.flatnonzero(other_email & ~other_number & ~same_email & (score >= threshold)):
+        if _one_swap(email_digits[left[k]], email_digits[right[k]]):
+            other_email[k] = False
+    other_number |= other_email
+    score = np.where(other_number, 0.0, np.where(same_email, 1.0, score))
+    match = score >= threshold
+
+    ids = clientes[id_col].to_numpy()
+    pairs = pd.DataFrame({
+        "left": ids[left[match]],
+        "right": ids[right[match]],
+        "score": score[match].round(4),
+        "name_sim": name_sim[match].round(4),
+        "email_sim": email_sim[match].round(4),
+        "block": block_of[match],
+    })
+    labels = connected_components(n, left[match], right[match])
+    sizes = np.bincount(labels, minlength=n)[labels]
+    clusters = pd.DataFrame({id_col: ids, "canonical": ids[labels], "size": sizes})
+    return MatchResult(pairs.sort_values("score", ascending=False, kind="stable").reset_index(drop=True), clusters, id_col)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    try:
+        from src import data
+    except Exception:
+        import data  # type: ignore
+
+    ap = argparse.ArgumentParser(description="Find duplicate customers")
+    ap.add_argument("path", nargs="?", default="clientes.csv", help="clientes CSV (relative to db/ or absolute)")
+    ap.add_argument("--out", type=Path, default=None, help="CSV with the duplicate clusters")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    ap.add_argument("--window", type=int, default=WINDOW)
+    args = ap.parse_args(argv)
+
+    result = find_duplicates(data.load_csv(args.path), threshold=args.threshold, window=args.window)
+    print(result.summary())
+    print(result.pairs.head(20).to_string(index=False))
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        dup = result.clusters[result.clusters["size"] > 1].sort_values(["canonical", result.id_col])
+        dup.to_csv(args.out, index=False)
+        print(f"Clusters written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""Memory-budgeted chunked execution.
+
+`clean_df`, `compute_rfm` and `inventory_db` accept a `memory_budget`
+(bytes, a string like "2GB", a MemoryBudget, or None to read
+AURELION_MEMORY_BUDGET from the environment / `.env`). With a budget they
+process their input in chunks:
+
+1. estimate bytes per row from a sample (`DataFrame.memory_usage(deep=True)`),
+2. pick a chunk size that fits in the headroom left under the budget,
+3. check the process RSS after every chunk and halve the chunk size when it
+   gets close to the limit,
+4. spill per-chunk results to a temporary directory instead of keeping them
+   in memory while RSS is still over the soft limit.
+
+The budget bounds the working set while chunks are processed. A caller
+that returns one frame (`clean_df`) still reads the spilled parts back at
+the end, so that result has to fit in memory.
+
+If any of that degradation happened, the run ends with a short report of the
+peak RSS against the budget (`MemoryBudget.report_if_degraded`).
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+ENV_VAR = "AURELION_MEMORY_BUDGET"
+
+# `.env` is read once per process, on the first `resolve(None)`
+_dotenv_loaded = False
+
+_UNITS = {"": 1, "b": 1, "k": 2**10, "kb": 2**10, "m": 2**20, "mb": 2**20, "g": 2**30, "gb": 2**30, "t": 2**40, "tb": 2**40}
+
+
+def parse_size(value: Union[int, float, str]) -> int:
+    """Parse 1073741824, "1GB", "512m" or "1.5 GiB" into bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    m = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([a-z]*?)(?:i?b)?\s*", value, flags=re.IGNORECASE)
+    unit = (m.group(2).lower() if m else None)
+    if not m or unit not in _UNITS:
+        raise ValueError(f"Invalid memory size: {value!r}")
+    return int(float(m.group(1)) * _UNITS[unit])
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil  # type: ignore
+
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+    except ImportError:
+        return 0
+
+
+def _load_dotenv_once() -> None:
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    except ImportError:
+        pass
+
+
+class MemoryBudget:
+    """A memory limit plus the bookkeeping of how a run stayed under it."""
+
+    def __init__(
+        self,
+        limit: Union[int, str],
+        safety: float = 0.8,
+        min_chunk_rows: int = 1_000,
+        max_chunk_rows: int = 5_000_000,
+        spill_dir: Optional[Path] = None,
+    ):
+        self.limit = parse_size(limit)
+        self.safety = safety
+        self.min_chunk_rows = min_chunk_rows
+        self.max_chunk_rows = max_chunk_rows
+        self._spill_root = spill_dir
+        self._spill_dir: Optional[Path] = None
+        self.peak_rss = current_rss()
+        self.shrinks = 0
+        self.spilled = 0
+        self.events: List[str] = []
+
+    @classmethod
+    def resolve(cls, budget: Union[None, int, str, "MemoryBudget"]) -> Optional["MemoryBudget"]:
+        """Turn a `memory_budget` argument into a MemoryBudget (or None)."""
+        if isinstance(budget, MemoryBudget):
+            return budget
+        if budget is None:
+            _load_dotenv_once()
+            budget = os.environ.get(ENV_VAR) or None
+            if budget is None:
+                return None
+        return cls(budget)
+
+    # -- sizing ------------------------------------------------------------
+    @staticmethod
+    def bytes_per_row(sample: Any) -> float:
+        """Estimate in-memory bytes per row from a DataFrame sample."""
+        if len(sample) == 0:
+            return 1.0
+        return max(float(sample.memory_usage(deep=True, index=True).sum()) / len(sample), 1.0)
+
+    @property
+    def soft_limit(self) -> int:
+        return int(self.limit * self.safety)
+
+    def chunk_rows(self, bytes_per_row: float, copies: float = 3.0) -> int:
+        """Rows per chunk so that `copies` working copies fit in the headroom."""
+        headroom = self.soft_limit - self.check()
+        rows = int(headroom / (bytes_per_row * copies)) if headroom > 0 else 0
+        if rows < self.min_chunk_rows:
+            self.events.append(f"little headroom ({headroom / 2**20:.0f} MB); starting at the minimum chunk size")
+        return max(self.min_chunk_rows, min(rows, self.max_chunk_rows))
+
+    def check(self) -> int:
+        rss = current_rss()
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def under_pressure(self) -> bool:
+        return self.check() > self.soft_limit
+
+    def adapt(self, chunk_rows: int) -> int:
+        """Halve `chunk_rows` when RSS is above the soft limit."""
+        if self.under_pressure() and chunk_rows > self.min_chunk_rows:
+            self.shrinks += 1
+            new_rows = max(self.min_chunk_rows, chunk_rows // 2)
+            self.events.append(f"RSS {self.peak_rss / 2**20:.0f} MB near budget; chunk {chunk_rows} -> {new_rows} rows")
+            return new_rows
+        return chunk_rows
+
+    # -- spilling ----------------------------------------------------------
+    def spill(self, obj: Any) -> Path:
+        """Pickle `obj` to the spill directory and return its path."""
+        if self._spill_dir is None:
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="aurelion_spill_", dir=self._spill_root))
+        path = self._spill_dir / f"part{self.spilled:06d}.pkl"
+        with open(path, "wb") as fh:
+            pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spilled += 1
+        return path
+
+    @staticmethod
+    def unspill(path: Path) -> Any:
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+    def cleanup(self) -> None:
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    # -- reporting ---------------------------------------------------------
+    @property
+    def degraded(self) -> bool:
+        return bool(self.shrinks or self.spilled or self.events)
+
+    def report(self) -> str:
+        pct = 100.0 * self.peak_rss / self.limit if self.limit else 0.0
+        lines = [
+            f"Memory budget: {self.limit / 2**20:.0f} MB, peak RSS: {self.peak_rss / 2**20:.0f} MB ({pct:.0f}%)",
+            f"  chunk shrinks: {self.shrinks}, spilled parts: {self.spilled}",
+        ]
+        lines.extend(f"  - {e}" for e in self.events)
+        return "\n".join(lines)
+
+    def report_if_degraded(self, label: str) -> None:
+        if self.degraded:
+            print(f"[{label}] ran in degraded mode to stay under the memory budget")
+            print(self.report())
+
+
+class ChunkCollector:
+    """Collect per-chunk results in memory, spilling them under pressure."""
+
+    def __init__(self, budget: MemoryBudget):
+        self.budget = budget
+        self._parts: List[Any] = []
+
+    def add(self, part: Any) -> None:
+        if self.budget.under_pressure():
+            self._parts.append(self.budget.spill(part))
+        else:
+            self._parts.append(part)
+
+    def __iter__(self) -> Iterator[Any]:
+        for part in self._parts:
+            yield MemoryBudget.unspill(part) if isinstance(part, Path) else part
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+
+def iter_row_chunks(df: Any, budget: MemoryBudget, copies: float = 3.0, sample_rows: int = 10_000) -> Iterator[Any]:
+    """Yield row slices of `df` sized to the budget, adapting as RSS grows."""
+    rows = budget.chunk_rows(budget.bytes_per_row(df.iloc[:sample_rows]), copies=copies)
+    start = 0
+    while start < len(df):
+        yield df.iloc[start:start + rows]
+        start += rows
+        rows = budget.adapt(rows)
@@ -0,0 +1,306 @@
+"""Precomputed metrics snapshot of the tables under `db/`.
+
+`docs.py` shows row counts, products per sale, the payment-method mix and
+column types. Instead of hard-coding them (or parsing the tables while the
+menu is open) they come from a small JSON snapshot written by this stats
+job:
+
+    python src/metrics.py            # refresh db/metrics.json and print it
+
+For each CSV the snapshot keeps its size and mtime next to its stats, so a
+refresh only re-reads the files that changed and `is_stale` is a handful of
+`stat` calls. Tables are read in chunks (compressed `.csv.gz`/`.bz2`/`.xz`/
+`.zst` files are decompressed while parsing); pandas is only imported when a file
+actually has to be read, so loading a snapshot is instant.
+
+Per table: rows, and per column a SQL-like type (INT, DECIMAL, DATE,
+VARCHAR(n), with PK/FK from the `id_*` naming convention), null count and,
+for columns with few distinct values, their counts.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    from src import compression
+except Exception:
+    import compression  # type: ignore
+
+DB_DIR = Path(__file__).resolve().parents[1] / "db"
+SNAPSHOT_PATH = DB_DIR / "metrics.json"
+SNAPSHOT_VERSION = 1
+# values of a text column are counted while it has at most this many
+MAX_CATEGORIES = 20
+CHUNK_ROWS = 200_000
+# outputs of our own jobs that live in db/ but are not tables
+_IGNORED = {"inventory.csv"}
+
+_DATE_RE = r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+
+
+def _candidate_csvs(db_dir: Path):
+    if not db_dir.exists():
+        return []
+    return sorted(p for p in db_dir.iterdir() if p.is_file() and compression.is_csv(p) and p.name not in _IGNORED)
+
+
+def _file_sig(p: Path) -> Dict[str, int]:
+    st = p.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _singular(table: str) -> str:
+    # clientes -> cliente, detalle_ventas -> detalle_venta
+    return table[:-1] if table.endswith("s") else table
+
+
+def column_type(table: str, col: str, info: Dict[str, Any]) -> str:
+    """SQL-like label for a column, e.g. 'id_venta (PK, INT)' or 'email (VARCHAR(150))'."""
+    kind = info["kind"]
+    if kind == "int":
+        sql = "INT"
+    elif kind == "float":
+        sql = "DECIMAL"
+    elif kind == "bool":
+        sql = "BOOL"
+    elif kind == "date":
+        sql = "DATE"
+    else:
+        sql = f"VARCHAR({info.get('max_len') or 0})"
+    lc = col.lower()
+    if lc.startswith("id_"):
+        key = "PK" if lc == f"id_{_singular(table.lower())}" else "FK"
+        return f"{col} ({key}, {sql})"
+    return f"{col} ({sql})"
+
+
+def table_stats(path: Path, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Read one CSV in chunks and return its stats entry (without file signature)."""
+    import pandas as pd
+
+    try:
+        from src.inventory import read_csv_detect
+    except Exception:
+        from inventory import read_csv_detect  # type: ignore
+
+    # encoding and separator from a small sample, then the fast C parser
+    sample, enc, sep = read_csv_detect(path, nrows=1000)
+    del sample
+
+    rows = 0
+    cols: Dict[str, Dict[str, Any]] = {}
+    rank = {"bool": 0, "int": 1, "float": 2, "str": 3}
+    for chunk in compression.iter_csv(path, chunk_rows, encoding=enc, sep=sep):
+        rows += len(chunk)
+        for col in chunk.columns:
+            s = chunk[col]
+            info = cols.setdefault(str(col), {"kind": "bool", "nulls": 0, "max_len": 0, "date": True, "values": Counter()})
+            info["nulls"] += int(s.isna().sum())
+            dk = s.dtype.kind
+            if dk == "b":
+                kind = "bool"
+            elif dk in "iu":
+                kind = "int"
+            elif dk == "f":
+                # integer columns with nulls are read as float
+                kind = "int" if bool((s.dropna() % 1 == 0).all()) else "float"
+            else:
+                kind = "str"
+            if s.isna().all():
+                kind = info["kind"]
+            if rank[kind] > rank[info["kind"]]:
+                info["kind"] = kind
+            if kind == "str":
+                text = s.dropna().astype(str)
+                if len(text):
+                    info["max_len"] = max(info["max_len"], int(text.str.len().max()))
+                    if info["date"]:
+                        info["date"] = bool(text.str.fullmatch(_DATE_RE).all())
+            if info["values"] is not None and dk not in "f":
+                info["values"].update(s.dropna().astype(str).value_counts().to_dict())
+                if len(info["values"]) > MAX_CATEGORIES:
+                    info["values"] = None
+
+    columns: Dict[str, Any] = {}
+    for col, info in cols.items():
+        kind = info["kind"]
+        if kind == "str" and info["date"] and info["max_len"]:
+            kind = "date"
+        entry: Dict[str, Any] = {"kind": kind, "nulls": info["nulls"]}
+        if kind == "str":
+            entry["max_len"] = info["max_len"]
+        if info["values"] is not None and kind in ("str", "bool"):
+            entry["values"] = dict(info["values"].most_common())
+        columns[col] = entry
+    return {"table": compression.table_name(path), "rows": rows, "columns": columns}
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Return the saved snapshot, or None if missing, unreadable or outdated."""
+    try:
+        snap = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if snap.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snap
+
+
+def is_stale(snapshot: Optional[Dict[str, Any]], db_dir: Path = DB_DIR) -> bool:
+    """True if any CSV in `db_dir` was added, removed or modified since `snapshot`."""
+    if snapshot is None:
+        return bool(_candidate_csvs(db_dir))
+    files = snapshot.get("files", {})
+    current = _candidate_csvs(db_dir)
+    if sorted(p.name for p in current) != sorted(files):
+        return True
+    for p in current:
+        entry = files[p.name]
+        if _file_sig(p) != {"size": entry["size"], "mtime_ns": entry["mtime_ns"]}:
+            return True
+    return False
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(obj, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def refresh_snapshot(db_dir: Path = DB_DIR, path: Path = SNAPSHOT_PATH) -> Dict[str, Any]:
+    """Bring the snapshot up to date, re-reading only the CSVs that changed.
+
+    If it cannot be saved (e.g. `db/` is read-only) the fresh snapshot is
+    still returned; the next call recomputes it.
+    """
+    old = load_snapshot(path) or {}
+    old_files = old.get("files", {})
+    files: Dict[str, Any] = {}
+    changed = False
+    for p in _candidate_csvs(Path(db_dir)):
+        sig = _file_sig(p)
+        prev = old_files.get(p.name)
+        if prev and prev["size"] == sig["size"] and prev["mtime_ns"] == sig["mtime_ns"]:
+            files[p.name] = prev
+            continue
+        try:
+            entry = table_stats(p)
+        except Exception as e:
+            entry = {"table": compression.table_name(p), "rows": None, "columns": {}, "error": str(e)}
+        entry.update(sig)
+        files[p.name] = entry
+        changed = True
+    if not changed and old and sorted(files) == sorted(old_files):
+        return old
+    snap = {
+        "version": SNAPSHOT_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": files,
+    }
+    try:
+        _write_json(Path(path), snap)
+    except OSError:
+        # without write access (read-only db/) the snapshot still serves from memory
+        pass
+    return snap
+
+
+def load_current(db_dir: Path = DB_DIR, path: Path = SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Snapshot matching the files on disk: the saved one, refreshed first if stale."""
+    snap = load_snapshot(path)
+    if is_stale(snap, Path(db_dir)):
+        snap = refresh_snapshot(db_dir, path)
+    return snap
+
+
+def _find_table(tables: Dict[str, Dict[str, Any]], *keys: str, exclude: str = "") -> Optional[Dict[str, Any]]:
+    for name in sorted(tables):
+        lname = name.lower()
+        if all(k in lname for k in keys) and not (exclude and exclude in lname):
+            return tables[name]
+    return None
+
+
+def summary(snapshot: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Headline numbers for the docs menu, or None without a usable snapshot.
+
+    Keys: clientes, productos, ventas, detalle (row counts or None),
+    densidad (detail rows per sale), medios_pago ({method: count}),
+    tablas ({table: {"rows", "columnas": [labels]}}), generated_at.
+    """
+    if not snapshot or not snapshot.get("files"):
+        return None
+    tables = {e["table"]: e for e in snapshot["files"].values() if e.get("rows") is not None}
+    if not tables:
+        return None
+
+    def rows(entry):
+        return entry["rows"] if entry else None
+
+    ventas = _find_table(tables, "venta", exclude="detalle")
+    detalle = _find_table(tables, "detalle")
+    medios: Dict[str, int] = {}
+    if ventas:
+        for col, info in ventas["columns"].items():
+            if re.search(r"pago|payment", col, re.IGNORECASE) and info.get("values"):
+                medios = info["values"]
+                break
+    densidad = None
+    if rows(ventas) and rows(detalle) is not None:
+        densidad = rows(detalle) / rows(ventas)
+    return {
+        "clientes": rows(_find_table(tables, "client")),
+        "productos": rows(_find_table(tables, "product")),
+        "ventas": rows(ventas),
+        "detalle": rows(detalle),
+        "densidad": densidad,
+        "medios_pago": medios,
+        "tablas": {
+            name: {"rows": e["rows"], "columnas": [column_type(name, c, i) for c, i in e["columns"].items()]}
+            for name, e in tables.items()
+        },
+        "generated_at": snapshot.get("generated_at"),
+    }
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Refresh the db/ metrics snapshot")
+    ap.add_argument("--db", type=Path, default=DB_DIR)
+    ap.add_argument("--out", type=Path, default=SNAPSHOT_PATH)
+    args = ap.parse_args(argv)
+
+    summ = summary(refresh_snapshot(args.db, args.out))
+    if summ is None:
+        print(f"No tables found in {args.db}")
+        return 1
+    print(f"Snapshot written to {args.out}")
+    for name, info in summ["tablas"].items():
+        print(f"  {name}: {info['rows']} rows, {len(info['columnas'])} columns")
+    if summ["densidad"] is not None:
+        print(f"  products per sale: {summ['densidad']:.2f}")
+    if summ["medios_pago"]:
+        print(f"  payment methods: {', '.join(summ['medios_pago'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,12 @@ termina con un mensaje claro.
 
 Uso:
     python src/mi_analisis.py
+    python src/mi_analisis.py --pack specs.json --workers 8
+    python src/mi_analisis.py --merge-duplicates   # une clientes duplicados antes del RFM
+
+`--pack` recibe un JSON con una lista de reportes, por ejemplo
+`[{"kind": "top_products", "region": "Córdoba", "period": "2024-Q1"}]`, y
+los renderiza en paralelo dentro de `reports/pack/`.
 
 Salida:
     - reports/rfm_summary.csv
@@ -18,30 +24,37 @@ Salida:
     - reports/top_products.png
 
 Requisitos: pandas, matplotlib, seaborn (ver requirements.txt)
+
+Las dependencias pesadas (pandas, matplotlib, seaborn) se importan dentro de
+las funciones que las usan: importar el módulo o pedir `--help` no las carga.
+Ver `benchmarks/import_time.py` para el presupuesto de tiempo de import.
+
+Con `AURELION_TRACE=1` cada etapa (búsqueda, carga, limpieza, RFM, gráficos)
+emite una línea JSON con tiempos y memoria; ver `src/instrument.py`.
 """
 from __future__ import annotations
 
+import argparse
+import json
+import re
 import sys
 from pathlib import Path
-from typing import Dict, Optional
-
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-import seaborn as sns
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
 
-# intentar reutilizar utilidades del paquete si es posible
+# `reports` sólo importa matplotlib/seaborn al dibujar, así que es barato
 try:
-    from src.data import clean_df
+    from src import instrument, membudget, pipeline, reports
 except Exception:
-    try:
-        from data import clean_df  # type: ignore
-    except Exception:
-        clean_df = None  # type: ignore
+    import instrument  # type: ignore
+    import membudget  # type: ignore
+    import pipeline  # type: ignore
+    import reports  # type: ignore
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 ROOT = Path(__file__).resolve().parents[1]
 REPORT_DIR = ROOT / "reports"
-REPORT_DIR.mkdir(exist_ok=True)
 
 SEARCH_PATHS = [
     ROOT / "entrega2" / "data" / "csv" / "origin",
@@ -51,50 +64,126 @@ SEARCH_PATHS = [
 ]
 
 Filenames = {
-    "ventas": ["ventas.csv", "venta.csv"],
+    # exportes diarios: ventas_2024-01-01.csv, ...
+    "ventas": ["ventas.csv", "venta.csv", "ventas_*.csv"],
     "detalle": ["detalle_ventas.csv", "detalle.csv"],
     "clientes": ["clientes.csv", "cliente.csv"],
     "productos": ["productos.csv", "producto.csv"],
 }
 
 
-def locate_file(names: list[str]) -> Optional[Path]:
-    """Buscar recursivamente en SEARCH_PATHS por alguno de los nombres."""
+def locate_files(names: list[str]) -> List[Path]:
+    """Todos los archivos de la primera ruta de SEARCH_PATHS con coincidencias.
+
+    `names` admite patrones glob (`ventas_*.csv`); los nombres exactos tienen
+    prioridad: si existe `ventas.csv` no se suman los diarios.
+    """
+    from fnmatch import fnmatch
+
+    exact = [n for n in names if not any(ch in n for ch in "*?[")]
+    patterns = [n for n in names if n not in exact]
     for base in SEARCH_PATHS:
         if not base.exists():
             continue
-        for name in names:
+        for name in exact:
             p = base / name
             if p.exists():
-                return p
+                return [p]
+        found = sorted({p for pat in patterns for p in base.glob(pat) if p.is_file()})
+        if found:
+            return found
         # buscar recursivamente
+        matches: Dict[Path, List[Path]] = {}
         for p in base.rglob("*"):
-            if p.name in names:
-                return p
-    return None
+            if p.name in exact:
+                return [p]
+            if any(fnmatch(p.name, pat) for pat in patterns) and p.is_file():
+                matches.setdefault(p.parent, []).append(p)
+        if matches:
+            return sorted(matches[sorted(matches)[0]])
+    return []
 
 
-def load_df(p: Path) -> pd.DataFrame:
-    """Carga un CSV con pandas intentando detectar separador y encoding.
-    Usa engine 'python' para mayor robustez en archivos sucios.
+def locate_file(names: list[str]) -> Optional[Path]:
+    """Buscar recursivamente en SEARCH_PATHS por alguno de los nombres."""
+    found = locate_files(names)
+    return found[0] if found else None
+
+
+def get_clean_df() -> Optional[Callable[..., "pd.DataFrame"]]:
+    """Intentar reutilizar `clean_df` del paquete (importa pandas al llamarse)."""
+    try:
+        from src.data import clean_df
+    except Exception:
+        try:
+            from data import clean_df  # type: ignore
+        except Exception:
+            return None
+    return clean_df
+
+
+def load_many(table: Optional[str] = None, merge_duplicates: bool = False, **files: Path) -> pd.DataFrame:
+    """Cargar varios CSV del mismo esquema en paralelo (ver `data.load_csv`).
+
+    Los archivos llegan como `p0000=..., p0001=...` para que el grafo hashee
+    cada uno por separado; la columna `archivo` indica el origen de cada fila.
+    Con `table` sólo se leen las columnas que usa el análisis (ver
+    `project_columns`), decididas con la cabecera del primer archivo.
     """
-    encodings = ["utf-8", "latin1", "cp1252"]
-    seps = [",", ";", "\t"]
-    last_err = None
-    for enc in encodings:
-        for sep in seps:
-            try:
-                return pd.read_csv(p, encoding=enc, sep=sep, engine="python")
-            except Exception as e:
-                last_err = e
-    # fallback a pandas autodetect
     try:
-        return pd.read_csv(p, engine="python")
+        from src import data
     except Exception:
-        raise last_err if last_err is not None else RuntimeError("No se pudo leer")
+        import data  # type: ignore
+
+    paths = [files[k] for k in sorted(files)]
+    projection = project_columns(table, read_header(paths[0]), merge_duplicates) if table else None
+    usecols, dtype = projection if projection is not None else (None, None)
+    return data.load_csv(paths, source_column="archivo", usecols=usecols, dtype=dtype)
+
+
+def load_df(p: Path, table: Optional[str] = None, merge_duplicates: bool = False) -> pd.DataFrame:
+    """Carga un CSV con `data.load_csv`: detecta separador y encoding, y
+    convierte los importes con formato local (`1.250,50`, ver `numparse.py`).
+
+    Con `table` ("ventas", "detalle", ...) primero se lee la cabecera y sólo
+    se parsean las columnas que usa el análisis (ver `project_columns`); las
+    que se piden como texto no se convierten. La ruta queda en
+    `df.attrs["sources"]` (ver `dates.parse_dates`).
+    """
+    try:
+        from src import data
+    except Exception:
+        import data  # type: ignore
+
+    p = Path(p).resolve()
+    projection = project_columns(table, read_header(p), merge_duplicates) if table else None
+    usecols, dtype = projection if projection is not None else (None, None)
+    return data.load_csv(p, usecols=usecols, dtype=dtype)
+
+
+def read_header(p: Path) -> pd.DataFrame:
+    """Sólo la cabecera de `p`: un DataFrame vacío con sus columnas.
+
+    El encoding y el separador son los de `data.sniff_dialect`, los mismos
+    con los que `data.load_csv` lee después el archivo.
+    """
+    try:
+        from src import compression, data
+    except Exception:
+        import compression  # type: ignore
+        import data  # type: ignore
+
+    if Path(p).suffix.lower() in (".xlsx", ".xls"):
+        import pandas as pd
+
+        return pd.read_excel(p, nrows=0)
+    enc, sep = data.sniff_dialect(Path(p))
+    return compression.read_csv(Path(p), encoding=enc, sep=sep, nrows=0)
 
 
 def find_date_column(df: pd.DataFrame) -> Optional[str]:
+    import pandas as pd
+
     candidates = [
         "fecha",
         "fecha_venta",
@@ -138,69 +227,266 @@ def find_total_col(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
-def compute_rfm(ventas: pd.DataFrame, detalle: Optional[pd.DataFrame], clientes: Optional[pd.DataFrame]) -> pd.DataFrame:
-    # localizar columnas
-    date_col = find_date_column(ventas)
-    cust_col = find_customer_col(ventas)
-    total_col = find_total_col(ventas)
+def _detail_total_cols(detalle: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
+    """Columnas de cantidad y precio del detalle (última coincidencia, como siempre)."""
+    qty_col = None
+    price_col = None
+    for c in detalle.columns:
+        if "cant" in c.lower() or "cantidad" in c.lower():
+            qty_col = c
+        if "precio" in c.lower() or "valor" in c.lower() or "price" in c.lower():
+            price_col = c
+    return qty_col, price_col
+
+
+def find_product_cols(detalle: pd.DataFrame) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Columnas de producto, cantidad y precio para el top de productos (última coincidencia)."""
+    prod_col = None
+    qty_col = None
+    price_col = None
+    for c in detalle.columns:
+        lc = c.lower()
+        if "prod" in lc or "producto" in lc:
+            prod_col = c
+        if "cant" in lc or "cantidad" in lc:
+            qty_col = c
+        if "precio" in lc or "valor" in lc:
+            price_col = c
+    return prod_col, qty_col, price_col
+
+
+def find_name_col(df: pd.DataFrame) -> Optional[str]:
+    """Primera columna de nombre (`nombre`, `nombre_cliente`, `name`, ...)."""
+    return next((c for c in df.columns if "nombre" in c.lower() or "name" in c.lower()), None)
+
+
+def find_catalog_cols(productos: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
+    """Columnas de id y nombre del catálogo de productos."""
+    cat_id = next((c for c in productos.columns if "id" in c.lower() and "prod" in c.lower()), None)
+    return cat_id, find_name_col(productos)
+
+
+def _is_key(col: str) -> bool:
+    lc = col.lower()
+    return lc.startswith("id") or "id" in re.split(r"[^a-z0-9]+", lc)
+
+
+def project_columns(
+    table: str, header: pd.DataFrame, merge_duplicates: bool = False
+) -> Optional[Tuple[List[str], Dict[str, str]]]:
+    """Columnas (y sus tipos) que el análisis usa de `table`, según la cabecera.
+
+    Se aplican los mismos detectores que al analizar (`find_date_column`,
+    `find_customer_col`, ...) sobre el DataFrame vacío de la cabecera. Las
+    columnas de id se conservan siempre, para que la limpieza siga
+    distinguiendo filas. Fecha, región y nombre se leen como texto; los
+    números los infiere pandas (un export sucio haría fallar un float fijo).
+
+    Devuelve None (leer todo) si la tabla no se conoce, si falta un rol sin
+    el que el análisis fallaría (así el error es el de siempre), si no se
+    ahorra ninguna columna, o para clientes con `merge_duplicates` (el
+    matching usa nombre, email y ciudad).
+    """
+    text: List[Optional[str]] = []
+    if table == "ventas":
+        date_col, cust_col = find_date_column(header), find_customer_col(header)
+        if date_col is None or cust_col is None:
+            return None
+        roles = [date_col, cust_col, find_total_col(header), find_sale_id_col(header)]
+        text = [date_col]
+    elif table == "detalle":
+        roles = [find_sale_id_col(header), *_detail_total_cols(header), *find_product_cols(header)]
+    elif table == "clientes" and not merge_duplicates:
+        region_col, name_col = find_region_col(header), find_name_col(header)
+        roles = [find_customer_col(header), region_col, name_col]
+        text = [region_col, name_col]
+    elif table == "productos":
+        roles = list(find_catalog_cols(header))
+        text = roles[1:]
+    else:
+        return None
+    if not any(roles):
+        return None
+    usecols = [c for c in header.columns if c in roles or _is_key(c)]
+    if len(usecols) == len(header.columns):
+        return None
+    return usecols, {c: "str" for c in text if c is not None}
 
-    if date_col is None:
-        raise RuntimeError("No se pudo localizar la columna de fecha en ventas")
-    if cust_col is None:
-        raise RuntimeError("No se pudo localizar la columna de cliente en ventas")
+
+def _sale_totals(detalle: pd.DataFrame, dcol: str, qty_col: str, price_col: str) -> pd.Series:
+    import pandas as pd
+
+    line_total = pd.to_numeric(detalle[qty_col], errors="coerce").fillna(0) * pd.to_numeric(detalle[price_col], errors="coerce").fillna(0)
+    return line_total.groupby(detalle[dcol]).sum()
+
+
+def _parse_dates(s: pd.Series) -> pd.Series:
+    """Fechas parseadas una vez por valor distinto, con el formato cacheado por archivo."""
+    try:
+        from src import dates
+    except Exception:
+        import dates  # type: ignore
+
+    return dates.parse_dates(s)
+
+
+def _rfm_partial(
+    ventas: pd.DataFrame,
+    date_col: str,
+    cust_col: str,
+    total_col: Optional[str],
+    sale_totals: Optional[pd.DataFrame],
+    scol: Optional[str],
+    dcol: Optional[str],
+    customer_map: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """Agregado parcial por cliente (última fecha, compras, monto) de un bloque de ventas."""
+    import pandas as pd
 
     ventas = ventas.copy()
-    ventas[date_col] = pd.to_datetime(ventas[date_col], errors="coerce")
+    ventas[date_col] = _parse_dates(ventas[date_col])
     ventas = ventas.dropna(subset=[date_col, cust_col])
 
     # si hay columna total, usarla, si no intentar reconstruir desde detalle
     if total_col is not None and total_col in ventas.columns:
         ventas["_total"] = pd.to_numeric(ventas[total_col], errors="coerce").fillna(0.0)
-    elif detalle is not None:
-        # intentar mapear id_venta
-        sale_id_cols = [c for c in ventas.columns if "id" in c.lower() and ("venta" in c.lower() or "sale" in c.lower())]
-        detail_sale_cols = [c for c in detalle.columns if "id" in c.lower() and ("venta" in c.lower() or "sale" in c.lower())]
-        # heurístico: usar primera columna coincidente
-        if sale_id_cols and detail_sale_cols:
-            scol = sale_id_cols[0]
-            dcol = detail_sale_cols[0]
-            detalle = detalle.copy()
-            # buscar cantidad y precio
-            qty_col = None
-            price_col = None
-            for c in detalle.columns:
-                if "cant" in c.lower() or "cantidad" in c.lower():
-                    qty_col = c
-                if "precio" in c.lower() or "valor" in c.lower() or "price" in c.lower():
-                    price_col = c
-            if qty_col and price_col:
-                detalle["_line_total"] = pd.to_numeric(detalle[qty_col], errors="coerce").fillna(0) * pd.to_numeric(detalle[price_col], errors="coerce").fillna(0)
-                sale_totals = detalle.groupby(dcol) ["_line_total"].sum().rename("_total").reset_index()
-                ventas = ventas.merge(sale_totals, how="left", left_on=scol, right_on=dcol)
-                if "_total" not in ventas.columns:
-                    ventas["_total"] = 0.0
-            else:
-                ventas["_total"] = 0.0
-        else:
+    elif sale_totals is not None:
+        ventas = ventas.merge(sale_totals, how="left", left_on=scol, right_on=dcol)
+        if "_total" not in ventas.columns:
             ventas["_total"] = 0.0
     else:
         ventas["_total"] = 0.0
 
     # Agregar columnas necesarias
     ventas["_customer"] = ventas[cust_col].astype(str)
+    if customer_map:
+        # clientes duplicados: sumar sus compras bajo el id canónico
+        ventas["_customer"] = ventas["_customer"].map(customer_map).fillna(ventas["_customer"])
     ventas["_date"] = ventas[date_col]
     ventas["_total"] = pd.to_numeric(ventas["_total"], errors="coerce").fillna(0.0)
 
-    # referencia de recencia
-    reference_date = ventas["_date"].max() + pd.Timedelta(days=1)
-
-    # RFM aggregations
-    agg = ventas.groupby("_customer").agg(
-        recency=("_date", lambda x: (reference_date - x.max()).days),
+    return ventas.groupby("_customer").agg(
+        last=("_date", "max"),
         frequency=("_date", "count"),
         monetary=("_total", "sum"),
     )
-    agg = agg.reset_index()
+
+
+def compute_rfm(
+    ventas: pd.DataFrame,
+    detalle: Optional[pd.DataFrame],
+    clientes: Optional[pd.DataFrame],
+    memory_budget=None,
+    customer_map: Optional[Dict[str, str]] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """RFM por cliente.
+
+    `customer_map` ({id: id canónico}, p. ej. de
+    `matching.find_duplicates(clientes).canonical_map()`) agrupa los clientes
+    duplicados bajo un mismo id antes de agregar.
+
+    Con `memory_budget` (bytes, "2GB", `membudget.MemoryBudget`, o la variable
+    AURELION_MEMORY_BUDGET) las ventas y el detalle se procesan por bloques
+    dimensionados al presupuesto y los agregados parciales se combinan al
+    final; el resultado es el mismo.
+
+    Con `max_workers` > 1 las ventas se publican en memoria compartida,
+    particionadas por cliente, y cada proceso agrega sus particiones sin
+    copiar la tabla (ver `src/shared.py`). Sin valor se calcula en este
+    proceso.
+    """
+    import pandas as pd
+
+    # localizar columnas
+    date_col = find_date_column(ventas)
+    cust_col = find_customer_col(ventas)
+    total_col = find_total_col(ventas)
+
+    if date_col is None:
+        raise RuntimeError("No se pudo localizar la columna de fecha en ventas")
+    if cust_col is None:
+        raise RuntimeError("No se pudo localizar la columna de cliente en ventas")
+
+    budget = membudget.MemoryBudget.resolve(memory_budget)
+    # una sola inferencia de formato para todos los bloques
+    ventas = ventas.assign(**{date_col: _parse_dates(ventas[date_col])})
+
+    def chunks(df: pd.DataFrame):
+        return [df] if budget is None else membudget.iter_row_chunks(df, budget)
+
+    # si no hay columna total, intentar reconstruirla desde detalle vía id_venta
+    sale_totals = scol = dcol = None
+    if (total_col is None or total_col not in ventas.columns) and detalle is not None:
+        # heurístico: usar primera columna coincidente
+        scol = find_sale_id_col(ventas)
+        dcol = find_sale_id_col(detalle)
+        if scol and dcol:
+            qty_col, price_col = _detail_total_cols(detalle)
+            if qty_col and price_col:
+                parts = [_sale_totals(d, dcol, qty_col, price_col) for d in chunks(detalle)]
+                totals = parts[0] if len(parts) == 1 else pd.concat(parts).groupby(level=0).sum()
+                sale_totals = totals.rename("_total").reset_index()
+
+    if max_workers is not None and max_workers > 1:
+        partials = _rfm_shared(ventas, date_col, cust_col, total_col, sale_totals, scol, dcol, customer_map, max_workers)
+    else:
+        partials = [_rfm_partial(v, date_col, cust_col, total_col, sale_totals, scol, dcol, customer_map) for v in chunks(ventas)]
+    if not partials:
+        partials = [_rfm_partial(ventas, date_col, cust_col, total_col, sale_totals, scol, dcol, customer_map)]
+    if len(partials) == 1:
+        agg = partials[0]
+    else:
+        agg = pd.concat(partials).groupby(level=0).agg({"last": "max", "frequency": "sum", "monetary": "sum"})
+    if budget is not None:
+        budget.report_if_degraded("compute_rfm")
+    return _score_rfm(agg, clientes)
+
+
+def _rfm_shared(
+    ventas: pd.DataFrame,
+    date_col: str,
+    cust_col: str,
+    total_col: Optional[str],
+    sale_totals: Optional[pd.DataFrame],
+    scol: Optional[str],
+    dcol: Optional[str],
+    customer_map: Optional[Dict[str, str]],
+    max_workers: int,
+) -> List[pd.DataFrame]:
+    """Agregados parciales de `_rfm_partial` por partición de clientes, en varios procesos."""
+    from functools import partial
+
+    try:
+        from src import shared
+    except Exception:
+        import shared  # type: ignore
+
+    # sólo las columnas que usa el agregado; el total de detalle se une antes de publicar
+    if total_col is not None and total_col in ventas.columns:
+        table = ventas[[date_col, cust_col, total_col]]
+    elif sale_totals is not None:
+        table = ventas[[date_col, cust_col, scol]].merge(sale_totals, how="left", left_on=scol, right_on=dcol)
+        table, total_col = table[[date_col, cust_col, "_total"]], "_total"
+    else:
+        table, total_col = ventas[[date_col, cust_col]], None
+
+    task = partial(
+        _rfm_partial, date_col=date_col, cust_col=cust_col, total_col=total_col,
+        sale_totals=None, scol=None, dcol=None, customer_map=customer_map,
+    )
+    with shared.publish(table, partition_by=cust_col, partitions=max_workers * shared.PARTITIONS_PER_CPU) as published:
+        return shared.map_partitions(published, task, max_workers=max_workers)
+
+
+def _score_rfm(agg: pd.DataFrame, clientes: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Recencia, scores por cuartiles y segmento a partir del agregado por cliente."""
+    import pandas as pd
+
+    # referencia de recencia
+    reference_date = agg["last"].max() + pd.Timedelta(days=1)
+    agg["recency"] = (reference_date - agg["last"]).dt.days
+    agg = agg[["recency", "frequency", "monetary"]].reset_index()
 
     # scores por cuartiles (1..4) — recency invertido
     agg["r_score"] = pd.qcut(agg["recency"].rank(method="first"), 4, labels=[4, 3, 2, 1]).astype(int)
@@ -226,12 +512,7 @@ def compute_rfm(ventas: pd.DataFrame, detalle: Optional[pd.DataFrame], clientes:
     if clientes is not None:
         cust_id_col = find_customer_col(clientes) or clientes.columns[0]
         clientes_map = clientes.set_index(cust_id_col).to_dict(orient="index")
-        # try to map name field heuristically
-        name_col = None
-        for c in clientes.columns:
-            if "nombre" in c.lower() or "name" in c.lower():
-                name_col = c
-                break
+        name_col = find_name_col(clientes)
         if name_col:
             # create a mapping from id to name
             id_to_name = {str(k): v[name_col] for k, v in clientes_map.items() if name_col in v}
@@ -240,98 +521,429 @@ def compute_rfm(ventas: pd.DataFrame, detalle: Optional[pd.DataFrame], clientes:
     return agg.sort_values(["monetary"], ascending=False)
 
 
-def plot_rfm(agg: pd.DataFrame, out_path: Path) -> None:
-    plt.figure(figsize=(8, 5))
-    sns.countplot(data=agg, y="segment", order=agg["segment"].value_counts().index)
-    plt.title("Conteo por segmento RFM")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
+class _Feed:
+    """Adaptador consumidor (`update`/`reset`) hacia los métodos de un `RFMState`."""
 
+    def __init__(self, state: "RFMState", update: Callable[["pd.DataFrame"], None], reset: Callable[[], None]):
+        self.state = state
+        self.update = update
+        self.reset = reset
+
+
+class RFMState:
+    """RFM que se actualiza con las filas nuevas de ventas y detalle.
+
+    Pensado para `tail.Tailer`: `state.ventas` y `state.detalle` son los
+    consumidores de cada archivo. Se guarda el agregado por cliente (última
+    fecha, compras, monto), el cliente de cada venta y el total de cada venta
+    según el detalle, así que cada actualización cuesta lo que las filas
+    nuevas y no importa si el detalle llega antes o después que la venta.
+    `result()` da lo mismo que `compute_rfm` sobre las tablas completas.
+    """
+
+    def __init__(self, customer_map: Optional[Dict[str, str]] = None):
+        self.customer_map = customer_map
+        self.ventas = _Feed(self, self.add_ventas, self.reset_ventas)
+        self.detalle = _Feed(self, self.add_detalle, self.reset_detalle)
+        self._sale_totals: Dict[str, float] = {}
+        self.reset_ventas()
+
+    def reset_ventas(self) -> None:
+        # cliente -> [última fecha, compras, monto]
+        self._agg: Dict[str, list] = {}
+        self._sale_customer: Dict[str, str] = {}
+        self._uses_total: Optional[bool] = None
+
+    def reset_detalle(self) -> None:
+        if not self._uses_total:
+            # quitar del monto lo que aportó el detalle anterior
+            for sale, total in self._sale_totals.items():
+                customer = self._sale_customer.get(sale)
+                if customer is not None:
+                    self._agg[customer][2] -= total
+        self._sale_totals = {}
+
+    def add_ventas(self, ventas: pd.DataFrame) -> None:
+        import pandas as pd
+
+        date_col = find_date_column(ventas)
+        cust_col = find_customer_col(ventas)
+        if date_col is None or cust_col is None:
+            raise RuntimeError("No se pudo localizar la columna de fecha o de cliente en ventas")
+        total_col = find_total_col(ventas)
+        self._uses_total = total_col is not None
+        scol = None if self._uses_total else find_sale_id_col(ventas)
+
+        dates = _parse_dates(ventas[date_col])
+        keep = dates.notna() & ventas[cust_col].notna()
+        ventas, dates = ventas[keep], dates[keep]
+        customer = ventas[cust_col].astype(str)
+        if self.customer_map:
+            customer = customer.map(self.customer_map).fillna(customer)
+        if self._uses_total:
+            total = pd.to_numeric(ventas[total_col], errors="coerce").fillna(0.0)
+        elif scol is not None:
+            sale = ventas[scol].astype(str)
+            total = sale.map(self._sale_totals).fillna(0.0)
+            self._sale_customer.update(zip(sale, customer))
+        else:
+            total = pd.Series(0.0, index=ventas.index)
+
+        part = pd.DataFrame({"_customer": customer, "_date": dates, "_total": total}).groupby("_customer").agg(
+            last=("_date", "max"), frequency=("_date", "count"), monetary=("_total", "sum")
+        )
+        for cust, last, frequency, monetary in part.itertuples():
+            entry = self._agg.get(cust)
+            if entry is None:
+                self._agg[cust] = [last, int(frequency), float(monetary)]
+            else:
+                entry[0] = max(entry[0], last)
+                entry[1] += int(frequency)
+                entry[2] += float(monetary)
+
+    def add_detalle(self, detalle: pd.DataFrame) -> None:
+        dcol = find_sale_id_col(detalle)
+        qty_col, price_col = _detail_total_cols(detalle)
+        if dcol is None or qty_col is None or price_col is None:
+            return
+        totals = _sale_totals(detalle, dcol, qty_col, price_col)
+        totals = totals.groupby(totals.index.astype(str)).sum()
+        for sale, amount in totals.items():
+            self._sale_totals[sale] = self._sale_totals.get(sale, 0.0) + float(amount)
+            customer = None if self._uses_total else self._sale_customer.get(sale)
+            if customer is not None:
+                self._agg[customer][2] += float(amount)
+
+    def result(self, clientes: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        if not self._agg:
+            raise RuntimeError("RFMState sin ventas")
+        agg = pd.DataFrame.from_dict(self._agg, orient="index", columns=["last", "frequency", "monetary"]).sort_index()
+        agg.index.name = "_customer"
+        agg["last"] = pd.to_datetime(agg["last"])
+        return _score_rfm(agg, clientes)
+
+
+def find_sale_id_col(df: pd.DataFrame) -> Optional[str]:
+    """Primera columna que parezca id de venta (`id_venta`, `sale_id`, ...)."""
+    for c in df.columns:
+        lc = c.lower()
+        if "id" in lc and ("venta" in lc or "sale" in lc):
+            return c
+    return None
+
+
+def find_region_col(df: pd.DataFrame) -> Optional[str]:
+    candidates = ["ciudad", "region", "provincia", "city"]
+    cols = [c.lower() for c in df.columns]
+    for cand in candidates:
+        if cand in cols:
+            return df.columns[cols.index(cand)]
+    return None
+
+
+def segment_counts(agg: pd.DataFrame) -> pd.DataFrame:
+    """Conteo de clientes por segmento, ordenado de mayor a menor."""
+    vc = agg["segment"].value_counts()
+    return vc.rename_axis("segment").reset_index(name="count")
+
+
+def top_products(
+    detalle: Optional[pd.DataFrame], productos: Optional[pd.DataFrame] = None, n: int = 10
+) -> Optional[pd.DataFrame]:
+    """Top `n` productos por ingreso (columnas `product`, `revenue`).
+
+    Si el detalle sólo identifica el producto por id y hay catálogo de
+    productos, se usa el nombre del catálogo como etiqueta.
+    """
+    import pandas as pd
 
-def plot_top_products(detalle: Optional[pd.DataFrame], productos: Optional[pd.DataFrame], out_path: Path) -> None:
     if detalle is None:
         print("No hay detalle de ventas; se omite top productos")
-        return
-    # intentar identificar columnas
-    prod_col = None
-    qty_col = None
-    price_col = None
-    for c in detalle.columns:
-        lc = c.lower()
-        if "prod" in lc or "producto" in lc:
-            prod_col = c
-        if "cant" in lc or "cantidad" in lc:
-            qty_col = c
-        if "precio" in lc or "valor" in lc:
-            price_col = c
+        return None
+    prod_col, qty_col, price_col = find_product_cols(detalle)
     if prod_col is None or qty_col is None:
         print("No se encontraron columnas product/cantidad en detalle; omitiendo top productos")
-        return
-    detalle = detalle.copy()
-    detalle[qty_col] = pd.to_numeric(detalle[qty_col], errors="coerce").fillna(0)
+        return None
+    qty = pd.to_numeric(detalle[qty_col], errors="coerce").fillna(0)
     if price_col is not None:
-        detalle[price_col] = pd.to_numeric(detalle[price_col], errors="coerce").fillna(0)
-        detalle["line_total"] = detalle[qty_col] * detalle[price_col]
+        line_total = qty * pd.to_numeric(detalle[price_col], errors="coerce").fillna(0)
     else:
-        detalle["line_total"] = detalle[qty_col]
+        line_total = qty
+
+    top = line_total.groupby(detalle[prod_col]).sum().nlargest(n)
+    df_top = top.rename_axis("product").reset_index(name="revenue")
+    if productos is not None and "id" in prod_col.lower():
+        cat_id, cat_name = find_catalog_cols(productos)
+        if cat_id is not None and cat_name is not None:
+            names = productos.drop_duplicates(cat_id).set_index(productos[cat_id].drop_duplicates().astype(str))[cat_name]
+            df_top["product"] = df_top["product"].astype(str).map(names).fillna(df_top["product"].astype(str))
+    return df_top
+
+
+def plot_rfm(agg: pd.DataFrame, out_path: Path) -> None:
+    job = reports.RenderJob("rfm_segments", segment_counts(agg), Path(out_path), "Conteo por segmento RFM")
+    reports.render_job(job)
+
+
+def plot_top_products(detalle: Optional[pd.DataFrame], productos: Optional[pd.DataFrame], out_path: Path) -> None:
+    df_top = top_products(detalle, productos)
+    if df_top is None:
+        return
+    job = reports.RenderJob("top_products", df_top, Path(out_path), "Top 10 productos por ingreso")
+    reports.render_job(job)
+
+
+def filter_for_spec(
+    ventas: pd.DataFrame,
+    detalle: Optional[pd.DataFrame],
+    clientes: Optional[pd.DataFrame],
+    spec: "reports.ReportSpec",
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Restringir ventas (y su detalle) a la región y periodo del reporte."""
+    import pandas as pd
+
+    mask = pd.Series(True, index=ventas.index)
+    if spec.region is not None:
+        region_col = find_region_col(clientes) if clientes is not None else None
+        if region_col is None:
+            raise RuntimeError("Se pidió región pero clientes no tiene columna de ciudad/región")
+        cust_col = find_customer_col(ventas)
+        cli_id_col = find_customer_col(clientes) or clientes.columns[0]
+        region_by_id = clientes.set_index(clientes[cli_id_col].astype(str))[region_col]
+        region_by_id = region_by_id[~region_by_id.index.duplicated()]
+        regions = ventas[cust_col].astype(str).map(region_by_id)
+        mask &= regions.astype(str).str.casefold() == str(spec.region).casefold()
+    if spec.period is not None:
+        date_col = find_date_column(ventas)
+        period = pd.Period(spec.period)
+        dates = _parse_dates(ventas[date_col])
+        mask &= (dates >= period.start_time) & (dates <= period.end_time)
+    ventas = ventas[mask]
+    return ventas, restrict_detalle(ventas, detalle)
+
+
+def restrict_detalle(ventas: pd.DataFrame, detalle: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Filas de detalle cuyas ventas aparecen en `ventas`."""
+    if detalle is None:
+        return None
+    scol = find_sale_id_col(ventas)
+    dcol = find_sale_id_col(detalle)
+    if scol is None or dcol is None:
+        return detalle
+    return detalle[detalle[dcol].astype(str).isin(ventas[scol].astype(str))]
+
+
+def build_report_jobs(
+    specs: Sequence["reports.ReportSpec"],
+    ventas: pd.DataFrame,
+    detalle: Optional[pd.DataFrame],
+    clientes: Optional[pd.DataFrame],
+    out_dir: Path,
+) -> List["reports.RenderJob"]:
+    """Agregar los datos de cada reporte del pack y devolver los trabajos de dibujo.
+
+    El RFM se calcula una sola vez por combinación región × periodo y se
+    reutiliza para todos los segmentos. Los reportes que no se pueden calcular
+    (por ejemplo, un periodo sin ventas) se omiten con un aviso.
+    """
+    jobs: List[reports.RenderJob] = []
+    filtered: Dict[Tuple[Optional[str], Optional[str]], Tuple[pd.DataFrame, Optional[pd.DataFrame]]] = {}
+    rfm_cache: Dict[Tuple[Optional[str], Optional[str]], pd.DataFrame] = {}
+    for spec in specs:
+        key = (spec.region, spec.period)
+        try:
+            if key not in filtered:
+                filtered[key] = filter_for_spec(ventas, detalle, clientes, spec)
+            v, d = filtered[key]
+            agg = None
+            if spec.kind == "rfm_segments" or spec.segment is not None:
+                if key not in rfm_cache:
+                    rfm_cache[key] = compute_rfm(v, d, clientes)
+                agg = rfm_cache[key]
+            if spec.segment is not None:
+                agg = agg[agg["segment"] == spec.segment]
+                cust_col = find_customer_col(v)
+                v = v[v[cust_col].astype(str).isin(agg["_customer"])]
+                d = restrict_detalle(v, d)
+
+            if spec.kind == "rfm_segments":
+                data = segment_counts(agg)
+                title = "Conteo por segmento RFM"
+            else:
+                data = top_products(d)
+                title = "Top 10 productos por ingreso"
+            if data is None or data.empty:
+                print(f"Sin datos para {spec.filename()}; se omite")
+                continue
+        except Exception as e:
+            print(f"Se omite {spec.filename()}: {e}")
+            continue
+        jobs.append(reports.RenderJob(spec.kind, data, Path(out_dir) / spec.filename(), title + spec.describe()))
+    return jobs
+
+
+def load_specs(path: Path) -> List["reports.ReportSpec"]:
+    """Leer un pack de reportes desde JSON (lista de objetos con kind/segment/region/period)."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return [reports.ReportSpec(**item) for item in raw]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Análisis RFM y top productos sobre los CSV del proyecto.")
+    parser.add_argument("--pack", type=Path, default=None, help="JSON con la lista de reportes a renderizar")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para renderizar (por defecto: CPUs)")
+    parser.add_argument("--cache-dir", type=Path, default=pipeline.DEFAULT_CACHE_DIR, help="memo de etapas ya calculadas")
+    parser.add_argument("--merge-duplicates", action="store_true", help="unir clientes duplicados (ver src/matching.py) antes del RFM")
+    return parser.parse_args(argv)
+
+
+def _clean_stage(df: pd.DataFrame) -> pd.DataFrame:
+    clean_df = get_clean_df()
+    if clean_df is None:
+        return df
+    try:
+        return clean_df(df)
+    except Exception:
+        # no crítico
+        return df
+
+
+def _duplicates_stage(clientes: pd.DataFrame) -> Dict[str, str]:
+    try:
+        from src import matching
+    except Exception:
+        import matching  # type: ignore
+
+    result = matching.find_duplicates(clientes)
+    print(f"Clientes duplicados: {result.summary()}")
+    return result.canonical_map()
+
+
+def _rfm_csv_stage(agg: pd.DataFrame, out_csv: Path) -> Path:
+    agg.to_csv(out_csv, index=False)
+    return out_csv
+
+
+def _rfm_plot_stage(agg: pd.DataFrame, out_path: Path) -> "reports.RenderJob":
+    return reports.RenderJob("rfm_segments", segment_counts(agg), out_path, "Conteo por segmento RFM")
+
+
+def _top_plot_stage(
+    out_path: Path, detalle: Optional[pd.DataFrame] = None, productos: Optional[pd.DataFrame] = None
+) -> Optional["reports.RenderJob"]:
+    df_top = top_products(detalle, productos)
+    if df_top is None:
+        return None
+    return reports.RenderJob("top_products", df_top, out_path, "Top 10 productos por ingreso")
 
-    top = detalle.groupby(prod_col)["line_total"].sum().nlargest(10)
-    df_top = top.reset_index().rename(columns={prod_col: "product", "line_total": "revenue"})
 
-    plt.figure(figsize=(10, 6))
-    sns.barplot(data=df_top, y="product", x="revenue", palette="viridis")
-    plt.title("Top 10 productos por ingreso")
-    plt.tight_layout()
-    plt.savefig(out_path)
-    plt.close()
+def _pack_stage(specs_path: Path, out_dir: Path, ventas: pd.DataFrame, detalle=None, clientes=None) -> List["reports.RenderJob"]:
+    specs = load_specs(specs_path)
+    print(f"Preparando pack de {len(specs)} reportes...")
+    return build_report_jobs(specs, ventas, detalle, clientes, out_dir)
 
 
-def main() -> int:
+def build_graph(
+    paths: Dict[str, "Optional[Path] | List[Path]"],
+    report_dir: Path,
+    pack: Optional[Path] = None,
+    cache_dir: Path = pipeline.DEFAULT_CACHE_DIR,
+    merge_duplicates: bool = False,
+) -> "pipeline.TaskGraph":
+    """Armar el grafo de etapas: carga → limpieza → RFM → CSV/gráficos.
+
+    Las cargas no se guardan en el memo (releer el CSV es tan caro como leer
+    el pickle); las limpiezas y el RFM sí, para que tocar sólo `productos.csv`
+    vuelva a dibujar únicamente `top_products.png`.
+
+    Las etapas de gráficos sólo preparan los trabajos de dibujo (`deferred`):
+    quedan al día cuando `main` confirma (`commit`) que se escribieron.
+    """
+    g = pipeline.TaskGraph(cache_dir)
+    cleaned: Dict[str, str] = {}
+    for table, p in paths.items():
+        if not p:
+            continue
+        # cada carga lee sólo las columnas que usan las etapas siguientes
+        load_params = {"table": table, "merge_duplicates": merge_duplicates}
+        if isinstance(p, list) and len(p) > 1:
+            g.add(f"load_{table}", load_many, inputs={f"p{i:04d}": f for i, f in enumerate(p)}, params=load_params, cache=False)
+        else:
+            g.add(f"load_{table}", load_df, inputs={"p": p[0] if isinstance(p, list) else p}, params=load_params, cache=False)
+        if table == "productos":
+            continue
+        g.add(f"clean_{table}", _clean_stage, deps={"df": f"load_{table}"})
+        cleaned[table] = f"clean_{table}"
+
+    rfm_deps = dict(cleaned)
+    if merge_duplicates and "clientes" in cleaned:
+        g.add("duplicados", _duplicates_stage, deps={"clientes": cleaned["clientes"]})
+        rfm_deps["customer_map"] = "duplicados"
+    g.add("rfm", compute_rfm, deps=rfm_deps, params={k: None for k in ("detalle", "clientes") if k not in cleaned})
+    out_csv = report_dir / "rfm_summary.csv"
+    g.add("rfm_csv", _rfm_csv_stage, deps={"agg": "rfm"}, params={"out_csv": out_csv}, outputs=[out_csv])
+    rfm_png = report_dir / "rfm_segment_counts.png"
+    g.add("plot_rfm", _rfm_plot_stage, deps={"agg": "rfm"}, params={"out_path": rfm_png}, outputs=[rfm_png], deferred=True)
+    top_deps = {"detalle": cleaned["detalle"]} if "detalle" in cleaned else {}
+    if paths.get("productos"):
+        top_deps["productos"] = "load_productos"
+    top_png = report_dir / "top_products.png"
+    g.add("plot_top", _top_plot_stage, deps=top_deps, params={"out_path": top_png}, outputs=[top_png], deferred=True)
+    if pack is not None:
+        pack_deps = {k: v for k, v in cleaned.items() if k in ("ventas", "detalle", "clientes")}
+        g.add("pack", _pack_stage, inputs={"specs_path": pack}, deps=pack_deps, params={"out_dir": report_dir / "pack"}, deferred=True)
+    return g
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
     print("Buscando archivos de datos...")
-    ventas_p = locate_file(Filenames["ventas"])
-    detalle_p = locate_file(Filenames["detalle"])
-    clientes_p = locate_file(Filenames["clientes"])
-    productos_p = locate_file(Filenames["productos"])
+    with instrument.stage("locate"):
+        paths = {table: locate_files(names) for table, names in Filenames.items()}
 
-    if ventas_p is None:
+    if not paths["ventas"]:
         print("No se encontró archivo de ventas. Busqué en:")
         for p in SEARCH_PATHS:
             print("  -", p)
         return 2
 
-    print(f"Ventas: {ventas_p}")
-    ventas = load_df(ventas_p)
-    detalle = load_df(detalle_p) if detalle_p is not None else None
-    clientes = load_df(clientes_p) if clientes_p is not None else None
-    productos = load_df(productos_p) if productos_p is not None else None
-
-    print("Limpiando datos básicos...")
-    if clean_df is not None:
-        try:
-            ventas = clean_df(ventas)
-            if detalle is not None:
-                detalle = clean_df(detalle)
-            if clientes is not None:
-                clientes = clean_df(clientes)
-        except Exception:
-            # no crítico
-            pass
+    if len(paths["ventas"]) == 1:
+        print(f"Ventas: {paths['ventas'][0]}")
+    else:
+        print(f"Ventas: {len(paths['ventas'])} archivos en {paths['ventas'][0].parent}")
+    REPORT_DIR.mkdir(exist_ok=True)
+    graph = build_graph(paths, REPORT_DIR, pack=args.pack, cache_dir=args.cache_dir, merge_duplicates=args.merge_duplicates)
 
-    print("Calculando RFM por cliente...")
+    print("Limpiando datos y calculando RFM por cliente (se reutiliza lo que no cambió)...")
     try:
-        agg = compute_rfm(ventas, detalle, clientes)
-    except Exception as e:
-        print("Error calculando RFM:", e)
+        graph.run()
+    except pipeline.StageError as e:
+        if e.stage == "rfm":
+            print("Error calculando RFM:", e.error)
+        else:
+            print(f"Error en la etapa {e.stage}:", e.error)
         return 3
-
-    out_csv = REPORT_DIR / "rfm_summary.csv"
-    agg.to_csv(out_csv, index=False)
-    print(f"Guardado RFM resumen en: {out_csv}")
+    print(f"Etapas ejecutadas: {', '.join(graph.executed) or '-'}")
+    print(f"Etapas reutilizadas: {', '.join(graph.skipped) or '-'}")
+    if "rfm_csv" in graph.executed:
+        print(f"Guardado RFM resumen en: {REPORT_DIR / 'rfm_summary.csv'}")
 
     print("Generando gráficos...")
-    plot_rfm(agg, REPORT_DIR / "rfm_segment_counts.png")
-    plot_top_products(detalle, productos, REPORT_DIR / "top_products.png")
+    jobs: List[reports.RenderJob] = []
+    rendered = [name for name in ("plot_rfm", "plot_top", "pack") if name in graph.executed]
+    for name in rendered:
+        result = graph.value(name)
+        if isinstance(result, list):
+            jobs.extend(result)
+        elif result is not None:
+            jobs.append(result)
+    with instrument.stage("render", rows=len(jobs)):
+        reports.render_reports(jobs, max_workers=args.workers)
+    # si el dibujo falla, las etapas no se confirman y se repiten la próxima vez
+    graph.commit(*rendered)
 
     print("Hecho. Archivos generados en:")
     for p in REPORT_DIR.iterdir():
@@ -0,0 +1,125 @@
+"""Locale-aware parsing of numbers stored as text (`1.234,56`, `1,234.56`).
+
+Spanish-locale exports write amounts with a decimal comma and a thousands
+dot, which `pd.read_csv` leaves as text. `convert_frame` looks at a sample
+of every text column, picks the number format that fits it (see FORMATS)
+and converts the whole column. Each distinct value is parsed once, so the
+cost grows with the number of distinct values rather than rows.
+
+    df = convert_frame(df)
+    df.attrs["number_formats"]     # {"importe": "es"}
+    df.attrs["number_failures"]    # {"importe": 3}  values left as NaN
+    df.attrs["number_ambiguous"]   # ["peso"]  fits both formats, left as text
+
+Currency signs and blanks (including non-breaking spaces) are ignored;
+empty strings count as missing, not as failures. A column counts as
+formatted numbers only if some values use a separator, so codes such as
+"01234" stay text; columns the caller typed (`skip`) are left alone. A
+column whose sample fits more than one format (every value like "1.250",
+which is 1250 in "es" and 1.25 in "en") is not guessed: it stays text and
+is listed in `number_ambiguous`.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# name -> (thousands separator, decimal separator)
+FORMATS: Dict[str, Tuple[str, str]] = {"es": (".", ","), "en": (",", ".")}
+
+# share of the sampled values that must fit a format to convert the column
+MIN_SHARE = 0.95
+SAMPLE_ROWS = 1000
+
+_NOISE = r"[\s$€]"
+
+
+def _pattern(fmt: str) -> str:
+    thousands, decimal = (re.escape(c) for c in FORMATS[fmt])
+    return rf"[-+]?(?:\d{{1,3}}(?:{thousands}\d{{3}})+|\d+)(?:{decimal}\d+)?"
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype(str).str.replace(_NOISE, "", regex=True)
+
+
+def is_text(s: pd.Series) -> bool:
+    return s.dtype == object or isinstance(s.dtype, pd.StringDtype)
+
+
+def candidate_formats(sample: pd.Series, min_share: float = MIN_SHARE) -> List[str]:
+    """Names of the formats in FORMATS that fit at least `min_share` of `sample`."""
+    text = _text(sample.dropna())
+    text = text[text != ""]
+    if text.empty:
+        return []
+    fits = []
+    for fmt in FORMATS:
+        # plain digit strings are ids or codes, not formatted numbers
+        separators = "[" + re.escape("".join(FORMATS[fmt])) + "]"
+        if text.str.fullmatch(_pattern(fmt)).mean() >= min_share and text.str.contains(separators).any():
+            fits.append(fmt)
+    return fits
+
+
+def detect_format(sample: pd.Series, min_share: float = MIN_SHARE) -> Optional[str]:
+    """Name of the one format in FORMATS that fits `sample`, or None (none or ambiguous)."""
+    fits = candidate_formats(sample, min_share)
+    return fits[0] if len(fits) == 1 else None
+
+
+def parse_numbers(s: pd.Series, fmt: str) -> Tuple[pd.Series, int]:
+    """`s` parsed with format `fmt` and the number of values that did not parse.
+
+    Unparseable values become NaN. Whole-number columns without gaps come
+    back as int64, the rest as float64.
+    """
+    thousands, decimal = FORMATS[fmt]
+    codes, uniques = pd.factorize(s)
+    text = _text(pd.Series(uniques, dtype=object))
+    ok = text.str.fullmatch(_pattern(fmt)).to_numpy(dtype=bool)
+    cleaned = text.str.replace(thousands, "", regex=False).str.replace(decimal, ".", regex=False)
+    values = pd.to_numeric(cleaned.where(ok), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    bad = ~ok & (text != "").to_numpy(dtype=bool)
+
+    present = codes >= 0
+    out = np.full(len(s), np.nan)
+    out[present] = values[codes[present]]
+    failures = int(bad[codes[present]].sum())
+    if not np.isnan(out).any() and np.array_equal(out, np.floor(out)):
+        out = out.astype("int64")
+    return pd.Series(out, index=s.index, name=s.name), failures
+
+
+def convert_frame(df: pd.DataFrame, sample_rows: int = SAMPLE_ROWS, skip: Iterable[str] = ()) -> pd.DataFrame:
+    """Convert the text columns of `df` that hold formatted numbers, in place.
+
+    Columns in `skip` (e.g. the keys of a `dtype` the caller passed to
+    `read_csv`) keep their type.
+
+    The format of each column is detected on its first `sample_rows`
+    values. Formats and failure counts of the converted columns go to
+    `df.attrs["number_formats"]` and `df.attrs["number_failures"]`.
+    """
+    formats: Dict[str, str] = {}
+    failures: Dict[str, int] = {}
+    ambiguous: List[str] = []
+    skip = set(skip)
+    for col in df.columns:
+        s = df[col]
+        if col in skip or not isinstance(s, pd.Series) or not is_text(s):
+            continue
+        fits = candidate_formats(s.iloc[:sample_rows])
+        if len(fits) > 1:
+            ambiguous.append(col)
+        if len(fits) != 1:
+            continue
+        df[col], failures[col] = parse_numbers(s, fits[0])
+        formats[col] = fits[0]
+    df.attrs["number_formats"] = formats
+    df.attrs["number_failures"] = failures
+    df.attrs["number_ambiguous"] = ambiguous
+    return df
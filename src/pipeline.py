@@ -0,0 +1,327 @@
+"""Tiny content-hashed task graph with memoized stage outputs.
+
+Each stage declares:
+- inputs: files passed to the stage as keyword arguments; their *contents*
+  are hashed (file hashes are memoized by size + mtime so unchanged files are
+  not re-read),
+- deps: upstream stages whose results are passed as keyword arguments,
+- params: extra keyword arguments, hashed by `repr`,
+- outputs: files the stage writes; a missing output forces a rerun,
+- deferred: the stage only describes its outputs (e.g. a render job) and the
+  caller writes them later; it counts as done once `commit(name)` is called.
+
+A stage key is the hash of its name, the source files of its function's
+module and of the local modules it imports (transitively, including imports
+inside functions), its params, its input hashes and the keys of its deps.
+When the key matches the last successful run (and outputs exist) the stage
+is skipped; results of `cache=True` stages are pickled under
+`.cache/pipeline/` and only loaded when a downstream stage that has to
+rerun asks for them. So only the stages
+downstream of a change are executed. Every executed stage is measured with
+`instrument.stage` (a no-op unless AURELION_TRACE is set).
+
+Example:
+    g = TaskGraph()
+    g.add("load", load_df, inputs={"p": path}, cache=False)
+    g.add("rfm", compute, deps={"ventas": "load"})
+    g.run()
+    g.value("rfm")
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set
+
+try:
+    from src import instrument
+except Exception:
+    import instrument  # type: ignore
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = ROOT / ".cache" / "pipeline"
+
+
+class StageError(RuntimeError):
+    """Raised when a stage function fails; `stage` names the stage."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"stage {stage!r} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    inputs: Dict[str, Path] = field(default_factory=dict)
+    deps: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, Any] = field(default_factory=dict)
+    outputs: Sequence[Path] = ()
+    cache: bool = True
+    deferred: bool = False
+
+
+def _local_imports(path: Path) -> Set[Path]:
+    """Modules next to `path` or under the repo root that `path` imports anywhere."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, ValueError):
+        return set()
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    found: Set[Path] = set()
+    for name in names:
+        for base in (path.parent, ROOT):
+            candidate = base.joinpath(*name.split(".")).with_suffix(".py")
+            if candidate.is_file():
+                found.add(candidate.resolve())
+    return found
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class TaskGraph:
+    """A set of stages plus the on-disk memo of their last results."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.stages: Dict[str, Stage] = {}
+        self.executed: List[str] = []
+        self.skipped: List[str] = []
+        self._values: Dict[str, Any] = {}
+        self._keys: Dict[str, str] = {}
+        self._index: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._file_hashes: Dict[str, List[Any]] = {}
+        self._imports: Dict[str, Set[Path]] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *,
+        inputs: Optional[Mapping[str, Path]] = None,
+        deps: Optional[Mapping[str, str]] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        outputs: Sequence[Path] = (),
+        cache: bool = True,
+        deferred: bool = False,
+    ) -> Stage:
+        """Register a stage. Deps must already be registered."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in (deps or {}).values():
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        stage = Stage(
+            name=name,
+            func=func,
+            inputs={k: Path(v) for k, v in (inputs or {}).items()},
+            deps=dict(deps or {}),
+            params=dict(params or {}),
+            outputs=[Path(p) for p in outputs],
+            cache=cache,
+            deferred=deferred,
+        )
+        self.stages[name] = stage
+        return stage
+
+    # -- hashing -----------------------------------------------------------
+    def file_hash(self, path: Path) -> str:
+        """Content hash of `path`, memoized by (size, mtime_ns)."""
+        st = path.stat()
+        key = str(path.resolve())
+        memo = self._file_hashes.get(key)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self._file_hashes[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def _module_files(self, path: Path) -> List[Path]:
+        """`path` plus every local module it imports, transitively."""
+        seen: Set[Path] = set()
+        todo = [path.resolve()]
+        while todo:
+            current = todo.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            # memoized by content, so unchanged modules are not parsed again
+            key = f"{current}:{self.file_hash(current)}"
+            if key not in self._imports:
+                self._imports[key] = _local_imports(current)
+            todo.extend(self._imports[key] - seen)
+        return sorted(seen)
+
+    def _code_hash(self, func: Callable[..., Any]) -> str:
+        try:
+            src = inspect.getsourcefile(func)
+        except TypeError:
+            src = None
+        name = getattr(func, "__qualname__", repr(func))
+        if src and os.path.exists(src):
+            files = self._module_files(Path(src))
+            return name + "".join(f":{self.file_hash(f)}" for f in files)
+        return name
+
+    def _stage_key(self, stage: Stage) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(stage.name.encode())
+        h.update(self._code_hash(stage.func).encode())
+        h.update(repr(sorted(stage.params.items())).encode())
+        for arg, path in sorted(stage.inputs.items()):
+            h.update(f"{arg}={self.file_hash(path)}".encode())
+        for arg, dep in sorted(stage.deps.items()):
+            h.update(f"{arg}={self._keys[dep]}".encode())
+        return h.hexdigest()
+
+    # -- persistence -------------------------------------------------------
+    def _pickle_path(self, name: str, key: str) -> Path:
+        safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", name)
+        return self.cache_dir / f"{safe}@{key}.pkl"
+
+    def _load_state(self) -> None:
+        path = self.cache_dir / "index.json"
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        self._index = state.get("stages", {})
+        self._file_hashes = state.get("files", {})
+
+    def _save_state(self) -> None:
+        state = {"stages": self._index, "files": self._file_hashes}
+        _atomic_write_bytes(self.cache_dir / "index.json", json.dumps(state, indent=1).encode("utf-8"))
+
+    # -- execution ---------------------------------------------------------
+    def _order(self, targets: Optional[Sequence[str]]) -> List[str]:
+        order: List[str] = []
+        seen: set = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps.values():
+                visit(dep)
+            order.append(name)
+
+        for name in targets if targets is not None else list(self.stages):
+            visit(name)
+        return order
+
+    def is_fresh(self, name: str) -> bool:
+        stage = self.stages[name]
+        key = self._keys[name]
+        if self._index.get(name) != key:
+            return False
+        if not all(p.exists() for p in stage.outputs):
+            return False
+        return not stage.cache or self._pickle_path(name, key).exists()
+
+    def _execute(self, name: str) -> Any:
+        stage = self.stages[name]
+        kwargs: Dict[str, Any] = dict(stage.inputs)
+        for arg, dep in stage.deps.items():
+            kwargs[arg] = self.value(dep)
+        kwargs.update(stage.params)
+        try:
+            with instrument.stage(name) as st:
+                result = stage.func(**kwargs)
+                st.rows = instrument.rows_of(result)
+        except Exception as e:
+            raise StageError(name, e) from e
+        key = self._keys[name]
+        if stage.cache:
+            for old in self.cache_dir.glob(self._pickle_path(name, "*").name):
+                old.unlink(missing_ok=True)
+            _atomic_write_bytes(self._pickle_path(name, key), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        self._values[name] = result
+        if stage.deferred:
+            # done only once the caller has written the outputs (`commit`)
+            self._index.pop(name, None)
+            self._pending[name] = key
+        else:
+            self._index[name] = key
+        self.executed.append(name)
+        if name in self.skipped:
+            self.skipped.remove(name)
+        return result
+
+    def value(self, name: str) -> Any:
+        """Result of a stage: from this run, from the memo, or computed now."""
+        if name in self._values:
+            return self._values[name]
+        stage = self.stages[name]
+        if name not in self._keys:
+            for dep_name in self._order([name]):
+                self._keys.setdefault(dep_name, self._stage_key(self.stages[dep_name]))
+        if stage.cache and self.is_fresh(name):
+            with open(self._pickle_path(name, self._keys[name]), "rb") as fh:
+                self._values[name] = pickle.load(fh)
+            return self._values[name]
+        return self._execute(name)
+
+    def commit(self, *names: str) -> None:
+        """Record deferred stages of the last run as done, once their outputs are written."""
+        for name in names:
+            if name in self._pending:
+                self._index[name] = self._pending.pop(name)
+        self._save_state()
+
+    def run(self, targets: Optional[Sequence[str]] = None) -> List[str]:
+        """Bring `targets` (default: every stage) up to date.
+
+        Returns the names of the stages that were executed in this run.
+        """
+        self._load_state()
+        self.executed, self.skipped = [], []
+        self._pending = {}
+        order = self._order(targets)
+        try:
+            for name in order:
+                self._keys[name] = self._stage_key(self.stages[name])
+            for name in order:
+                if name in self._values:
+                    continue
+                if self.is_fresh(name):
+                    self.skipped.append(name)
+                else:
+                    self._execute(name)
+        finally:
+            self._save_state()
+        return list(self.executed)
@@ -0,0 +1,88 @@
+"""Background preloading for the interactive menus.
+
+A menu spends most of its time blocked on `input()`. `Preloader` starts the
+slow loads (tables, snapshots, caches) on worker threads as soon as the menu
+is created; an option that needs the data calls `get`, which returns at once
+if the load already finished and otherwise shows a small spinner until it
+does:
+
+    pre = Preloader()
+    pre.submit("metricas", metrics.load_current)
+    ...
+    snap = pre.get("metricas", "métricas")   # waits only if still loading
+
+Exceptions raised by a load are re-raised by `get`.
+
+`shutdown` drops the loads that have not started, but a running one cannot
+be interrupted from outside, and the pool threads are joined when Python
+exits. Long loads should therefore poll `stopping` and return early (see
+`warm_render` in the documentation viewer). A load that does not (such as
+the metrics refresh of `docs.py`) delays the exit until it finishes.
+
+This is the only implementation; the viewer in `entrega2/interactive_menu`
+imports it.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, TextIO
+
+SPINNER = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+
+class Preloader:
+    """Named background loads on a small thread pool."""
+
+    def __init__(self, max_workers: int = 2, color: str = ""):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # ANSI color of the spinner line
+        self.color = color
+        # set by `shutdown`; long loads poll it to stop early
+        self.stopping = threading.Event()
+
+    def submit(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Start `func(*args, **kwargs)` in the background under `name` (once)."""
+        with self._lock:
+            fut = self._futures.get(name)
+            if fut is None:
+                fut = self._executor.submit(func, *args, **kwargs)
+                self._futures[name] = fut
+            return fut
+
+    def ready(self, name: str) -> bool:
+        fut = self._futures.get(name)
+        return fut is not None and fut.done()
+
+    def get(self, name: str, label: Optional[str] = None, stream: TextIO = None, interval: float = 0.1) -> Any:
+        """Result of the load `name`, waiting with a spinner if it is not done."""
+        fut = self._futures[name]
+        if fut.done():
+            return fut.result()
+        stream = stream or sys.stdout
+        tty = getattr(stream, "isatty", lambda: False)()
+        text = f"Cargando {label or name}..."
+        i = 0
+        try:
+            while True:
+                try:
+                    return fut.result(timeout=interval)
+                except FutureTimeout:
+                    if tty:
+                        line = f"{SPINNER[i % len(SPINNER)]} {text}"
+                        stream.write(f"\r{self.color}{line}\033[0m" if self.color else f"\r{line}")
+                        stream.flush()
+                    i += 1
+        finally:
+            if tty and i:
+                stream.write("\r" + " " * (len(text) + 2) + "\r")
+                stream.flush()
+
+    def shutdown(self) -> None:
+        """Drop pending loads and ask running ones to stop (`stopping`)."""
+        self.stopping.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,179 @@
+"""Renderizado headless de reportes en paralelo.
+
+Este módulo sólo se ocupa de dibujar: recibe datos ya agregados (pocas filas
+por gráfico) y los convierte en PNG usando la API orientada a objetos de
+matplotlib (`Figure` + `FigureCanvasAgg`), sin tocar el estado global de
+`pyplot`. Así cada figura es independiente y se puede renderizar en un
+proceso distinto.
+
+Piezas principales:
+- ReportSpec: describe un reporte (tipo × segmento × región × periodo).
+- RenderJob: datos agregados + ruta de salida listos para dibujar.
+- render_reports(jobs, max_workers=None): dibuja los trabajos en un pool de
+  procesos y escribe cada archivo de forma atómica.
+
+La agregación (RFM, top productos, filtros por región/periodo) vive en
+`mi_analisis.py`; aquí no se calcula nada pesado. matplotlib y seaborn se
+importan al dibujar, no al importar el módulo.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+
+REPORT_KINDS = ("rfm_segments", "top_products")
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """Un reporte del pack: tipo de gráfico y filtros opcionales.
+
+    `segment` filtra por segmento RFM, `region` por `ciudad` del cliente y
+    `period` por fecha de venta (cualquier cadena que entienda `pd.Period`,
+    por ejemplo "2024", "2024-Q1" o "2024-03").
+    """
+
+    kind: str
+    segment: Optional[str] = None
+    region: Optional[str] = None
+    period: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.kind not in REPORT_KINDS:
+            raise ValueError(f"Tipo de reporte desconocido: {self.kind!r} (válidos: {REPORT_KINDS})")
+
+    def filename(self) -> str:
+        """Nombre de archivo estable para el reporte, p. ej. `top_products__region-Cordoba.png`."""
+        parts = [self.kind]
+        for key in ("segment", "region", "period"):
+            value = getattr(self, key)
+            if value is not None:
+                parts.append(f"{key}-{_slug(value)}")
+        return "__".join(parts) + ".png"
+
+    def describe(self) -> str:
+        """Sufijo legible para los títulos de los gráficos."""
+        filters = [str(v) for v in (self.segment, self.region, self.period) if v is not None]
+        return f" ({', '.join(filters)})" if filters else ""
+
+
+@dataclass
+class RenderJob:
+    """Trabajo de dibujo: datos ya agregados y ruta de destino."""
+
+    kind: str
+    data: pd.DataFrame
+    out_path: Path
+    title: str
+
+
+def expand_specs(
+    kinds: Iterable[str] = REPORT_KINDS,
+    segments: Sequence[Optional[str]] = (None,),
+    regions: Sequence[Optional[str]] = (None,),
+    periods: Sequence[Optional[str]] = (None,),
+) -> List[ReportSpec]:
+    """Producto cartesiano tipo × segmento × región × periodo."""
+    return [
+        ReportSpec(kind=k, segment=s, region=r, period=p)
+        for k, s, r, p in itertools.product(kinds, segments, regions, periods)
+    ]
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "-", str(value)).strip("-") or "x"
+
+
+def _draw_segment_counts(ax, data: pd.DataFrame) -> None:
+    import seaborn as sns
+
+    sns.barplot(data=data, y="segment", x="count", ax=ax)
+    ax.set_xlabel("count")
+
+
+def _draw_top_products(ax, data: pd.DataFrame) -> None:
+    import seaborn as sns
+
+    sns.barplot(data=data, y="product", x="revenue", hue="product", palette="viridis", legend=False, ax=ax)
+
+
+_DRAWERS: Dict[str, Callable] = {
+    "rfm_segments": _draw_segment_counts,
+    "top_products": _draw_top_products,
+}
+
+_FIGSIZES = {
+    "rfm_segments": (8, 5),
+    "top_products": (10, 6),
+}
+
+
+def atomic_savefig(fig: Figure, out_path: Path) -> None:
+    """Guardar la figura en un temporal del mismo directorio y renombrar.
+
+    `os.replace` es atómico dentro de un mismo sistema de archivos, así que
+    un lector nunca ve un PNG a medio escribir.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{out_path.name}.", suffix=".tmp", dir=out_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fig.savefig(fh, format=out_path.suffix.lstrip(".") or "png")
+        os.replace(tmp, out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def render_job(job: RenderJob) -> Path:
+    """Dibujar un trabajo con una figura propia (sin `pyplot`)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=_FIGSIZES.get(job.kind, (8, 5)))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    _DRAWERS[job.kind](ax, job.data)
+    ax.set_title(job.title)
+    fig.tight_layout()
+    atomic_savefig(fig, job.out_path)
+    return Path(job.out_path)
+
+
+def _init_worker() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+
+
+def render_reports(jobs: Sequence[RenderJob], max_workers: Optional[int] = None) -> List[Path]:
+    """Renderizar varios trabajos, en paralelo cuando hay más de uno.
+
+    Devuelve las rutas escritas en el mismo orden que `jobs`. Con
+    `max_workers=1` (o un único trabajo) se dibuja en el proceso actual.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+    if max_workers <= 1 or len(jobs) == 1:
+        return [render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        return list(pool.map(render_job, jobs))
@@ -0,0 +1,98 @@
+"""Reservoir samples of tables too big to load, in one streaming pass.
+
+Every row gets a pseudo-random key computed from its global row number
+and the seed (splitmix64), and the sample is the `n` rows with the
+smallest keys (bottom-k). The result is uniform and does not depend on the
+chunk size, and the same seed always gives the same rows. With `stratify_by`, each
+value of that column keeps its own `n` smallest keys. Memory is bounded by
+the sample plus one chunk.
+
+    sample = reservoir_sample(chunks, 10_000, seed=1)
+    sample.attrs["sample_fraction"]     # rows kept / rows seen, to scale sums
+    sample = reservoir_sample(chunks, 500, stratify_by="medio_pago")
+    sample.attrs["sample_fraction"]     # {"efectivo": 0.01, "tarjeta": 0.2, ...}
+
+`data.load_csv(path, sample=N, stratify_by=..., seed=...)` is the usual entry
+point.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_KEY = "__sample_key"
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def row_keys(start: int, n: int, seed: int = 0) -> np.ndarray:
+    """Uniform [0, 1) keys of rows `start .. start + n - 1` for `seed`."""
+    base = _mix(np.array([seed], dtype=np.uint64))[0]
+    with np.errstate(over="ignore"):
+        x = _mix((np.arange(start, start + n, dtype=np.uint64) + np.uint64(1)) * _GOLDEN + base)
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def reservoir_sample(
+    chunks: Iterable[pd.DataFrame],
+    n: int,
+    stratify_by: Optional[str] = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Bottom-k sample of `n` rows (per stratum with `stratify_by`) from `chunks`.
+
+    The index of the result is each row's position in the concatenated
+    input, in ascending order. `attrs["sample_population"]` holds the rows
+    seen and `attrs["sample_fraction"]` the share kept (dicts by stratum
+    when stratified).
+    """
+    if n < 1:
+        raise ValueError("sample must be a positive number of rows")
+    sample: Optional[pd.DataFrame] = None
+    seen = 0
+    population: Dict[Any, int] = {}
+    for chunk in chunks:
+        if stratify_by is not None and stratify_by not in chunk.columns:
+            raise KeyError(f"stratify_by column not found: {stratify_by}")
+        keys = row_keys(seen, len(chunk), seed)
+        rows = np.arange(seen, seen + len(chunk))
+        seen += len(chunk)
+        if stratify_by is None:
+            if sample is not None and len(sample) >= n:
+                # only rows below the current k-th key can enter
+                keep = np.flatnonzero(keys < sample[_KEY].max())
+                chunk, keys, rows = chunk.iloc[keep], keys[keep], rows[keep]
+                if not len(chunk):
+                    continue
+            chunk = chunk.set_axis(rows).assign(**{_KEY: keys})
+            combined = chunk if sample is None else pd.concat([sample, chunk])
+            sample = combined.nsmallest(n, _KEY)
+        else:
+            for value, count in chunk[stratify_by].value_counts(dropna=False).items():
+                population[value] = population.get(value, 0) + int(count)
+            chunk = chunk.set_axis(rows).assign(**{_KEY: keys})
+            combined = chunk if sample is None else pd.concat([sample, chunk])
+            sample = combined.sort_values(_KEY).groupby(stratify_by, sort=False, dropna=False).head(n)
+
+    if sample is None:
+        raise ValueError("no rows to sample")
+    out = sample.drop(columns=_KEY).sort_index()
+    if stratify_by is None:
+        out.attrs["sample_population"] = seen
+        out.attrs["sample_fraction"] = len(out) / seen if seen else 0.0
+    else:
+        kept = out[stratify_by].value_counts(dropna=False)
+        out.attrs["sample_population"] = population
+        out.attrs["sample_fraction"] = {value: int(kept.get(value, 0)) / total for value, total in population.items()}
+    return out
@@ -0,0 +1,262 @@
+"""Tables in shared memory for multi-process analysis.
+
+`publish(df)` copies a DataFrame (e.g. from `data.load_csv`) once into a
+single `multiprocessing.shared_memory` segment. Its `spec` is a small
+picklable description of the layout (column names, dtypes, offsets). A
+worker calls `attach(spec)` and gets a read-only DataFrame whose columns
+are NumPy views on that segment: nothing is pickled or copied per worker,
+so a worker's overhead does not grow with the table.
+
+- numeric, bool, datetime64 and timedelta64 columns are stored as they are;
+- any other column (text, nullable, mixed) is stored as categorical codes
+  plus its distinct values, and comes back as a `category` column.
+
+The index is not shared; attached frames have a RangeIndex.
+
+With `partition_by` the rows are grouped by a hash of that column as they
+are published. Each key partition is then a contiguous slice, and all the
+rows of a key are in the same partition:
+
+    with publish(ventas, partition_by="id_cliente") as table:
+        parts = map_partitions(table, partial_rfm, max_workers=4)
+        totals = groupby_agg(table, "id_cliente", total=("importe", "sum"))
+
+`map_partitions` runs `func(part)` for each partition in a process pool
+whose workers attach to the segment once. Without `partition_by` the
+partitions are ranges of rows.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ALIGN = 64
+# partitions per CPU, so an uneven partition does not leave workers idle
+PARTITIONS_PER_CPU = 4
+
+# segments attached by this process; the views handed out keep pointing into them
+_segments: Dict[str, shared_memory.SharedMemory] = {}
+_worker_frame: Optional[pd.DataFrame] = None
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """One column: its buffer, plus pickled categories for coded columns."""
+
+    name: Any
+    dtype: str
+    offset: int
+    categories: Optional[Tuple[int, int]] = None  # (offset, nbytes)
+    ordered: bool = False
+
+
+@dataclass(frozen=True)
+class FrameSpec:
+    """Picklable layout of a published table; `attach` rebuilds the frame from it."""
+
+    name: str
+    rows: int
+    columns: Tuple[ColumnSpec, ...]
+    partition_by: Any = None
+    bounds: Tuple[int, ...] = ()
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def default_partitions() -> int:
+    return PARTITIONS_PER_CPU * (os.cpu_count() or 1)
+
+
+def _encode(s: pd.Series) -> Tuple[np.ndarray, Optional[bytes], bool]:
+    """The array to store for `s`, with pickled categories if it is coded."""
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufmM":
+        return s.to_numpy(), None, False
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cat = s.array
+    else:
+        codes, uniques = pd.factorize(s)
+        # from_codes narrows the codes to the smallest integer type
+        cat = pd.Categorical.from_codes(codes, categories=pd.Index(uniques), validate=False)
+    return cat.codes, pickle.dumps(cat.categories, protocol=pickle.HIGHEST_PROTOCOL), bool(cat.ordered)
+
+
+def _key_order(s: pd.Series, partitions: int) -> Tuple[np.ndarray, Tuple[int, ...]]:
+    """Row order grouping `s` by hash partition, and the partition bounds."""
+    ids = (pd.util.hash_pandas_object(s, index=False).to_numpy() % np.uint64(partitions)).astype(np.intp)
+    order = np.argsort(ids, kind="stable")
+    counts = np.bincount(ids, minlength=partitions)
+    return order, tuple(int(b) for b in np.concatenate([[0], np.cumsum(counts)]))
+
+
+def _build(buf: memoryview, spec: FrameSpec) -> pd.DataFrame:
+    columns = {}
+    for col in spec.columns:
+        arr = np.ndarray((spec.rows,), dtype=np.dtype(col.dtype), buffer=buf, offset=col.offset)
+        arr.flags.writeable = False
+        if col.categories is not None:
+            start, size = col.categories
+            categories = pickle.loads(buf[start:start + size])
+            arr = pd.Categorical.from_codes(arr, dtype=pd.CategoricalDtype(categories, col.ordered), validate=False)
+        columns[col.name] = arr
+    return pd.DataFrame(columns, copy=False)
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    if name not in _segments:
+        try:
+            _segments[name] = shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+        except TypeError:  # Python < 3.13
+            _segments[name] = shared_memory.SharedMemory(name=name)
+    return _segments[name]
+
+
+class SharedFrame:
+    """A published table. The owner `close()`s it (or uses `with`) to free the segment."""
+
+    def __init__(self, segment: shared_memory.SharedMemory, spec: FrameSpec):
+        self._segment: Optional[shared_memory.SharedMemory] = segment
+        self.spec = spec
+
+    def frame(self) -> pd.DataFrame:
+        """The table as views on the segment, in this process."""
+        if self._segment is None:
+            raise ValueError("shared table is closed")
+        return _build(self._segment.buf, self.spec)
+
+    def close(self) -> None:
+        if self._segment is None:
+            return
+        segment, self._segment = self._segment, None
+        try:
+            segment.close()
+        except BufferError:
+            pass  # frames from `frame()` are still alive; the mapping goes with them
+        segment.unlink()
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def publish(df: pd.DataFrame, partition_by: Any = None, partitions: Optional[int] = None) -> SharedFrame:
+    """Copy `df` into a new shared-memory segment.
+
+    With `partition_by`, rows are reordered into `partitions` hash
+    partitions of that column (default `default_partitions()`).
+    """
+    if df.columns.has_duplicates:
+        raise ValueError("cannot publish a table with duplicate column names")
+    order, bounds = None, ()
+    if partition_by is not None:
+        if partition_by not in df.columns:
+            raise KeyError(f"partition_by column not found: {partition_by}")
+        order, bounds = _key_order(df[partition_by], partitions or default_partitions())
+
+    encoded = [(name, *_encode(df[name])) for name in df.columns]
+    size = 0
+    layout = []
+    for name, arr, categories, ordered in encoded:
+        offset, size = size, size + _aligned(arr.nbytes)
+        cat_at = None
+        if categories is not None:
+            cat_at, size = (size, len(categories)), size + _aligned(len(categories))
+        layout.append(ColumnSpec(name, arr.dtype.str, offset, cat_at, ordered))
+
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        for col, (_, arr, categories, _) in zip(layout, encoded):
+            out = np.ndarray(arr.shape, dtype=arr.dtype, buffer=segment.buf, offset=col.offset)
+            if order is None:
+                out[:] = arr
+            else:
+                np.take(arr, order, out=out)
+            if categories is not None and col.categories is not None:
+                start, n = col.categories
+                segment.buf[start:start + n] = categories
+            del out
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    spec = FrameSpec(segment.name, len(df), tuple(layout), partition_by, bounds)
+    return SharedFrame(segment, spec)
+
+
+def attach(spec: FrameSpec) -> pd.DataFrame:
+    """The published table as read-only views, without copying it."""
+    return _build(_open(spec.name).buf, spec)
+
+
+def partition_bounds(spec: FrameSpec, partitions: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Non-empty (start, stop) row ranges: key partitions, or `partitions` row ranges."""
+    if spec.bounds:
+        if partitions is not None:
+            raise ValueError(f"table is partitioned by {spec.partition_by!r} at publish time")
+        bounds: Sequence[int] = spec.bounds
+    else:
+        bounds = np.linspace(0, spec.rows, max(1, partitions or default_partitions()) + 1).astype(int).tolist()
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _init_worker(spec: FrameSpec) -> None:
+    global _worker_frame
+    _worker_frame = attach(spec)
+
+
+def _run_partition(func: Callable[[pd.DataFrame], Any], start: int, stop: int) -> Any:
+    assert _worker_frame is not None
+    return func(_worker_frame.iloc[start:stop])
+
+
+def map_partitions(
+    table: SharedFrame,
+    func: Callable[[pd.DataFrame], Any],
+    max_workers: Optional[int] = None,
+    partitions: Optional[int] = None,
+) -> List[Any]:
+    """`func(part)` for every partition of `table`, in partition order.
+
+    `func` must be picklable (a module-level function or a `partial` of
+    one). With `max_workers=1` (or a single partition) it runs in the
+    current process.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = partition_bounds(table.spec, partitions)
+    if max_workers is None:
+        max_workers = min(len(ranges), os.cpu_count() or 1)
+    if max_workers <= 1 or len(ranges) <= 1:
+        frame = table.frame()
+        return [func(frame.iloc[a:b]) for a, b in ranges]
+    starts, stops = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(table.spec,)) as pool:
+        return list(pool.map(_run_partition, [func] * len(ranges), starts, stops))
+
+
+def _groupby_part(part: pd.DataFrame, by: Any, named: Dict[str, Any]) -> pd.DataFrame:
+    return part.groupby(by, observed=True, sort=False).agg(**named)
+
+
+def groupby_agg(table: SharedFrame, by: Any, max_workers: Optional[int] = None, **named: Any) -> pd.DataFrame:
+    """`df.groupby(by).agg(**named)`, one key partition per task.
+
+    `table` must be published with `partition_by=by`, so that every group
+    is whole within one partition and any aggregation is exact.
+    """
+    if table.spec.partition_by != by:
+        raise ValueError(f"publish the table with partition_by={by!r} to group by it")
+    parts = map_partitions(table, partial(_groupby_part, by=by, named=named), max_workers)
+    if not parts:
+        return table.frame().groupby(by, observed=True).agg(**named)
+    return pd.concat(parts).sort_index()
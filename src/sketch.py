@@ -0,0 +1,277 @@
+"""Small mergeable summaries for streaming statistics.
+
+Classes:
+- QuantileSketch: approximate quantiles in bounded memory (KLL-style
+  compactor). Sketches built on different chunks can be merged.
+- BoxStatsAccumulator: one-pass box-plot statistics (quartiles, whiskers and
+  a capped set of outliers) built on top of QuantileSketch.
+- DistinctSketch: approximate distinct count (HyperLogLog), exact while the
+  column has few distinct values.
+
+All accept NumPy arrays chunk by chunk, so a column never has to be sorted
+or held in memory as a whole.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Approximate quantile sketch with a fixed number of items per level.
+
+    Values enter level 0. When a level holds more than `k` items it is
+    sorted and every other item (random offset) is promoted to the next
+    level, where each item counts twice as much. Memory is
+    O(k * log(n / k)); the rank error is a small fraction of a percent for
+    the default `k`, which is plenty for plots and summaries.
+    """
+
+    def __init__(self, k: int = 2048, seed: Optional[int] = 0):
+        if k < 2:
+            raise ValueError("k must be >= 2")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values) -> "QuantileSketch":
+        """Add a chunk of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold `other` into this sketch (in place) and return self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for i, buf in enumerate(other.levels):
+            self.levels[i] = np.concatenate([self.levels[i], buf])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            buf = self.levels[level]
+            if len(buf) > self.k:
+                buf = np.sort(buf)
+                # an odd leftover stays at this level so no weight is lost
+                keep = buf[-1:] if len(buf) % 2 else buf[:0]
+                even = buf[: len(buf) - len(keep)]
+                promoted = even[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(b), 2.0 ** i) for i, b in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Return the approximate quantile(s) `q` (scalar or sequence in [0, 1])."""
+        if self.n == 0:
+            raise ValueError("quantile of an empty sketch")
+        values, cum = self._weighted()
+        qs = np.atleast_1d(np.asarray(q, dtype="float64"))
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        out = values[np.clip(idx, 0, len(values) - 1)]
+        out = np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, out))
+        return float(out[0]) if np.ndim(q) == 0 else out
+
+    def retained(self) -> np.ndarray:
+        """Sorted values currently held by the sketch."""
+        return np.sort(np.concatenate(self.levels))
+
+
+class DistinctSketch:
+    """HyperLogLog distinct-count estimate over 64-bit value hashes.
+
+    Values are hashed with `pandas.util.hash_pandas_object`; the first `p`
+    bits pick one of 2**p registers and each register keeps the longest run
+    of leading zeros seen in the remaining bits. The standard error is
+    about 1.04 / sqrt(2**p) (1.6% for the default p=12, 4 KB of state).
+    Until `exact_limit` distinct hashes have been seen they are also kept in
+    a set, so small columns get an exact count.
+    """
+
+    def __init__(self, p: int = 12, exact_limit: int = 1024):
+        if not 4 <= p <= 18:
+            raise ValueError("p must be in [4, 18]")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype="uint8")
+        self.exact_limit = exact_limit
+        self._exact: Optional[set] = set()
+
+    def update(self, values) -> "DistinctSketch":
+        """Add a chunk of values (NaNs/None are ignored)."""
+        import pandas as pd
+
+        s = pd.Series(values)
+        s = s[s.notna()]
+        if len(s):
+            self.update_hashes(pd.util.hash_pandas_object(s, index=False).to_numpy())
+        return self
+
+    def update_hashes(self, hashes: np.ndarray) -> "DistinctSketch":
+        hashes = np.asarray(hashes, dtype="uint64")
+        if self._exact is not None:
+            self._exact.update(np.unique(hashes).tolist())
+            if len(self._exact) > self.exact_limit:
+                self._exact = None
+        rest_bits = 64 - self.p
+        idx = (hashes >> np.uint64(rest_bits)).astype("intp")
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # rank = position of the first 1 bit in the remaining bits (1-based)
+        _, exp = np.frexp(rest.astype("float64"))
+        rank = np.where(rest == 0, rest_bits + 1, rest_bits - exp + 1).astype("uint8")
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other: "DistinctSketch") -> "DistinctSketch":
+        """Fold `other` (same `p`) into this sketch and return self."""
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches with different p")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self._exact is not None and other._exact is not None:
+            self._exact |= other._exact
+            if len(self._exact) > self.exact_limit:
+                self._exact = None
+        else:
+            self._exact = None
+        return self
+
+    def estimate(self) -> int:
+        if self._exact is not None:
+            return len(self._exact)
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype("int64"))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # small-range correction: linear counting
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class BoxStatsAccumulator:
+    """Streaming box-plot statistics for one numeric series.
+
+    Quartiles come from a QuantileSketch. The `max_fliers` smallest and
+    largest values are kept exactly, so outliers are the extreme tails; when
+    more points than that fall outside the whiskers the set is capped to
+    those tails and then subsampled to `max_fliers` for drawing.
+    """
+
+    def __init__(self, max_fliers: int = 1000, k: int = 2048, seed: Optional[int] = 0):
+        self.max_fliers = max_fliers
+        self.sketch = QuantileSketch(k=k, seed=seed)
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+        self._seed = seed
+
+    @property
+    def n(self) -> int:
+        return self.sketch.n
+
+    def update(self, values) -> "BoxStatsAccumulator":
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.sketch.update(values)
+        m = self.max_fliers
+        low = np.concatenate([self.low, values])
+        high = np.concatenate([self.high, values])
+        self.low = np.partition(low, m - 1)[:m] if len(low) > m else low
+        self.high = np.partition(high, len(high) - m)[-m:] if len(high) > m else high
+        return self
+
+    def merge(self, other: "BoxStatsAccumulator") -> "BoxStatsAccumulator":
+        self.sketch.merge(other.sketch)
+        m = self.max_fliers
+        low = np.concatenate([self.low, other.low])
+        high = np.concatenate([self.high, other.high])
+        self.low = np.partition(low, m - 1)[:m] if len(low) > m else low
+        self.high = np.partition(high, len(high) - m)[-m:] if len(high) > m else high
+        return self
+
+    def stats(self, whis: float = 1.5, label: Any = None) -> Dict[str, Any]:
+        """Return a dict in the format expected by `Axes.bxp`."""
+        q1, med, q3 = self.sketch.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        lo_bound, hi_bound = q1 - whis * iqr, q3 + whis * iqr
+
+        # exact whisker end when it lies in the kept tails, else from the sketch
+        retained = self.sketch.retained()
+        inside_hi = self.high[self.high <= hi_bound]
+        inside_lo = self.low[self.low >= lo_bound]
+        whishi = inside_hi.max() if len(inside_hi) else retained[retained <= hi_bound].max(initial=q3)
+        whislo = inside_lo.min() if len(inside_lo) else retained[retained >= lo_bound].min(initial=q1)
+
+        fliers = np.concatenate([self.low[self.low < lo_bound], self.high[self.high > hi_bound]])
+        if len(fliers) > self.max_fliers:
+            rng = np.random.default_rng(self._seed)
+            fliers = rng.choice(fliers, self.max_fliers, replace=False)
+        return {
+            "label": label,
+            "med": med,
+            "q1": q1,
+            "q3": q3,
+            "whislo": float(whislo),
+            "whishi": float(whishi),
+            "fliers": np.sort(fliers),
+            "n": self.n,
+        }
+
+
+def box_stats_by_group(
+    chunks,
+    column: str,
+    by: Optional[str] = None,
+    whis: float = 1.5,
+    max_fliers: int = 1000,
+    order: Optional[Sequence[Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Compute `Axes.bxp` stats for `column` over DataFrame `chunks`.
+
+    With `by`, one accumulator per group is updated from each chunk, so the
+    groups are never materialized as separate frames. Groups are returned in
+    `order` if given, else in order of first appearance.
+    """
+    import pandas as pd
+
+    accs: Dict[Any, BoxStatsAccumulator] = {}
+    for chunk in chunks:
+        values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        if by is None:
+            accs.setdefault(None, BoxStatsAccumulator(max_fliers=max_fliers)).update(values)
+            continue
+        codes, uniques = pd.factorize(chunk[by])
+        valid = codes >= 0
+        codes, values = codes[valid], values[valid]
+        sort = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[sort], np.arange(len(uniques) + 1))
+        for i, key in enumerate(uniques):
+            part = values[sort[bounds[i]:bounds[i + 1]]]
+            accs.setdefault(key, BoxStatsAccumulator(max_fliers=max_fliers)).update(part)
+
+    keys = [k for k in order if k in accs] if order is not None else list(accs)
+    return [accs[k].stats(whis=whis, label=k) for k in keys if accs[k].n]
@@ -0,0 +1,134 @@
+"""Deterministic synthetic data following the project's schema.
+
+Generates the four tables described in `docs.py` (`clientes`, `productos`,
+`ventas`, `detalle_ventas`) at any scale, with valid foreign keys and a
+realistic skew: a few customers buy much more often than the rest and a few
+products sell much more than the rest (Zipf-like popularity).
+
+Functions:
+- generate_dataset(n_ventas, ...) -> dict of DataFrames
+- write_dataset(out_dir, n_ventas, ...) -> dict of written paths
+
+Usage:
+    python src/synthetic.py 100000 /tmp/synthetic
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+CIUDADES = ["Córdoba", "Rosario", "Mendoza", "Buenos Aires", "La Plata", "Salta", "Tucumán", "Neuquén"]
+CATEGORIAS = ["Alimentos", "Limpieza", "Bebidas", "Electrónica", "Hogar", "Ropa"]
+MEDIOS_PAGO = ["tarjeta", "qr", "transferencia", "efectivo"]
+MEDIOS_PAGO_P = [0.4, 0.25, 0.2, 0.15]
+TABLES = ("clientes", "productos", "ventas", "detalle_ventas")
+
+
+def _zipf_choice(rng: np.random.Generator, n_items: int, size: int, a: float) -> np.ndarray:
+    """Draw `size` indices in [0, n_items) with P(i) proportional to 1 / (i + 1) ** a."""
+    weights = 1.0 / np.arange(1, n_items + 1, dtype="float64") ** a
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    idx = np.searchsorted(cdf, rng.random(size), side="right")
+    # shuffle the popularity ranks so id 1 is not always the top customer
+    return rng.permutation(n_items)[np.minimum(idx, n_items - 1)]
+
+
+def generate_dataset(
+    n_ventas: int,
+    n_clientes: Optional[int] = None,
+    n_productos: Optional[int] = None,
+    items_per_sale: float = 2.85,
+    skew: float = 0.8,
+    start: str = "2024-01-01",
+    days: int = 365,
+    seed: int = 0,
+) -> Dict[str, pd.DataFrame]:
+    """Return the four tables for `n_ventas` sales.
+
+    Defaults keep the proportions of the reference dataset (100 clients and
+    100 products for 120 sales, 2.85 detail rows per sale). The same
+    arguments always produce the same data.
+    """
+    rng = np.random.default_rng(seed)
+    n_clientes = n_clientes or max(4, int(n_ventas * 100 / 120))
+    n_productos = n_productos or max(4, min(int(n_ventas * 100 / 120), 100_000))
+    start_ts = pd.Timestamp(start)
+
+    cli_ids = np.arange(1, n_clientes + 1)
+    cli_names = pd.Series(cli_ids).map("Cliente {}".format)
+    clientes = pd.DataFrame(
+        {
+            "id_cliente": cli_ids,
+            "nombre_cliente": cli_names,
+            "email": pd.Series(cli_ids).map("cliente{}@mail.com".format),
+            "ciudad": np.asarray(CIUDADES, dtype=object)[rng.integers(0, len(CIUDADES), n_clientes)],
+            "fecha_alta": (start_ts - pd.to_timedelta(rng.integers(0, 3 * days, n_clientes), unit="D")).strftime("%Y-%m-%d"),
+        }
+    )
+
+    prod_ids = np.arange(1, n_productos + 1)
+    precios = np.round(rng.lognormal(np.log(2500), 0.8, n_productos), 2)
+    productos = pd.DataFrame(
+        {
+            "id_producto": prod_ids,
+            "nombre_producto": pd.Series(prod_ids).map("Producto {}".format),
+            "categoria": np.asarray(CATEGORIAS, dtype=object)[rng.integers(0, len(CATEGORIAS), n_productos)],
+            "precio_unitario": precios,
+        }
+    )
+
+    venta_ids = np.arange(1, n_ventas + 1)
+    cust_idx = _zipf_choice(rng, n_clientes, n_ventas, skew)
+    fechas = start_ts + pd.to_timedelta(np.sort(rng.integers(0, days, n_ventas)), unit="D")
+    ventas = pd.DataFrame(
+        {
+            "id_venta": venta_ids,
+            "fecha": fechas.strftime("%Y-%m-%d"),
+            "id_cliente": cli_ids[cust_idx],
+            "nombre_cliente": cli_names.to_numpy()[cust_idx],
+            "email": clientes["email"].to_numpy()[cust_idx],
+            "medio_pago": rng.choice(np.asarray(MEDIOS_PAGO, dtype=object), n_ventas, p=MEDIOS_PAGO_P),
+        }
+    )
+
+    items = 1 + rng.poisson(max(items_per_sale - 1, 0), n_ventas)
+    n_detalle = int(items.sum())
+    prod_idx = _zipf_choice(rng, n_productos, n_detalle, skew)
+    cantidad = 1 + rng.poisson(1.0, n_detalle)
+    precio = precios[prod_idx]
+    detalle = pd.DataFrame(
+        {
+            "id_venta": np.repeat(venta_ids, items),
+            "id_producto": prod_ids[prod_idx],
+            "nombre_producto": productos["nombre_producto"].to_numpy()[prod_idx],
+            "cantidad": cantidad,
+            "precio_unitario": precio,
+            "importe": np.round(cantidad * precio, 2),
+        }
+    )
+    return {"clientes": clientes, "productos": productos, "ventas": ventas, "detalle_ventas": detalle}
+
+
+def write_dataset(out_dir: Path, n_ventas: int, **kwargs) -> Dict[str, Path]:
+    """Generate the dataset and write one CSV per table into `out_dir`."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: Dict[str, Path] = {}
+    for name, df in generate_dataset(n_ventas, **kwargs).items():
+        paths[name] = out_dir / f"{name}.csv"
+        df.to_csv(paths[name], index=False)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python src/synthetic.py N_VENTAS OUT_DIR")
+        raise SystemExit(2)
+    for name, path in write_dataset(Path(sys.argv[2]), int(float(sys.argv[1]))).items():
+        print(f"{name}: {path}")
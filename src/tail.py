@@ -0,0 +1,355 @@
+"""Incremental reads of CSV files that are only ever appended to.
+
+A `Tailer` remembers the following for each file:
+- the byte offset up to which it has parsed;
+- checksums of the header line and of the bytes just before that offset;
+- the file's identity (device, inode) and its dialect.
+
+`poll` parses only the complete lines appended since the last poll and
+passes them to the file's consumers as a `Delta`. If the file was rotated
+(new inode), truncated (now shorter than the offset) or rewritten (a
+checksum differs), the consumers are reset and the whole file is read
+again.
+
+    tailer = Tailer.open(".cache/tail/ventas.pkl")   # saved state, or a new tailer
+    tailer.follow("db/ventas.csv", Profile(), Collect(subset=["id_venta"]))
+    deltas = tailer.poll()   # {path: Delta}; only new rows after the first call
+    tailer.save()            # offsets and consumer state, saved together
+
+Consumers are objects with `update(df)` and `reset()`. This module has
+`Profile` (the inventory column statistics) and `Collect` (the
+consolidated table). `mi_analisis.RFMState` keeps RFM up to date.
+
+A line is complete once its newline is written; quoted fields with
+embedded newlines are not supported. Compressed files cannot be appended
+to in place and are always read in full.
+
+Usage:
+    python src/tail.py db/ventas.csv [--state PATH]   # new rows since last run
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+try:
+    from src import compression, data, dedupe, inventory, numparse
+except Exception:
+    import compression  # type: ignore
+    import data  # type: ignore
+    import dedupe  # type: ignore
+    import inventory  # type: ignore
+    import numparse  # type: ignore
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STATE = ROOT / ".cache" / "tail" / "state.pkl"
+
+# bytes before the offset that must be unchanged for an append to be trusted
+CHECK_BYTES = 4096
+BLOCK = 1 << 16
+
+
+@dataclass
+class FileState:
+    """What a `Tailer` knows about one file after the last poll."""
+
+    offset: int = 0
+    rows: int = 0
+    header_end: int = 0
+    header_sha: str = ""
+    tail_sha: str = ""
+    identity: tuple = ()
+    encoding: str = "utf-8"
+    sep: str = ","
+    columns: List[str] = field(default_factory=list)
+    # number formats detected on the full read, and the dtypes they gave
+    formats: Dict[str, str] = field(default_factory=dict)
+    dtypes: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Delta:
+    """Rows read by one poll. With `full` the consumers were reset first.
+
+    `reason` is "new", "appended", "rotated", "truncated", "rewritten" or
+    "compressed". `start`/`end` are byte offsets; the index of `frame`
+    continues the row numbers of earlier deltas.
+    """
+
+    path: Path
+    frame: pd.DataFrame
+    full: bool
+    reason: str
+    start: int
+    end: int
+
+    @property
+    def rows(self) -> int:
+        return len(self.frame)
+
+
+class _Window(io.RawIOBase):
+    """Raw stream over bytes [start, end) of a file."""
+
+    def __init__(self, path: Path, start: int, end: int):
+        self._fh = open(path, "rb", buffering=0)
+        self._fh.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        if self._left <= 0:
+            return 0
+        view = memoryview(buf)[: min(len(buf), self._left)]
+        n = self._fh.readinto(view) or 0
+        self._left -= n
+        return n
+
+    def close(self) -> None:
+        self._fh.close()
+        super().close()
+
+
+def _sha(path: Path, start: int, end: int) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        h.update(fh.read(max(0, end - start)))
+    return h.hexdigest()
+
+
+def _header_end(path: Path) -> int:
+    """Offset just past the first newline, or 0 if there is none yet."""
+    with open(path, "rb") as fh:
+        pos = 0
+        while True:
+            block = fh.read(BLOCK)
+            if not block:
+                return 0
+            i = block.find(b"\n")
+            if i >= 0:
+                return pos + i + 1
+            pos += len(block)
+
+
+def _complete_end(path: Path, start: int, size: int) -> int:
+    """Offset just past the last newline in [start, size), or `start` if none."""
+    with open(path, "rb") as fh:
+        end = size
+        while end > start:
+            begin = max(start, end - BLOCK)
+            fh.seek(begin)
+            i = fh.read(end - begin).rfind(b"\n")
+            if i >= 0:
+                return begin + i + 1
+            end = begin
+    return start
+
+
+def _identity(st: os.stat_result) -> tuple:
+    return (st.st_dev, st.st_ino)
+
+
+def _parse(path: Path, state: FileState, start: int, end: int, header: bool) -> pd.DataFrame:
+    """Rows in [start, end). With `header` the number formats are detected and
+    stored in `state`; appended rows are parsed with the stored formats, so a
+    column keeps its dtype from one poll to the next."""
+    kwargs: Dict[str, Any] = {"encoding": state.encoding, "sep": state.sep}
+    if not header:
+        kwargs.update(header=None, names=state.columns, dtype={c: str for c in state.formats})
+    if end <= start:
+        return pd.DataFrame(columns=state.columns)
+    try:
+        with io.BufferedReader(_Window(path, start, end)) as fh:
+            df = pd.read_csv(fh, **kwargs)
+    except Exception:
+        with io.BufferedReader(_Window(path, start, end)) as fh:
+            df = pd.read_csv(fh, engine="python", **kwargs)
+    if header:
+        numparse.convert_frame(df)
+        state.formats = dict(df.attrs.get("number_formats", {}))
+        state.dtypes = {c: str(df[c].dtype) for c in state.formats}
+        return df
+    for col, fmt in state.formats.items():
+        values = numparse.parse_numbers(df[col], fmt)[0]
+        if state.dtypes[col] == "float64":
+            values = values.astype("float64")
+        df[col] = values
+    return df
+
+
+class Tailer:
+    """Follows appended CSV files and feeds their new rows to consumers."""
+
+    def __init__(self, state_path: Path = DEFAULT_STATE):
+        self.state_path = Path(state_path)
+        self.files: Dict[str, FileState] = {}
+        self.consumers: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def open(cls, state_path: Path = DEFAULT_STATE) -> "Tailer":
+        """The tailer saved at `state_path`, or a new one."""
+        try:
+            with open(state_path, "rb") as fh:
+                tailer = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cls(state_path)
+        tailer.state_path = Path(state_path)
+        return tailer
+
+    def save(self) -> Path:
+        """Write offsets and consumers atomically, so they never disagree."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.state_path)
+        return self.state_path
+
+    def follow(self, path: Path, *consumers: Any) -> List[Any]:
+        """Start following `path`; a path already followed keeps its consumers."""
+        key = str(Path(path).resolve())
+        if key not in self.consumers:
+            self.consumers[key] = list(consumers)
+        return self.consumers[key]
+
+    def poll(self) -> Dict[str, Delta]:
+        """Read every followed file and feed the consumers."""
+        return {key: self.poll_file(Path(key)) for key in self.consumers}
+
+    def poll_file(self, path: Path) -> Delta:
+        path = Path(path).resolve()
+        key = str(path)
+        delta = self._read(path, self.files.get(key))
+        for consumer in self.consumers.get(key, []):
+            if delta.full:
+                consumer.reset()
+            if len(delta.frame):
+                consumer.update(delta.frame)
+        return delta
+
+    def _changed(self, path: Path, st: os.stat_result, state: Optional[FileState]) -> Optional[str]:
+        """Why the file must be read from the start, or None to read the tail."""
+        if state is None:
+            return "new"
+        if compression.compression_of(path):
+            return "compressed"
+        if _identity(st) != state.identity:
+            return "rotated"
+        if st.st_size < state.offset:
+            return "truncated"
+        if _sha(path, 0, state.header_end) != state.header_sha:
+            return "rewritten"
+        if _sha(path, max(state.header_end, state.offset - CHECK_BYTES), state.offset) != state.tail_sha:
+            return "rewritten"
+        return None
+
+    def _read(self, path: Path, state: Optional[FileState]) -> Delta:
+        st = path.stat()
+        reason = self._changed(path, st, state)
+        if reason is None:
+            assert state is not None
+            start = state.offset
+            end = _complete_end(path, start, st.st_size)
+            frame = _parse(path, state, start, end, header=False)
+            frame.index = pd.RangeIndex(state.rows, state.rows + len(frame))
+            self._advance(path, state, end, len(frame))
+            return Delta(path, frame, False, "appended", start, end)
+
+        if compression.compression_of(path):
+            frame = data.load_csv(path)
+            self.files[str(path)] = FileState(identity=_identity(st), columns=[str(c) for c in frame.columns])
+            return Delta(path, frame, True, reason, 0, st.st_size)
+
+        self.files.pop(str(path), None)
+        header_end = _header_end(path)
+        if not header_end:
+            # not even a complete header yet: start from scratch next time
+            return Delta(path, pd.DataFrame(), True, reason, 0, 0)
+        state = FileState(identity=_identity(st), header_end=header_end, header_sha=_sha(path, 0, header_end))
+        state.encoding, state.sep = data.sniff_dialect(path)
+        end = _complete_end(path, 0, st.st_size)
+        frame = _parse(path, state, 0, end, header=True)
+        frame.attrs["sources"] = [str(path)]
+        state.columns = [str(c) for c in frame.columns]
+        self._advance(path, state, end, len(frame))
+        self.files[str(path)] = state
+        return Delta(path, frame, True, reason, 0, end)
+
+    def _advance(self, path: Path, state: FileState, end: int, rows: int) -> None:
+        state.offset = end
+        state.rows += rows
+        state.tail_sha = _sha(path, max(state.header_end, end - CHECK_BYTES), end)
+
+
+class Profile:
+    """Inventory column statistics (`inventory.ColumnProfiler`) kept up to date."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.profiler = inventory.ColumnProfiler()
+        self.rows = 0
+
+    def update(self, df: pd.DataFrame) -> None:
+        self.profiler.update(df)
+        self.rows += len(df)
+
+    def profile(self) -> List[Dict[str, Any]]:
+        return self.profiler.profile()
+
+
+class Collect:
+    """The consolidated table: every row seen, or the first per `subset` key."""
+
+    def __init__(self, subset: Optional[Sequence[str]] = None) -> None:
+        self.subset = list(subset) if subset is not None else None
+        self.reset()
+
+    def reset(self) -> None:
+        self.frames: List[pd.DataFrame] = []
+        self.seen = dedupe.FingerprintSet()
+
+    def update(self, df: pd.DataFrame) -> None:
+        if self.subset is not None:
+            df = df[self.seen.add_new(dedupe.fingerprint(df, self.subset))]
+        if len(df):
+            self.frames.append(df)
+
+    def value(self) -> pd.DataFrame:
+        if len(self.frames) > 1:
+            self.frames = [pd.concat(self.frames)]
+        return self.frames[0] if self.frames else pd.DataFrame()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Print the rows appended to CSV files since the last run")
+    ap.add_argument("paths", nargs="+", type=Path)
+    ap.add_argument("--state", type=Path, default=DEFAULT_STATE)
+    args = ap.parse_args(argv)
+
+    tailer = Tailer.open(args.state)
+    for p in args.paths:
+        tailer.follow(p, Profile())
+    for key, delta in tailer.poll().items():
+        kind = "full reload" if delta.full else "new rows"
+        print(f"{Path(key).name}: {delta.rows} {kind} ({delta.reason}, bytes {delta.start}-{delta.end})")
+    tailer.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""Referential-integrity and consistency checks for the sales tables.
+
+Every check works on NumPy arrays and no merge (or copy of the child table)
+is ever built. Parent keys are indexed once (`KeyIndex`): integer ids that
+are reasonably dense go into a direct-address table, so a lookup is one
+array gather; other keys are sorted and looked up with `np.searchsorted`.
+Each check returns the offending rows themselves, not just a count.
+
+Checks (see `validate`):
+- pk_unique:       id_venta, id_cliente and id_producto are unique
+- fk_cliente:      every ventas.id_cliente exists in clientes
+- fk_venta:        every detalle_ventas.id_venta exists in ventas
+- fk_producto:     every detalle_ventas.id_producto exists in productos
+- importe:         importe == cantidad * precio_unitario (within tolerance)
+- precio_catalogo: detalle_ventas.precio_unitario matches productos
+
+Usage:
+    python src/validate.py                 # tables from db/
+    python src/validate.py DIR --out OUT   # also write one CSV of offenders per check
+"""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src import data
+except Exception:
+    import data  # type: ignore
+
+
+TABLES = ("clientes", "productos", "ventas", "detalle_ventas")
+PRIMARY_KEYS = {"ventas": "id_venta", "clientes": "id_cliente", "productos": "id_producto"}
+FOREIGN_KEYS = [
+    ("fk_cliente", "ventas", "id_cliente", "clientes"),
+    ("fk_venta", "detalle_ventas", "id_venta", "ventas"),
+    ("fk_producto", "detalle_ventas", "id_producto", "productos"),
+]
+# money comparisons: absolute tolerance plus a relative part for large amounts
+ABS_TOL = 0.01
+REL_TOL = 1e-9
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one check; `rows` are index labels of the offending rows."""
+
+    name: str
+    table: str
+    checked: int
+    rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="int64"))
+    detail: str = ""
+    skipped: bool = False
+
+    @property
+    def n_bad(self) -> int:
+        return int(len(self.rows))
+
+    @property
+    def ok(self) -> bool:
+        return not self.skipped and self.n_bad == 0
+
+    def describe(self) -> str:
+        if self.skipped:
+            return f"{self.name:<16} SKIPPED  {self.detail}"
+        status = "ok" if self.ok else "FAIL"
+        return f"{self.name:<16} {status:<8} {self.n_bad} of {self.checked} {self.table} rows {self.detail}".rstrip()
+
+
+def _keys(s: pd.Series) -> np.ndarray:
+    """Key column as a NumPy array that sorts and compares cheaply."""
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.to_numpy(dtype="int64")
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.to_numpy(dtype="float64", na_value=np.nan)
+    return _str_keys(s)
+
+
+def _str_keys(s: pd.Series) -> np.ndarray:
+    # nulls become "" so the array sorts; no real key is empty
+    return s.astype(object).where(s.notna(), "").astype(str).to_numpy(dtype=object)
+
+
+def _amounts(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+# a direct-address table may be up to this many times larger than the keys
+DENSE_FACTOR = 4
+
+
+def _dense_span(keys: np.ndarray) -> Optional[Tuple[int, int]]:
+    """(min, span) when integer `keys` are dense enough for a direct table."""
+    if keys.dtype.kind not in "iu" or not len(keys):
+        return None
+    lo, hi = int(keys.min()), int(keys.max())
+    span = hi - lo + 1
+    return (lo, span) if span <= DENSE_FACTOR * len(keys) + (1 << 16) else None
+
+
+class KeyIndex:
+    """Lookup structure over parent keys: row position of each key, if any."""
+
+    def __init__(self, keys: np.ndarray):
+        self.dense = _dense_span(keys)
+        if self.dense is not None:
+            lo, span = self.dense
+            self.table = np.full(span, -1, dtype="intp")
+            self.table[keys - lo] = np.arange(len(keys))
+        else:
+            self.order = np.argsort(keys, kind="stable")
+            self.sorted = keys[self.order]
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Parent row positions of `keys` and a mask of the ones found."""
+        n = len(keys)
+        if self.dense is not None:
+            lo, span = self.dense
+            if keys.dtype.kind in "iu":
+                rel = keys - lo
+                inside = (rel >= 0) & (rel < span)
+            else:
+                # float keys (ids with nulls): only exact integers can match
+                with np.errstate(invalid="ignore"):
+                    rel = keys - lo
+                    inside = (rel >= 0) & (rel < span) & (rel == np.floor(rel))
+                rel = np.where(inside, rel, 0).astype("intp")
+            pos = np.where(inside, self.table[np.where(inside, rel, 0)], -1)
+            found = pos >= 0
+            return np.maximum(pos, 0), found
+        if len(self.sorted) == 0:
+            return np.zeros(n, dtype="intp"), np.zeros(n, dtype=bool)
+        idx = np.minimum(np.searchsorted(self.sorted, keys), len(self.sorted) - 1)
+        return self.order[idx], self.sorted[idx] == keys
+
+
+def _mixed_kinds(a: np.ndarray, b: np.ndarray) -> bool:
+    return (a.dtype == object) != (b.dtype == object)
+
+
+def check_unique(df: pd.DataFrame, col: str, table: str) -> CheckResult:
+    """Rows whose primary key value appears more than once (all copies)."""
+    keys = _keys(df[col])
+    dense = _dense_span(keys)
+    if dense is not None:
+        counts = np.bincount(keys - dense[0], minlength=dense[1])
+        bad = np.flatnonzero(counts[keys - dense[0]] > 1)
+        return CheckResult(f"pk_unique:{col}", table, len(df), df.index.to_numpy()[bad], f"duplicated {col}")
+    order = np.argsort(keys, kind="stable")
+    s = keys[order]
+    dup = np.zeros(len(s), dtype=bool)
+    if len(s) > 1:
+        same = s[1:] == s[:-1]
+        dup[1:] |= same
+        dup[:-1] |= same
+    bad = np.sort(order[dup])
+    return CheckResult(f"pk_unique:{col}", table, len(df), df.index.to_numpy()[bad], f"duplicated {col}")
+
+
+def check_foreign_key(child: pd.DataFrame, col: str, parent: pd.DataFrame, pk: str, name: str, table: str) -> CheckResult:
+    """Rows of `child` whose `col` is missing (or null) in `parent[pk]`."""
+    child_keys = _keys(child[col])
+    parent_keys = _keys(parent[pk])
+    if _mixed_kinds(child_keys, parent_keys):
+        child_keys = _str_keys(child[col])
+        parent_keys = _str_keys(parent[pk])
+    _, found = KeyIndex(parent_keys).lookup(child_keys)
+    return CheckResult(name, table, len(child), child.index.to_numpy()[~found], f"{col} not in {pk}")
+
+
+def check_importe(detalle: pd.DataFrame, tol: float = ABS_TOL) -> CheckResult:
+    """Rows where importe != cantidad * precio_unitario (NaNs count as wrong)."""
+    imp = _amounts(detalle["importe"])
+    expected = _amounts(detalle["cantidad"]) * _amounts(detalle["precio_unitario"])
+    diff = np.abs(imp - expected)
+    bad = ~(diff <= tol + REL_TOL * np.abs(expected))
+    return CheckResult("importe", "detalle_ventas", len(detalle), detalle.index.to_numpy()[bad], "importe != cantidad * precio_unitario")
+
+
+def check_catalog_price(detalle: pd.DataFrame, productos: pd.DataFrame, tol: float = ABS_TOL) -> CheckResult:
+    """Rows whose precio_unitario differs from the catalog price of the product.
+
+    Products missing from the catalog are reported by fk_producto instead.
+    """
+    prod_keys = _keys(productos["id_producto"])
+    det_keys = _keys(detalle["id_producto"])
+    if _mixed_kinds(prod_keys, det_keys):
+        prod_keys = _str_keys(productos["id_producto"])
+        det_keys = _str_keys(detalle["id_producto"])
+    pos, found = KeyIndex(prod_keys).lookup(det_keys)
+    price = _amounts(detalle["precio_unitario"])
+    expected = _amounts(productos["precio_unitario"])[pos]
+    bad = found & ~(np.abs(price - expected) <= tol + REL_TOL * np.abs(expected))
+    return CheckResult("precio_catalogo", "detalle_ventas", int(found.sum()), detalle.index.to_numpy()[bad], "precio_unitario != catalog")
+
+
+def _has(tables: Dict[str, pd.DataFrame], table: str, *cols: str) -> bool:
+    df = tables.get(table)
+    return df is not None and all(c in df.columns for c in cols)
+
+
+def validate(tables: Dict[str, pd.DataFrame], tol: float = ABS_TOL) -> List[CheckResult]:
+    """Run every check whose tables and columns are present."""
+    results: List[CheckResult] = []
+    for table, pk in PRIMARY_KEYS.items():
+        if _has(tables, table, pk):
+            results.append(check_unique(tables[table], pk, table))
+        else:
+            results.append(CheckResult(f"pk_unique:{pk}", table, 0, detail=f"missing {table}.{pk}", skipped=True))
+
+    for name, child, col, parent in FOREIGN_KEYS:
+        pk = PRIMARY_KEYS[parent]
+        if _has(tables, child, col) and _has(tables, parent, pk):
+            results.append(check_foreign_key(tables[child], col, tables[parent], pk, name, child))
+        else:
+            results.append(CheckResult(name, child, 0, detail=f"missing {child}.{col} or {parent}.{pk}", skipped=True))
+
+    if _has(tables, "detalle_ventas", "importe", "cantidad", "precio_unitario"):
+        results.append(check_importe(tables["detalle_ventas"], tol))
+    else:
+        results.append(CheckResult("importe", "detalle_ventas", 0, detail="missing importe/cantidad/precio_unitario", skipped=True))
+
+    if _has(tables, "detalle_ventas", "id_producto", "precio_unitario") and _has(tables, "productos", "id_producto", "precio_unitario"):
+        results.append(check_catalog_price(tables["detalle_ventas"], tables["productos"], tol))
+    else:
+        results.append(CheckResult("precio_catalogo", "detalle_ventas", 0, detail="missing precio_unitario", skipped=True))
+    return results
+
+
+def offenders(result: CheckResult, tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """The offending rows of `result` (empty for skipped or passing checks)."""
+    df = tables.get(result.table)
+    if df is None or result.skipped:
+        return pd.DataFrame()
+    return df.loc[result.rows]
+
+
+def load_tables(db_dir: Path = data.DB_DIR) -> Dict[str, pd.DataFrame]:
+    tables: Dict[str, pd.DataFrame] = {}
+    for name in TABLES:
+        p = Path(db_dir) / f"{name}.csv"
+        if p.exists():
+            tables[name] = data.load_csv(p)
+    return tables
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Validate the sales tables")
+    ap.add_argument("db_dir", nargs="?", type=Path, default=data.DB_DIR)
+    ap.add_argument("--out", type=Path, default=None, help="directory for <check>.csv files with offending rows")
+    ap.add_argument("--tol", type=float, default=ABS_TOL)
+    args = ap.parse_args(argv)
+
+    tables = load_tables(args.db_dir)
+    if not tables:
+        print(f"No tables found in {args.db_dir}")
+        return 2
+    results = validate(tables, tol=args.tol)
+    for res in results:
+        print(res.describe())
+        if res.n_bad:
+            print(f"  rows: {res.rows[:20].tolist()}{' ...' if res.n_bad > 20 else ''}")
+        if args.out is not None and res.n_bad:
+            args.out.mkdir(parents=True, exist_ok=True)
+            offenders(res, tables).to_csv(args.out / f"{res.name.replace(':', '_')}.csv")
+    return 0 if all(r.ok or r.skipped for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,147 @@
 """Small plotting helpers using matplotlib / seaborn for notebooks.
 
 Functions return the Matplotlib Figure so notebooks can display or further
-customize the plots.
+customize the plots. matplotlib and seaborn are imported inside each function
+so importing this module stays cheap.
 """
 from __future__ import annotations
 
 from typing import Optional
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+# Above this many rows `plot_hist` bins the data once and computes the KDE by
+# FFT convolution on the binned grid instead of against every point.
+LARGE_HIST_ROWS = 1_000_000
+HIST_CHUNK_ROWS = 1_000_000
+KDE_GRID_SIZE = 2048
 
-def plot_hist(df, column: str, bins: int = 30, figsize=(8, 4)):
-    """Plot a histogram for a numeric column and return the Figure."""
+
+def _iter_values(data, column: str, chunk_rows: int = HIST_CHUNK_ROWS):
+    """Yield float64 arrays (NaNs removed) for `column`, chunk by chunk.
+
+    `data` may be a DataFrame or an iterable of DataFrames (for example the
+    reader returned by `pd.read_csv(..., chunksize=...)`).
+    """
+    import numpy as np
+    import pandas as pd
+
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        values = frame[column].to_numpy(dtype="float64", na_value=np.nan)
+        for start in range(0, len(values), chunk_rows):
+            chunk = values[start:start + chunk_rows]
+            yield chunk[~np.isnan(chunk)]
+
+
+def binned_counts(chunks, edges):
+    """Histogram `chunks` over fixed `edges` in one pass.
+
+    Returns `(counts, n, std)` where `std` is the sample standard deviation
+    (ddof=1), merged across chunks with Chan's parallel update so no chunk
+    needs to be kept around.
+    """
+    import numpy as np
+
+    counts = np.zeros(len(edges) - 1, dtype="int64")
+    n, mean, m2 = 0, 0.0, 0.0
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        counts += np.histogram(chunk, bins=edges)[0]
+        cn = len(chunk)
+        cmean = float(chunk.mean())
+        cm2 = float(((chunk - cmean) ** 2).sum())
+        delta = cmean - mean
+        total = n + cn
+        mean += delta * cn / total
+        m2 += cm2 + delta * delta * n * cn / total
+        n = total
+    std = (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+    return counts, n, std
+
+
+def fft_kde(counts, bin_width: float, bandwidth: float):
+    """Gaussian KDE of binned `counts` evaluated at the bin centers.
+
+    The kernel is sampled on the bin grid and convolved with the counts via
+    FFT, so the cost depends on the grid size, not on the number of points.
+    Returns a density (integrates to ~1 over the real line).
+    """
+    import numpy as np
+
+    n = counts.sum()
+    if n == 0 or bandwidth <= 0:
+        return np.zeros(len(counts))
+    half = min(int(np.ceil(4 * bandwidth / bin_width)), len(counts))
+    offsets = np.arange(-half, half + 1) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    kernel /= kernel.sum()
+    size = len(counts) + len(kernel) - 1
+    nfft = 1 << (size - 1).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(counts, nfft) * np.fft.rfft(kernel, nfft), nfft)[:size]
+    smoothed = conv[half:half + len(counts)]
+    return np.clip(smoothed, 0, None) / (n * bin_width)
+
+
+def _plot_hist_binned(data, column: str, bins: int, ax, hist_range=None):
+    import numpy as np
+    import seaborn as sns
+    from matplotlib.colors import to_rgba
+
+    if hist_range is None:
+        lo, hi = np.inf, -np.inf
+        for chunk in _iter_values(data, column):
+            if len(chunk):
+                lo, hi = min(lo, chunk.min()), max(hi, chunk.max())
+        if lo > hi:
+            raise ValueError(f"Column {column!r} has no numeric values")
+    else:
+        lo, hi = hist_range
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+
+    # the KDE grid is a refinement of the display bins, so one histogram pass
+    # serves both
+    per_bin = max(1, -(-KDE_GRID_SIZE // bins))
+    fine_edges = np.linspace(lo, hi, bins * per_bin + 1)
+    fine_counts, n, std = binned_counts(_iter_values(data, column), fine_edges)
+    counts = fine_counts.reshape(bins, per_bin).sum(axis=1)
+    edges = fine_edges[::per_bin]
+
+    # alpha=.5 is what seaborn uses for bars when kde=True
+    sns.histplot(x=(edges[:-1] + edges[1:]) / 2, weights=counts, bins=bins, binrange=(lo, hi), alpha=0.5, ax=ax)
+    # Scott's rule, as used by seaborn's default KDE
+    bandwidth = std * n ** (-1 / 5) if n > 1 else 0.0
+    fine_width = fine_edges[1] - fine_edges[0]
+    density = fft_kde(fine_counts, fine_width, bandwidth)
+    centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+    color = to_rgba(ax.patches[0].get_facecolor(), 1) if ax.patches else None
+    ax.plot(centers, density * n * (edges[1] - edges[0]), color=color)
+
+
+def plot_hist(df, column: str, bins: int = 30, figsize=(8, 4), large: Optional[bool] = None, hist_range=None):
+    """Plot a histogram for a numeric column and return the Figure.
+
+    For more than LARGE_HIST_ROWS rows (or when `large=True`) the column is
+    binned in chunks with fixed edges and the KDE is computed on the binned
+    grid. `df` may then also be an iterable of DataFrame chunks, in which case
+    `hist_range=(min, max)` avoids a first pass to find the edges. A one-shot
+    iterator (such as a `read_csv(..., chunksize=...)` reader) can only be
+    read once, so it needs `hist_range`; otherwise ValueError is raised.
+    """
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
+    if large is None:
+        large = not isinstance(df, pd.DataFrame) or len(df) > LARGE_HIST_ROWS
+    if large and hist_range is None and not isinstance(df, pd.DataFrame) and iter(df) is df:
+        raise ValueError("hist_range=(min, max) is required when the chunks can only be read once")
     fig, ax = plt.subplots(figsize=figsize)
-    sns.histplot(df[column].dropna(), bins=bins, ax=ax, kde=True)
+    if large:
+        _plot_hist_binned(df, column, bins, ax, hist_range=hist_range)
+    else:
+        sns.histplot(df[column].dropna(), bins=bins, ax=ax, kde=True)
     ax.set_title(f"Histograma: {column}")
     ax.set_xlabel(column)
     ax.set_ylabel("Frecuencia")
@@ -22,10 +149,67 @@ def plot_hist(df, column: str, bins: int = 30, figsize=(8, 4)):
     return fig
 
 
-def plot_box(df, column: str, figsize=(6, 4)):
-    """Plot a boxplot for a numeric column and return the Figure."""
+LARGE_BOX_ROWS = 1_000_000
+
+
+def _iter_frames(data, chunk_rows: int = HIST_CHUNK_ROWS):
+    import pandas as pd
+
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+
+def box_stats(data, column: str, by: Optional[str] = None, whis: float = 1.5, max_fliers: int = 1000):
+    """One-pass box statistics for `column` (optionally grouped by `by`).
+
+    `data` may be a DataFrame or an iterable of DataFrame chunks. Returns a
+    list of dicts ready for `Axes.bxp`; see `sketch.box_stats_by_group`.
+    """
+    try:
+        from src.sketch import box_stats_by_group
+    except Exception:
+        from sketch import box_stats_by_group  # type: ignore
+
+    return box_stats_by_group(_iter_frames(data), column, by=by, whis=whis, max_fliers=max_fliers)
+
+
+def plot_box(df, column: str, figsize=(6, 4), by: Optional[str] = None, large: Optional[bool] = None):
+    """Plot a boxplot for a numeric column and return the Figure.
+
+    With `by` one box per group is drawn (e.g. `precio_unitario` by
+    `categoria`). Above LARGE_BOX_ROWS rows (or with `large=True`) the box
+    statistics are computed in one streaming pass (see `box_stats`) and drawn
+    with `Axes.bxp`; `df` may then also be an iterable of chunks.
+    """
+    import inspect
+
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
     fig, ax = plt.subplots(figsize=figsize)
-    sns.boxplot(x=df[column], ax=ax)
+    if large is None:
+        large = not isinstance(df, pd.DataFrame) or len(df) > LARGE_BOX_ROWS
+    if large:
+        stats = box_stats(df, column, by=by)
+        horizontal = by is None
+        if "orientation" in inspect.signature(ax.bxp).parameters:
+            orient = {"orientation": "horizontal" if horizontal else "vertical"}
+        else:
+            orient = {"vert": not horizontal}
+        ax.bxp(stats, patch_artist=True, **orient)
+        if horizontal:
+            ax.set_yticks([])
+            ax.set_xlabel(column)
+        else:
+            ax.set_xlabel(by)
+            ax.set_ylabel(column)
+    elif by is None:
+        sns.boxplot(x=df[column], ax=ax)
+    else:
+        sns.boxplot(data=df, x=by, y=column, ax=ax)
     ax.set_title(f"Boxplot: {column}")
     plt.tight_layout()
     return fig
@@ -33,6 +217,9 @@ def plot_box(df, column: str, figsize=(6, 4)):
 
 def plot_count(df, column: str, top: Optional[int] = 10, figsize=(8, 4)):
     """Plot a bar chart of value counts for a column (top N)."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     vc = df[column].value_counts(dropna=False).head(top)
     fig, ax = plt.subplots(figsize=figsize)
     sns.barplot(x=vc.values, y=vc.index, ax=ax)
@@ -0,0 +1,10 @@
+import pytest
+
+from src import dates
+
+
+@pytest.fixture(autouse=True)
+def date_cache_in_tmp(tmp_path, monkeypatch):
+    # keep test sources out of the repo's .cache/date_formats.json
+    monkeypatch.setattr(dates, "CACHE_PATH", tmp_path / "date_formats.json")
+    monkeypatch.setattr(dates, "_cache", None)
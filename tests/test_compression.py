@@ -0,0 +1,57 @@
+import bz2
+import gzip
+import lzma
+import shutil
+
+import pandas as pd
+import pytest
+
+from src import compression, data, inventory
+
+CSV = "id_venta,medio_pago,importe\n" + "".join(f"{i},efectivo,{i * 1.5}\n" for i in range(500))
+WRITERS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+def test_names():
+    assert compression.is_csv("ventas.CSV.gz") and compression.is_csv("a.csv.zst")
+    assert not compression.is_csv("notes.txt.gz")
+    assert compression.table_name("detalle_ventas.csv.bz2") == "detalle_ventas"
+    assert compression.compression_of("x.csv") is None
+
+
+@pytest.mark.parametrize("backend", ["external", "python"])
+@pytest.mark.parametrize("suffix", sorted(WRITERS))
+def test_load_compressed(tmp_path, monkeypatch, suffix, backend):
+    if backend == "python":
+        monkeypatch.setenv(compression.ENV_VAR, "python")
+    p = tmp_path / f"ventas.csv{suffix}"
+    p.write_bytes(WRITERS[suffix](CSV.encode()))
+    df = data.load_csv(p)
+    assert len(df) == 500 and list(df.columns) == ["id_venta", "medio_pago", "importe"]
+    assert df.attrs["uncompressed_bytes"] == len(CSV)
+
+
+def test_inventory_reports_both_sizes(tmp_path):
+    (tmp_path / "plain.csv").write_text(CSV, encoding="utf-8")
+    (tmp_path / "ventas.csv.gz").write_bytes(gzip.compress(CSV.encode()))
+    (tmp_path / "notes.txt").write_text("x", encoding="utf-8")
+    rows = {r["filename"]: r for r in inventory.inventory_db(tmp_path)}
+    assert sorted(rows) == ["plain.csv", "ventas.csv.gz"]
+    gz = rows["ventas.csv.gz"]
+    assert gz["status"] == "ok" and gz["rows"] == 500 and gz["compression"] == "gzip"
+    assert gz["uncompressed_bytes"] == len(CSV) > gz["compressed_bytes"]
+    assert rows["plain.csv"]["compressed_bytes"] == rows["plain.csv"]["uncompressed_bytes"] == len(CSV)
+
+
+def test_zstd_without_decoder_is_a_clear_error(tmp_path, monkeypatch):
+    if shutil.which("zstd"):
+        pytest.skip("zstd installed")
+    try:
+        import zstandard  # noqa: F401
+        pytest.skip("zstandard installed")
+    except ImportError:
+        pass
+    p = tmp_path / "ventas.csv.zst"
+    p.write_bytes(b"\x28\xb5\x2f\xfd")
+    with pytest.raises(RuntimeError, match="zstd"):
+        compression.read_csv(p)
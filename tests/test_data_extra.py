@@ -42,3 +42,25 @@ def test_summarize_and_clean_integration():
     assert summary["total_missing"] == 0
     # check stripped values (no trailing spaces)
     assert cleaned["b"].str.contains(" ").sum() == 0
+
+
+def test_load_csv_glob_and_directory(tmp_path):
+    daily = tmp_path / "diario"
+    daily.mkdir()
+    (daily / "ventas_2024-01-01.csv").write_text("id,value\n1,10\n2,20\n", encoding="utf-8")
+    (daily / "ventas_2024-01-02.csv").write_text("value,id\n30,3\n", encoding="utf-8")
+
+    df = data.load_csv(str(daily / "ventas_*.csv"), source_column="archivo", max_workers=2)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["value"].tolist() == [10, 20, 30]
+    assert df["archivo"].astype(str).tolist() == ["ventas_2024-01-01.csv"] * 2 + ["ventas_2024-01-02.csv"]
+    assert len(df.attrs["sources"]) == 2
+
+    pd.testing.assert_frame_equal(data.load_csv(daily, max_workers=1), df.drop(columns="archivo"))
+
+    (daily / "ventas_2024-01-03.csv").write_text("id,other\n4,x\n", encoding="utf-8")
+    try:
+        data.load_csv(daily)
+        assert False, "Expected a schema mismatch"
+    except ValueError as e:
+        assert "ventas_2024-01-03.csv" in str(e)
@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src import dates
+
+
+def test_infer_format():
+    assert dates.infer_format(pd.Series(["2024-01-05", "2024-03-11"])) == "%Y-%m-%d"
+    assert dates.infer_format(pd.Series(["05/01/2024", "11/03/2024"])) == "%d/%m/%Y"
+    assert dates.infer_format(pd.Series(["05/01/2024", "12/25/2024"])) == "%m/%d/%Y"
+    assert dates.infer_format(pd.Series(["2024-01-05 10:30:00"])) == "%Y-%m-%d %H:%M:%S"
+    assert dates.infer_format(pd.Series(["efectivo", "tarjeta"])) is None
+
+
+def test_parse_maps_uniques_back():
+    s = pd.Series(["31/12/2024", None, "01/02/2024", "basura", "31/12/2024"], index=[10, 11, 12, 13, 14], name="fecha")
+    out = dates.parse_dates(s)
+    assert out.dtype == "datetime64[ns]" and list(out.index) == [10, 11, 12, 13, 14]
+    expected = pd.to_datetime(s, format="%d/%m/%Y", errors="coerce").to_numpy(dtype="datetime64[ns]")
+    np.testing.assert_array_equal(out.to_numpy(), expected)
+
+
+def test_format_cached_per_source(tmp_path):
+    s = pd.Series(["05/01/2024", "11/03/2024"], name="fecha")
+    s.attrs["sources"] = [str(tmp_path / "ventas.csv")]
+    dates.parse_dates(s)
+    key = dates.cache_key(s.attrs["sources"], "fecha")
+    assert json.loads(dates.CACHE_PATH.read_text(encoding="utf-8")) == {key: "%d/%m/%Y"}
+
+    # a cached format that no longer fits is inferred again
+    changed = pd.Series(["2024-01-05", "2024-03-11"], name="fecha")
+    assert dates.parse_dates(changed, sources=s.attrs["sources"]).notna().all()
+    assert dates._load_cache()[key] == "%Y-%m-%d"
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from src import data, dedupe, membudget
+
+
+def exports(tmp_path):
+    # three daily exports that overlap; sale 2 is corrected on day 2
+    days = {
+        "ventas_01.csv": "id_venta,fecha,importe\n1,2024-01-01,10\n2,2024-01-01,20\n",
+        "ventas_02.csv": "id_venta,fecha,importe\n2,2024-01-02,25\n3,2024-01-02,30\n1,2024-01-01,10\n",
+        "ventas_03.csv": "id_venta,fecha,importe\n3,2024-01-02,30\n4,2024-01-03,40\n2,,99\n",
+    }
+    for name, text in days.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    return str(tmp_path / "ventas_*.csv")
+
+
+def by_key(df):
+    return df.sort_values("id_venta").reset_index(drop=True)
+
+
+def test_clean_df_subset_and_latest():
+    df = pd.DataFrame({"id": [1, 2, 1, 2], "ts": ["2024-01-02", "2024-01-01", "2024-01-01", "2024-01-03"], "v": list("abcd")})
+    assert data.clean_df(df, subset=["id"])["v"].tolist() == ["a", "b"]
+    assert data.clean_df(df, subset=["id"], keep_latest="ts")["v"].tolist() == ["a", "d"]
+    budget = membudget.MemoryBudget("1MB", min_chunk_rows=1)
+    got = data.clean_df(df, subset=["id"], keep_latest="ts", memory_budget=budget)
+    assert got["v"].tolist() == ["a", "d"]
+
+
+def test_keep_latest_without_subset_ignores_the_timestamp(tmp_path):
+    df = pd.DataFrame({"id": [1, 1, 2], "v": ["a", "a", "b"], "ts": ["2024-01-01", "2024-01-05", "2024-01-02"]})
+    assert data.clean_df(df, keep_latest="ts")["ts"].tolist() == ["2024-01-05", "2024-01-02"]
+    budget = membudget.MemoryBudget("1MB", min_chunk_rows=1)
+    got = data.clean_df(df, keep_latest="ts", memory_budget=budget)
+    assert sorted(got["ts"]) == ["2024-01-02", "2024-01-05"]
+
+    df.to_csv(tmp_path / "copias.csv", index=False)
+    for method in ("hash", "external"):
+        out = pd.concat(list(dedupe.dedupe_chunks(str(tmp_path / "copias.csv"), latest="ts", method=method, chunksize=2)))
+        assert sorted(out["ts"]) == ["2024-01-02", "2024-01-05"], method
+
+
+@pytest.mark.parametrize("method", ["hash", "external"])
+def test_dedupe_files_keep_latest(tmp_path, method):
+    pattern = exports(tmp_path)
+    chunks = dedupe.dedupe_chunks(pattern, subset=["id_venta"], latest="fecha", method=method, chunksize=2)
+    got = by_key(pd.concat(list(chunks)))
+    assert got["id_venta"].tolist() == ["1", "2", "3", "4"]
+    # the corrected row wins; a copy without date never does
+    assert got["importe"].tolist() == [10, 25, 30, 40]
+
+
+@pytest.mark.parametrize("method", ["hash", "external"])
+def test_dedupe_files_keep_first(tmp_path, method):
+    pattern = exports(tmp_path)
+    got = by_key(pd.concat(dedupe.dedupe_chunks(pattern, subset=["id_venta"], method=method, chunksize=2)))
+    assert got["importe"].tolist() == [10, 20, 30, 40]
+
+
+def test_fingerprint_set_and_csv(tmp_path):
+    seen = dedupe.FingerprintSet()
+    for start in range(0, 1000, 100):
+        new = seen.add_new(pd.Series(range(start, start + 150)).to_numpy(dtype="uint64") % 1000)
+        assert new.sum() == (150 if start == 0 else min(100, 1000 - start - 50))
+    assert len(seen) == 1000
+
+    out = tmp_path / "out" / "ventas.csv"
+    assert dedupe.main([exports(tmp_path), "-o", str(out), "--key", "id_venta", "--latest", "fecha"]) == 0
+    assert len(pd.read_csv(out)) == 4
@@ -0,0 +1,7 @@
+from benchmarks import import_time
+
+
+def test_entry_points_import_within_budget():
+    for res in import_time.run():
+        assert res["heavy"] == [], f"{res['module']} imports {res['heavy']} at load"
+        assert res["cumulative_ms"] < import_time.IMPORT_BUDGET_MS, res
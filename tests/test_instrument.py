@@ -0,0 +1,47 @@
+import json
+
+from src import instrument
+
+
+def test_stage_is_noop_when_disabled():
+    instrument.configure(None)
+    with instrument.stage("x") as st:
+        st.rows = 10
+    assert st is instrument._NOOP
+
+    @instrument.traced("f")
+    def f():
+        return [1, 2]
+
+    assert f() == [1, 2]
+
+
+def test_stage_records_json_lines_and_chrome_trace(tmp_path):
+    log = tmp_path / "trace.jsonl"
+    chrome = tmp_path / "trace.json"
+    instrument.configure(str(log), str(chrome))
+    try:
+        with instrument.stage("outer") as outer:
+            with instrument.stage("inner") as inner:
+                data = [0] * 200_000
+                inner.rows = len(data)
+            outer.rows = 1
+
+        @instrument.traced("listing")
+        def listing():
+            return list(range(5))
+
+        listing()
+        instrument.write_chrome_trace(str(chrome))
+    finally:
+        instrument.configure(None)
+
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r["stage"] for r in records] == ["inner", "outer", "listing"]
+    inner_rec, outer_rec, listing_rec = records
+    assert inner_rec["rows"] == 200_000 and listing_rec["rows"] == 5
+    # the outer peak includes the allocation made by the nested stage
+    assert outer_rec["peak_mb"] >= inner_rec["peak_mb"] > 1
+    assert outer_rec["wall_s"] >= inner_rec["wall_s"]
+    events = json.loads(chrome.read_text())["traceEvents"]
+    assert {e["name"] for e in events} == {"inner", "outer", "listing"}
@@ -55,3 +55,155 @@ def test_load_file(tmp_path):
     f.write_text("# Hola\nlinea2")
     lines = mod.load_file(str(f))
     assert lines[0].startswith("# Hola")
+
+
+def test_load_document_matches_parse_document(tmp_path):
+    mod = load_module_from_path()
+    text = "\n".join([
+        "prefacio ignorado",
+        "## Suelta",
+        "x",
+        "# Dataset",
+        "info",
+        "  ## Escala",
+        "detalle ñ",
+        "### tres",
+        "# Dataset extra",
+        "## Escala B",
+        "",
+    ])
+    f = tmp_path / "doc.md"
+    f.write_text(text, encoding="utf-8")
+    expected = mod.parse_document(mod.load_file(str(f)))
+    doc = mod.load_document(str(f))
+    got = [
+        {"titulo": s["titulo"], "contenido": s["contenido"],
+         "subsecciones": [dict(sub) for sub in s["subsecciones"]]}
+        for s in doc.sections
+    ]
+    assert got == expected
+    assert list(doc.iter_lines(block_size=8)) == text.splitlines()
+    assert list(doc.iter_lines(block_size=3)) == text.splitlines()
+
+    # el índice devuelve la primera coincidencia del documento, como la búsqueda lineal
+    assert mod.find_section(doc, "data")["titulo"] == "Dataset"
+    assert mod.find_section(doc, "Dataset e")["titulo"] == "Dataset extra"
+    assert mod.find_section(doc, "nada") is None
+    assert mod.find_subsection(mod.find_section(doc, "Dataset"), "esc")["titulo"] == "Escala"
+
+
+def test_load_document_cache_follows_mtime(tmp_path):
+    import os
+
+    mod = load_module_from_path()
+    f = tmp_path / "doc.md"
+    f.write_text("# Uno\n", encoding="utf-8")
+    doc = mod.load_document(str(f))
+    assert mod.load_document(str(f)) is doc
+    f.write_text("# Uno\n# Dos\n", encoding="utf-8")
+    os.utime(f, ns=(doc.stamp[0] + 10**9, doc.stamp[0] + 10**9))
+    again = mod.load_document(str(f))
+    assert again is not doc
+    assert [s["titulo"] for s in again.sections] == ["Uno", "Dos"]
+
+
+def test_tokenizer_matches_regex_chain():
+    from benchmarks import bench_markdown
+
+    mod = load_module_from_path()
+    fmt = sys.modules["entrega2.interactive_menu.utils.markdown_formatter"].format_markdown_line
+    samples = [
+        "", "texto plano", "### Título", "**negrita** y *cursiva*", "*a **b** c*",
+        "usar `pip install` ahora", "- item con **x**", "* item [link](http://x)",
+        "1. paso `uno`", "---", "====", "ver [docs](http://a.b) y [otra](c)",
+        "2 * 3 * 4", "a ** b",
+    ]
+    for line in samples:
+        assert fmt(line) == bench_markdown.legacy_format_markdown_line(line), line
+    # la cadena de regex rompía los códigos ANSI de negrita alrededor de un enlace
+    assert fmt("**[a](b)**") == "\033[1m\033[94m\033[4ma\033[0m\033[0m"
+
+
+def test_render_cached_and_paginate():
+    mod = load_module_from_path()
+    calls = []
+
+    def render():
+        calls.append(1)
+        yield from ["a", "b", "c"]
+
+    assert list(mod.render_cached(("k", 1), render)) == ["a", "b", "c"]
+    assert list(mod.render_cached(("k", 1), render)) == ["a", "b", "c"]
+    assert len(calls) == 1
+
+    out = []
+    answers = iter(["", "q"])
+    done = mod.paginate(iter(["1", "2", "3", "4", "5"]), size=2, read=lambda _: next(answers), write=out.append)
+    assert not done and out == ["1", "2", "3", "4"]
+
+
+def test_render_cached_from_several_threads(monkeypatch):
+    import threading
+
+    mod = sys.modules[load_module_from_path().render_cached.__module__]
+    monkeypatch.setattr(mod, "RENDER_CACHE_SIZE", 4)
+    errors = []
+
+    def worker(seed):
+        try:
+            for i in range(300):
+                key = (seed + i) % 9
+                assert list(mod.render_cached(key, lambda: iter([str(key)] * 3))) == [str(key)] * 3
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and len(mod._render_cache) <= 4
+
+
+def test_search_index_ranks_and_persists(tmp_path, monkeypatch):
+    mod = load_module_from_path()
+    search = sys.modules["entrega2.interactive_menu.utils.search"]
+    md = tmp_path / "doc.md"
+    md.write_text(
+        "# Dataset\nTablas de clientes y ventas.\n## Escala\nVolumen de la base: 120 ventas.\n"
+        "# Programa\nMenú interactivo.\n## Búsqueda\nÍndice invertido con ranking BM25.\n",
+        encoding="utf-8",
+    )
+    sections = mod.load_document(str(md)).sections
+    index_path = tmp_path / "idx.json"
+    index = mod.load_or_build_index(str(md), sections, mod.NOTEBOOKS, index_path=str(index_path))
+
+    # sin tildes ni mayúsculas
+    (score, top), *_ = index.search("busqueda INDICE")
+    assert top["titulo"] == "Búsqueda" and top["ruta"] == [1, 0]
+    assert index.search("segmentacion rfm")[0][1]["tipo"] == "notebook"
+    assert index.search("zzz") == []
+
+    # se reutiliza el índice guardado mientras no cambien las fuentes
+    calls = []
+    orig = search.SearchIndex.build
+    monkeypatch.setattr(search.SearchIndex, "build", lambda *a, **k: calls.append(1) or orig(*a, **k))
+    mod.load_or_build_index(str(md), sections, mod.NOTEBOOKS, index_path=str(index_path))
+    assert calls == []
+    mod.load_or_build_index(str(md), sections, mod.NOTEBOOKS[:1], index_path=str(index_path))
+    assert calls == [1]
+
+
+def test_warm_render_stops_when_asked(tmp_path):
+    import threading
+
+    mod = load_module_from_path()
+    f = tmp_path / "doc.md"
+    f.write_text("# Uno\n" + "línea\n" * 50, encoding="utf-8")
+    doc = mod.load_document(str(f))
+    stopping = threading.Event()
+    stopping.set()
+    assert mod.warm_render(doc, doc.sections, stopping) == 0
+    cache = sys.modules["entrega2.interactive_menu.utils.markdown_formatter"]._render_cache
+    assert doc.cache_key not in cache
+    assert mod.warm_render(doc, doc.sections) == len(list(doc.iter_lines()))
@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+
+from src import inventory, membudget
+
+
+def _db(tmp_path):
+    db = tmp_path / "db"
+    db.mkdir()
+    (db / "ventas.csv").write_text(
+        "id_venta,fecha,medio_pago\n" + "".join(f"{i},2024-01-{i % 28 + 1:02d},{'efectivo' if i % 3 else ''}\n" for i in range(300)),
+        encoding="utf-8",
+    )
+    (db / "clientes.csv").write_text("id_cliente,nombre\n1,Ana\n2,Luis\n3,Ana\n", encoding="utf-8")
+    return db
+
+
+def test_tables_profile_every_column(tmp_path):
+    db = _db(tmp_path)
+    files, columns = inventory.inventory_tables(inventory.inventory_db(db))
+    assert list(files.columns) == inventory.FILE_FIELDS
+    assert list(columns.columns) == inventory.PROFILE_FIELDS
+    pago = columns[(columns["filename"] == "ventas.csv") & (columns["column"] == "medio_pago")].iloc[0]
+    assert pago["missing"] == 100 and pago["distinct"] == 1
+    ids = columns[columns["column"] == "id_venta"].iloc[0]
+    assert (ids["min"], ids["max"], ids["distinct"]) == ("0", "299", 300)
+    nombre = columns[columns["column"] == "nombre"].iloc[0]
+    assert nombre["distinct"] == 2 and nombre["position"] == 1
+
+
+def test_chunked_profile_matches_full_read(tmp_path):
+    db = _db(tmp_path)
+    full = inventory.inventory_file(db / "ventas.csv")["profile"]
+    chunked = inventory.inventory_file(db / "ventas.csv", memory_budget=membudget.MemoryBudget("1MB", min_chunk_rows=50))["profile"]
+    assert chunked == full
+
+
+def test_store_query_and_compat_view(tmp_path):
+    db = _db(tmp_path)
+    out = db / "inventory.csv"
+    store = db / "inventory"
+    inventory.build_graph(db, out, cache_dir=tmp_path / "cache", store_dir=store).run()
+
+    hits = inventory.query_columns(store_dir=store, column=["fecha", "nombre"])
+    assert sorted(hits["column"]) == ["fecha", "nombre"]
+    assert inventory.query_columns("missing > 0", store_dir=store)["column"].tolist() == ["medio_pago"]
+
+    legacy = pd.read_csv(out)
+    assert list(legacy.columns)[-4:] == ["columns", "dtypes", "sample_head", "error"]
+    row = legacy.set_index("filename").loc["ventas.csv"]
+    assert json.loads(row["columns"]) == ["id_venta", "fecha", "medio_pago"]
+    assert set(json.loads(row["dtypes"])) == {"id_venta", "fecha", "medio_pago"}
+    # the store lives next to inventory.csv and is not itself inventoried
+    assert sorted(legacy["filename"]) == ["clientes.csv", "ventas.csv"]
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from src import matching, mi_analisis
+
+
+def clientes():
+    return pd.DataFrame({
+        "id_cliente": [1, 2, 3, 4, 5, 6, 7],
+        "nombre_cliente": ["José González", "JOSE GONZALEZ", "Jose Gonzales", "María López",
+                           "Cliente 17", "Cliente 71", "Ana Ruiz"],
+        "email": ["jose.gonzalez@mail.com", "jgonzalez@gmail.com", "jose.gonzales@mail.com",
+                  "maria@x.com", "cliente17@mail.com", "cliente71@mail.com", "ana+promo@y.com"],
+        "ciudad": ["Córdoba", "cordoba", "Córdoba", "Rosario", "Rosario", "Rosario", "Mendoza"],
+    })
+
+
+def test_normalization_and_phonetic_key():
+    s = pd.Series(["  José  GONZÁLEZ ", "Jose Gonzales", None])
+    assert matching.normalize_text(s).tolist() == ["jose gonzalez", "jose gonzales", ""]
+    assert matching.normalize_email(pd.Series(["Ana+promo@Y.com", "j.perez@gmail.com"])).tolist() == ["ana@y.com", "jperez@gmail.com"]
+    keys = matching.phonetic_key(matching.normalize_text(s))
+    assert keys[0] == keys[1]
+
+
+def test_find_duplicates_clusters():
+    result = matching.find_duplicates(clientes())
+    assert result.canonical_map() == {"1": "1", "2": "1", "3": "1"}
+    # numbered placeholder customers are never merged
+    assert not ({5, 6} <= set(result.pairs[["left", "right"]].to_numpy().ravel()))
+    assert matching.connected_components(5, [0, 3, 1], [1, 4, 2]).tolist() == [0, 0, 0, 3, 3]
+
+
+def test_compute_rfm_with_customer_map():
+    ventas = pd.DataFrame({
+        "id_venta": [1, 2, 3, 4],
+        "fecha": ["2024-01-01", "2024-02-01", "2024-03-01", "2024-03-05"],
+        "id_cliente": [1, 2, 3, 4],
+        "importe": [10.0, 20.0, 30.0, 5.0],
+    })
+    cmap = matching.find_duplicates(clientes()).canonical_map()
+    agg = mi_analisis.compute_rfm(ventas, None, None, customer_map=cmap).set_index("_customer")
+    assert agg.loc["1", "frequency"] == 3 and agg.loc["1", "monetary"] == 60.0
+    assert sorted(agg.index) == ["1", "4"]
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from src import data, inventory, membudget, mi_analisis, synthetic
+
+
+def tiny_budget(**kw):
+    # 1 MB is always below the process RSS, so every degradation path runs
+    return membudget.MemoryBudget("1MB", min_chunk_rows=50, **kw)
+
+
+def test_parse_size():
+    assert membudget.parse_size("1GB") == 2**30
+    assert membudget.parse_size("512m") == 512 * 2**20
+    assert membudget.parse_size("1.5 GiB") == int(1.5 * 2**30)
+    assert membudget.parse_size(1234) == 1234
+    with pytest.raises(ValueError):
+        membudget.parse_size("lots")
+
+
+def test_resolve_reads_env(monkeypatch):
+    monkeypatch.setenv(membudget.ENV_VAR, "2GB")
+    assert membudget.MemoryBudget.resolve(None).limit == 2 * 2**30
+    monkeypatch.delenv(membudget.ENV_VAR)
+    assert membudget.MemoryBudget.resolve(None) is None
+
+
+def test_dotenv_is_loaded_once(monkeypatch):
+    import sys
+    import types
+
+    calls = []
+    monkeypatch.setitem(sys.modules, "dotenv", types.SimpleNamespace(load_dotenv=lambda: calls.append(1)))
+    monkeypatch.setattr(membudget, "_dotenv_loaded", False)
+    monkeypatch.delenv(membudget.ENV_VAR, raising=False)
+    membudget.MemoryBudget.resolve(None)
+    membudget.MemoryBudget.resolve(None)
+    assert calls == [1]
+
+
+def test_clean_df_chunked_matches(tmp_path, capsys):
+    df = pd.DataFrame({"a": [" x", "y ", " x", "z"] * 100, "b": [1, 2, 1, None] * 100})
+    expected = data.clean_df(df, fillna={"b": 0})
+    got = data.clean_df(df, fillna={"b": 0}, memory_budget=tiny_budget(spill_dir=tmp_path))
+    pd.testing.assert_frame_equal(got, expected)
+    out = capsys.readouterr().out
+    assert "degraded mode" in out and "spilled parts" in out
+    # los temporales se borran al terminar
+    assert not list(tmp_path.iterdir())
+
+
+def test_compute_rfm_chunked_matches():
+    d = synthetic.generate_dataset(1500, seed=3)
+    args = (d["ventas"], d["detalle_ventas"], d["clientes"])
+    expected = mi_analisis.compute_rfm(*args)
+    got = mi_analisis.compute_rfm(*args, memory_budget=tiny_budget())
+    key = expected.columns[0]
+    pd.testing.assert_frame_equal(
+        got.sort_values(key).reset_index(drop=True),
+        expected.sort_values(key).reset_index(drop=True),
+    )
+
+
+def test_inventory_chunked_matches(tmp_path):
+    paths = synthetic.write_dataset(tmp_path, 500, seed=2)
+    expected = inventory.inventory_file(paths["detalle_ventas"])
+    got = inventory.inventory_file(paths["detalle_ventas"], memory_budget=tiny_budget())
+    assert got["status"] == "ok"
+    for key in ("rows", "cols", "total_missing", "columns", "dtypes", "sample_head"):
+        assert got[key] == expected[key], key
+
+
+def test_strip_strings_covers_string_dtype():
+    df = pd.DataFrame({"a": pd.Series([" x", "y ", None], dtype="str"), "b": pd.Series([" z", "w", 1], dtype=object)})
+    expected = pd.DataFrame({"a": pd.Series(["x", "y", None], dtype="str"), "b": pd.Series(["z", "w", "1"], dtype="str")})
+    pd.testing.assert_frame_equal(data.clean_df(df), expected)
+    pd.testing.assert_frame_equal(data.clean_df(df, memory_budget=tiny_budget()), expected)
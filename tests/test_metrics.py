@@ -0,0 +1,60 @@
+import pandas as pd
+
+from src import docs, metrics, synthetic
+
+
+def test_snapshot_counts_types_and_mix(tmp_path):
+    tables = synthetic.write_dataset(tmp_path, 300, seed=4)
+    snap_path = tmp_path / "metrics.json"
+    summ = metrics.summary(metrics.refresh_snapshot(tmp_path, snap_path))
+
+    ventas = pd.read_csv(tables["ventas"])
+    detalle = pd.read_csv(tables["detalle_ventas"])
+    assert summ["ventas"] == len(ventas)
+    assert summ["detalle"] == len(detalle)
+    assert summ["densidad"] == len(detalle) / len(ventas)
+    assert summ["medios_pago"] == ventas["medio_pago"].value_counts().to_dict()
+    cols = summ["tablas"]["ventas"]["columnas"]
+    assert cols[:3] == ["id_venta (PK, INT)", "fecha (DATE)", "id_cliente (FK, INT)"]
+    assert "precio_unitario (DECIMAL)" in summ["tablas"]["productos"]["columnas"]
+
+
+def test_refresh_is_incremental(tmp_path, monkeypatch):
+    tables = synthetic.write_dataset(tmp_path, 200, seed=5)
+    snap_path = tmp_path / "metrics.json"
+    metrics.refresh_snapshot(tmp_path, snap_path)
+    assert not metrics.is_stale(metrics.load_snapshot(snap_path), tmp_path)
+
+    read = []
+    orig = metrics.table_stats
+    monkeypatch.setattr(metrics, "table_stats", lambda p, *a, **k: read.append(p.name) or orig(p, *a, **k))
+    pd.read_csv(tables["clientes"]).head(10).to_csv(tables["clientes"], index=False)
+    assert metrics.is_stale(metrics.load_snapshot(snap_path), tmp_path)
+    snap = metrics.load_current(tmp_path, snap_path)
+    assert read == ["clientes.csv"]
+    assert metrics.summary(snap)["clientes"] == 10
+
+
+def test_unwritable_snapshot_is_served_from_memory(tmp_path, monkeypatch):
+    tables = synthetic.write_dataset(tmp_path, 100, seed=7)
+
+    def read_only(path, obj):
+        raise PermissionError(13, "Permission denied", str(path))
+
+    monkeypatch.setattr(metrics, "_write_json", read_only)
+    snap = metrics.load_current(tmp_path, tmp_path / "metrics.json")
+    assert metrics.summary(snap)["clientes"] == len(pd.read_csv(tables["clientes"]))
+    assert not (tmp_path / "metrics.json").exists()
+
+
+def test_docs_menu_uses_snapshot(tmp_path, capsys):
+    synthetic.write_dataset(tmp_path, 150, seed=6)
+    sistema = docs.SistemaGestionVentas(tmp_path, tmp_path / "metrics.json")
+    sistema.mostrar_metricas()
+    out = capsys.readouterr().out
+    assert "Total Ventas: 150" in out and "según los datos de db/" in out
+
+    vacio = tmp_path / "vacio"
+    vacio.mkdir()
+    docs.SistemaGestionVentas(vacio, vacio / "metrics.json").mostrar_metricas()
+    assert "Total Ventas: 120" in capsys.readouterr().out
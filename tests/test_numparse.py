@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from src import data, numparse
+
+
+def test_detect_format():
+    assert numparse.detect_format(pd.Series(["1.234,56", "12,5", "$ 3.000"])) == "es"
+    assert numparse.detect_format(pd.Series(["1,234.56", "12.5", "3,000"])) == "en"
+    # a decimal comma has no "en" reading
+    assert numparse.detect_format(pd.Series(["1,5", "2,25"])) == "es"
+    # "1.250" is 1250 in "es" and 1.25 in "en": not guessed
+    assert numparse.candidate_formats(pd.Series(["1.250", "3.500"])) == ["es", "en"]
+    assert numparse.detect_format(pd.Series(["1.250", "3.500"])) is None
+    assert numparse.detect_format(pd.Series(["efectivo", "tarjeta"])) is None
+    assert numparse.detect_format(pd.Series(["2024-01-05", "2024-02-01"])) is None
+    # digits only: codes such as postal codes, not formatted numbers
+    assert numparse.detect_format(pd.Series(["01234", "05000"])) is None
+
+
+def test_parse_counts_failures():
+    s = pd.Series(["1.234,56", None, "", "n/d", "1.2.3", "-7,5", "1.234,56"], dtype=object)
+    out, failures = numparse.parse_numbers(s, "es")
+    assert failures == 2
+    np.testing.assert_array_equal(out.to_numpy(), [1234.56, np.nan, np.nan, np.nan, np.nan, -7.5, 1234.56])
+    ints, _ = numparse.parse_numbers(pd.Series(["1.000", "25"]), "es")
+    assert ints.dtype == "int64" and ints.tolist() == [1000, 25]
+
+
+def test_load_spanish_export(tmp_path):
+    lines = ["id_venta;importe;medio_pago"] + [f"{i};{i}.{i % 1000:03d},50;efectivo" for i in range(1, 200)]
+    lines[10] = "10;s/d;efectivo"
+    p = tmp_path / "ventas.csv"
+    p.write_text("\n".join(lines) + "\n", encoding="cp1252")
+    df = data.load_csv(p)
+    assert list(df.columns) == ["id_venta", "importe", "medio_pago"]
+    assert df["importe"].dtype == "float64" and df.loc[0, "importe"] == 1001.5
+    assert df.attrs["number_formats"] == {"importe": "es"}
+    assert df.attrs["number_failures"] == {"importe": 1}
+    assert df.attrs["number_ambiguous"] == []
+    assert data.load_csv(p, locale_numbers=False)["importe"].dtype != "float64"
+
+
+def test_typed_columns_are_kept(tmp_path):
+    p = tmp_path / "clientes.csv"
+    p.write_text("id_cliente;codigo_postal;saldo\n1;01234;1.000,5\n2;05000;7,25\n", encoding="utf-8")
+    df = data.load_csv(p, dtype={"codigo_postal": str, "saldo": str})
+    assert df["codigo_postal"].tolist() == ["01234", "05000"]
+    assert df["saldo"].tolist() == ["1.000,5", "7,25"]
+    assert df.attrs["number_formats"] == {}
+    assert data.load_csv(p).attrs["number_formats"] == {"saldo": "es"}
+
+
+def test_analysis_loader_converts_amounts(tmp_path):
+    from src import mi_analisis
+
+    p = tmp_path / "ventas.csv"
+    rows = ["1;2024-01-01;1;1.250,50", "2;2024-01-03;1;99,50", "3;2024-01-04;2;10,00", "4;2024-01-05;3;7,25", "5;2024-01-06;4;1,00"]
+    p.write_text("id_venta;fecha;id_cliente;importe\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    df = mi_analisis.load_df(p)
+    assert list(df.columns) == ["id_venta", "fecha", "id_cliente", "importe"]
+    assert df["importe"].tolist() == [1250.5, 99.5, 10.0, 7.25, 1.0]
+    assert df.attrs["number_formats"] == {"importe": "es"}
+    assert mi_analisis.compute_rfm(df, None, None)["monetary"].tolist() == [1350.0, 10.0, 7.25, 1.0]
+
+
+def test_ambiguous_column_stays_text():
+    df = numparse.convert_frame(pd.DataFrame({"peso": ["1.250", "3.500", "0.125"], "importe": ["1.250,5", "2,5", "7"]}))
+    assert df["peso"].tolist() == ["1.250", "3.500", "0.125"]
+    assert df["importe"].tolist() == [1250.5, 2.5, 7.0]
+    assert df.attrs["number_ambiguous"] == ["peso"]
+    assert df.attrs["number_formats"] == {"importe": "es"}
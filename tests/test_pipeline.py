@@ -0,0 +1,152 @@
+import pandas as pd
+
+from src import mi_analisis, pipeline
+from tests.test_reports import make_tables
+
+
+def test_task_graph_reruns_only_downstream(tmp_path):
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_text("1")
+    b.write_text("2")
+    calls = []
+
+    def read(p):
+        calls.append(p.name)
+        return int(p.read_text())
+
+    def add(x, y, offset=0):
+        calls.append("add")
+        return x + y + offset
+
+    def build():
+        g = pipeline.TaskGraph(tmp_path / "cache")
+        g.add("a", read, inputs={"p": a})
+        g.add("b", read, inputs={"p": b})
+        g.add("sum", add, deps={"x": "a", "y": "b"}, params={"offset": 10})
+        return g
+
+    g = build()
+    assert g.run() == ["a", "b", "sum"]
+    assert g.value("sum") == 13
+
+    g = build()
+    assert g.run() == []
+    assert g.value("sum") == 13
+
+    b.write_text("5")
+    calls.clear()
+    g = build()
+    assert g.run() == ["b", "sum"]
+    # "a" comes from the memo, not from re-reading the file
+    assert calls == ["b.txt", "add"]
+    assert g.value("sum") == 16
+
+
+def test_task_graph_key_follows_imported_modules(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    helper = tmp_path / "helper_mod.py"
+    helper.write_text("FACTOR = 2\n")
+    stage_mod = tmp_path / "stage_mod.py"
+    stage_mod.write_text("def double(x=1):\n    import helper_mod\n    return x * helper_mod.FACTOR\n")
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location("stage_mod", stage_mod)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def build():
+        g = pipeline.TaskGraph(tmp_path / "cache")
+        g.add("double", module.double)
+        return g
+
+    assert build().run() == ["double"]
+    assert build().run() == []
+    helper.write_text("FACTOR = 3\n")
+    assert build().run() == ["double"]
+
+
+def test_mi_analisis_graph_touching_productos_only_redraws_top(tmp_path):
+    ventas, detalle, clientes = make_tables()
+    productos = pd.DataFrame({"id_producto": [10, 11, 12, 13], "nombre_producto": ["a", "b", "c", "d"]})
+    paths = {}
+    for name, df in [("ventas", ventas), ("detalle", detalle), ("clientes", clientes), ("productos", productos)]:
+        paths[name] = tmp_path / f"{name}.csv"
+        df.to_csv(paths[name], index=False)
+    out = tmp_path / "reports"
+    out.mkdir()
+
+    def run():
+        g = mi_analisis.build_graph(paths, out, cache_dir=tmp_path / "cache")
+        g.run()
+        drawn = [name for name in ("plot_rfm", "plot_top") if name in g.executed]
+        for name in drawn:
+            g.value(name).out_path.write_bytes(b"png")
+        if render_ok:
+            g.commit(*drawn)
+        return g.executed
+
+    render_ok = False
+    assert "rfm" in run()
+    # the PNGs exist but rendering was not confirmed: the plot stages rerun
+    render_ok = True
+    assert run() == ["plot_rfm", "load_productos", "plot_top"]
+    assert run() == []
+
+    productos["nombre_producto"] = ["w", "x", "y", "z"]
+    productos.to_csv(paths["productos"], index=False)
+    assert run() == ["load_productos", "plot_top"]
+
+
+def test_mi_analisis_loads_daily_ventas(tmp_path, monkeypatch):
+    ventas, detalle, clientes = make_tables()
+    daily = tmp_path / "db"
+    daily.mkdir()
+    half = len(ventas) // 2
+    ventas.iloc[:half].to_csv(daily / "ventas_2024-01-01.csv", index=False)
+    ventas.iloc[half:].to_csv(daily / "ventas_2024-01-02.csv", index=False)
+    monkeypatch.setattr(mi_analisis, "SEARCH_PATHS", [daily])
+
+    found = mi_analisis.locate_files(mi_analisis.Filenames["ventas"])
+    assert [p.name for p in found] == ["ventas_2024-01-01.csv", "ventas_2024-01-02.csv"]
+    g = mi_analisis.build_graph({"ventas": found}, tmp_path, cache_dir=tmp_path / "cache")
+    g.run(["rfm"])
+    loaded = g.value("load_ventas")
+    assert len(loaded) == len(ventas) and set(loaded["archivo"]) == {p.name for p in found}
+
+
+def test_loaders_read_only_the_columns_the_analysis_uses(tmp_path):
+    from src import synthetic
+
+    paths = synthetic.write_dataset(tmp_path, 400, seed=4)
+    header = mi_analisis.read_header(paths["ventas"])
+    assert len(header) == 0
+    usecols, dtype = mi_analisis.project_columns("ventas", header)
+    assert usecols == ["id_venta", "fecha", "id_cliente"] and dtype == {"fecha": "str"}
+    assert mi_analisis.project_columns("clientes", mi_analisis.read_header(paths["clientes"]), merge_duplicates=True) is None
+
+    tables = {"ventas": "ventas", "detalle": "detalle_ventas", "clientes": "clientes"}
+    full = {t: mi_analisis.load_df(paths[f]) for t, f in tables.items()}
+    projected = {t: mi_analisis.load_df(paths[f], table=t) for t, f in tables.items()}
+    assert list(projected["ventas"].columns) == usecols
+    pd.testing.assert_frame_equal(
+        mi_analisis.compute_rfm(projected["ventas"], projected["detalle"], projected["clientes"]),
+        mi_analisis.compute_rfm(full["ventas"], full["detalle"], full["clientes"]),
+    )
+    pd.testing.assert_frame_equal(mi_analisis.top_products(projected["detalle"]), mi_analisis.top_products(full["detalle"]))
+
+
+def test_projection_on_semicolon_export(tmp_path):
+    p = tmp_path / "ventas.csv"
+    rows = [f"{i};2024-01-{i:02d};{i % 4};{i}.250,50;efectivo" for i in range(1, 21)]
+    p.write_text("id_venta;fecha;id_cliente;importe;medio_pago\n" + "\n".join(rows) + "\n", encoding="utf-8")
+
+    header = mi_analisis.read_header(p)
+    assert list(header.columns) == ["id_venta", "fecha", "id_cliente", "importe", "medio_pago"]
+    df = mi_analisis.load_df(p, table="ventas")
+    assert list(df.columns) == ["id_venta", "fecha", "id_cliente", "importe"]
+    assert df["importe"].iloc[0] == 1250.5 and df["fecha"].iloc[0] == "2024-01-01"
+    pd.testing.assert_frame_equal(
+        mi_analisis.compute_rfm(df, None, None),
+        mi_analisis.compute_rfm(mi_analisis.load_df(p), None, None),
+    )
@@ -0,0 +1,62 @@
+import io
+import threading
+
+import pytest
+
+from src import preload
+
+
+class FakeTTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_get_waits_with_spinner_and_returns_result():
+    pre = preload.Preloader()
+    release = threading.Event()
+    pre.submit("tabla", lambda: release.wait(5) and 42)
+    assert not pre.ready("tabla")
+
+    stream = FakeTTY()
+    threading.Timer(0.05, release.set).start()
+    assert pre.get("tabla", "tabla", stream=stream, interval=0.01) == 42
+    assert "Cargando tabla" in stream.getvalue()
+    assert pre.ready("tabla")
+    # una segunda llamada no vuelve a esperar ni a escribir
+    assert pre.get("tabla", stream=FakeTTY()) == 42
+    pre.shutdown()
+
+
+def test_submit_once_and_errors_propagate():
+    pre = preload.Preloader()
+    calls = []
+    first = pre.submit("x", lambda: calls.append(1))
+    assert pre.submit("x", lambda: calls.append(2)) is first
+    first.result()
+    assert calls == [1]
+
+    pre.submit("falla", lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        pre.get("falla", stream=io.StringIO())
+    pre.shutdown()
+
+
+def test_shutdown_signals_running_loads_and_viewer_shares_it():
+    from tests.test_interactive_menu import load_module_from_path
+
+    viewer = load_module_from_path()
+    assert viewer.Preloader is preload.Preloader
+
+    pre = preload.Preloader(color="\033[93m")
+    started = threading.Event()
+
+    def long_load(stopping):
+        started.set()
+        while not stopping.wait(0.01):
+            pass
+        return "detenida"
+
+    fut = pre.submit("larga", long_load, pre.stopping)
+    started.wait(5)
+    pre.shutdown()
+    assert fut.result(timeout=5) == "detenida"
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from src import mi_analisis, reports
+
+
+def make_tables():
+    ventas = pd.DataFrame(
+        {
+            "id_venta": list(range(1, 13)),
+            "fecha": pd.date_range("2024-01-01", periods=12, freq="15D").astype(str),
+            "id_cliente": [1, 2, 3, 4, 5, 6, 7, 8, 1, 2, 3, 4],
+        }
+    )
+    detalle = pd.DataFrame(
+        {
+            "id_venta": list(range(1, 13)) * 2,
+            "id_producto": [10, 11, 12, 13] * 6,
+            "cantidad": [1, 2, 3] * 8,
+            "precio_unitario": [100.0, 50.0, 20.0, 10.0] * 6,
+        }
+    )
+    clientes = pd.DataFrame(
+        {
+            "id_cliente": list(range(1, 9)),
+            "nombre_cliente": [f"c{i}" for i in range(1, 9)],
+            "ciudad": ["Córdoba", "Rosario"] * 4,
+        }
+    )
+    return ventas, detalle, clientes
+
+
+def test_report_spec_filename_and_expand():
+    specs = reports.expand_specs(["top_products"], regions=[None, "Córdoba"], periods=["2024-Q1"])
+    assert len(specs) == 2
+    assert specs[1].filename() == "top_products__region-C-rdoba__period-2024-Q1.png"
+
+
+def test_build_and_render_pack(tmp_path):
+    ventas, detalle, clientes = make_tables()
+    specs = reports.expand_specs(regions=[None, "Córdoba"], periods=[None, "2024"])
+    jobs = mi_analisis.build_report_jobs(specs, ventas, detalle, clientes, tmp_path)
+    assert len(jobs) == len(specs)
+
+    written = reports.render_reports(jobs, max_workers=2)
+    assert [p.name for p in written] == [s.filename() for s in specs]
+    assert all(p.stat().st_size > 0 for p in written)
+    # no quedan temporales de la escritura atómica
+    assert not list(tmp_path.glob(".*.tmp"))
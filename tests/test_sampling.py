@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import data, sampling
+
+
+def _frame(n=5000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id_venta": np.arange(n),
+        "medio_pago": rng.choice(["efectivo", "tarjeta", "qr"], n, p=[0.8, 0.15, 0.05]),
+        "importe": rng.random(n),
+    })
+
+
+def test_bottom_k_is_reproducible_and_chunk_invariant():
+    df = _frame()
+    one = sampling.reservoir_sample([df], 100, seed=7)
+    chunked = sampling.reservoir_sample([df.iloc[i:i + 333] for i in range(0, len(df), 333)], 100, seed=7)
+    assert one.index.equals(chunked.index) and len(one) == 100
+    assert one.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(one, df.loc[one.index])
+    assert not sampling.reservoir_sample([df], 100, seed=8).index.equals(one.index)
+    assert one.attrs["sample_fraction"] == pytest.approx(100 / 5000)
+
+
+def test_stratified_keeps_n_per_stratum():
+    df = _frame()
+    out = sampling.reservoir_sample([df.iloc[:2500], df.iloc[2500:]], 50, stratify_by="medio_pago", seed=1)
+    assert out["medio_pago"].value_counts().to_dict() == {"efectivo": 50, "tarjeta": 50, "qr": 50}
+    counts = df["medio_pago"].value_counts()
+    assert out.attrs["sample_population"] == {k: int(v) for k, v in counts.items()}
+    assert out.attrs["sample_fraction"]["qr"] == pytest.approx(50 / counts["qr"])
+
+
+def test_load_csv_sample(tmp_path):
+    df = _frame()
+    df.iloc[:2000].to_csv(tmp_path / "ventas_1.csv", index=False)
+    df.iloc[2000:].to_csv(tmp_path / "ventas_2.csv", index=False)
+    out = data.load_csv(tmp_path / "ventas_*.csv", sample=300, seed=2, source_column="archivo")
+    assert len(out) == 300 and out.attrs["sample_population"] == 5000
+    pd.testing.assert_frame_equal(out.drop(columns="archivo"), df.loc[out.index])
+    assert set(out["archivo"].cat.categories) == {"ventas_1.csv", "ventas_2.csv"}
+    # sample larger than the data: everything, fraction 1
+    small = data.load_csv(tmp_path / "ventas_1.csv", sample=10_000)
+    assert len(small) == 2000 and small.attrs["sample_fraction"] == 1.0
+    with pytest.raises(ValueError):
+        data.load_csv(tmp_path / "ventas_1.csv", stratify_by="medio_pago")
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import mi_analisis, shared, synthetic
+
+
+def _frame(n=2000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id_cliente": rng.integers(0, 150, n),
+        "importe": rng.random(n),
+        "fecha": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "medio_pago": pd.Series(rng.choice(["efectivo", "tarjeta", None], n), dtype="str"),
+        "cantidad": pd.array(rng.integers(0, 5, n), dtype="Int64"),
+        "activo": rng.random(n) > 0.5,
+    })
+
+
+def _count_rows(part):
+    return len(part), sorted(set(part["id_cliente"]))
+
+
+def test_attach_is_a_read_only_view_of_the_published_table():
+    df = _frame()
+    with shared.publish(df) as table:
+        one, two = shared.attach(table.spec), shared.attach(table.spec)
+        assert np.shares_memory(one["importe"].to_numpy(), two["importe"].to_numpy())
+        assert np.shares_memory(one["medio_pago"].array.codes, two["medio_pago"].array.codes)
+        with pytest.raises(ValueError):
+            one["importe"].to_numpy()[0] = 1.0
+        assert one["medio_pago"].dtype == "category"
+        restored = one.astype({"medio_pago": df["medio_pago"].dtype, "cantidad": "Int64"})
+        pd.testing.assert_frame_equal(restored, df)
+    with pytest.raises(ValueError):
+        table.frame()
+
+
+def test_key_partitions_keep_each_key_whole():
+    df = _frame()
+    with shared.publish(df, partition_by="id_cliente", partitions=8) as table:
+        parts = shared.map_partitions(table, _count_rows, max_workers=2)
+        assert sum(n for n, _ in parts) == len(df)
+        keys = [k for _, ks in parts for k in ks]
+        assert len(keys) == len(set(keys)) == df["id_cliente"].nunique()
+
+        out = shared.groupby_agg(table, "id_cliente", max_workers=2, total=("importe", "sum"), ultima=("fecha", "max"))
+        expected = df.groupby("id_cliente").agg(total=("importe", "sum"), ultima=("fecha", "max"))
+        pd.testing.assert_frame_equal(out, expected)
+        with pytest.raises(ValueError):
+            shared.groupby_agg(table, "medio_pago", total=("importe", "sum"))
+
+    with shared.publish(df) as table:
+        rows = shared.map_partitions(table, _count_rows, max_workers=1, partitions=3)
+        assert [n for n, _ in rows] == [666, 667, 667]
+
+
+def test_compute_rfm_on_shared_partitions():
+    d = synthetic.generate_dataset(800, seed=4)
+    ventas, detalle, clientes = d["ventas"], d["detalle_ventas"], d["clientes"]
+    expected = mi_analisis.compute_rfm(ventas, detalle, clientes)
+    out = mi_analisis.compute_rfm(ventas, detalle, clientes, max_workers=2)
+    pd.testing.assert_frame_equal(out.reset_index(drop=True), expected.reset_index(drop=True), check_exact=False)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+
+from src import sketch, visual
+
+
+def test_quantile_sketch_accuracy_and_merge():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3, 1, 200_000)
+    a = sketch.QuantileSketch(k=512)
+    b = sketch.QuantileSketch(k=512, seed=1)
+    for chunk in np.array_split(values[:100_000], 10):
+        a.update(chunk)
+    b.update(values[100_000:])
+    a.merge(b)
+
+    assert a.n == len(values)
+    qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+    approx = a.quantile(qs)
+    # rank error: the true CDF at each approximate quantile is close to q
+    ranks = np.searchsorted(np.sort(values), approx) / len(values)
+    assert np.abs(ranks - qs).max() < 0.01
+    assert a.quantile(0) == values.min() and a.quantile(1) == values.max()
+
+
+def test_box_stats_exact_for_small_input():
+    values = np.array([1.0, 2, 3, 4, 5, 6, 7, 8, 9, 10, 40, -30])
+    acc = sketch.BoxStatsAccumulator(max_fliers=100).update(values)
+    stats = acc.stats()
+    ref = cbook.boxplot_stats(values)[0]
+
+    assert stats["whislo"] == ref["whislo"] and stats["whishi"] == ref["whishi"]
+    assert sorted(stats["fliers"]) == sorted(ref["fliers"])
+
+
+def test_box_stats_grouped_over_chunks():
+    df = pd.DataFrame(
+        {
+            "categoria": ["a", "b"] * 50,
+            "precio_unitario": np.arange(100, dtype=float),
+        }
+    )
+    chunks = [df.iloc[:30], df.iloc[30:]]
+    stats = visual.box_stats(chunks, "precio_unitario", by="categoria")
+
+    assert [s["label"] for s in stats] == ["a", "b"]
+    assert [s["n"] for s in stats] == [50, 50]
+    assert stats[0]["whislo"] == 0.0 and stats[1]["whishi"] == 99.0
@@ -0,0 +1,30 @@
+from benchmarks import bench_scaling
+from src import synthetic
+
+
+def test_generate_dataset_schema_keys_and_determinism():
+    a = synthetic.generate_dataset(500, seed=3)
+    b = synthetic.generate_dataset(500, seed=3)
+    for name in synthetic.TABLES:
+        assert a[name].equals(b[name])
+
+    assert list(a["ventas"].columns) == ["id_venta", "fecha", "id_cliente", "nombre_cliente", "email", "medio_pago"]
+    assert list(a["detalle_ventas"].columns) == [
+        "id_venta", "id_producto", "nombre_producto", "cantidad", "precio_unitario", "importe"
+    ]
+    assert a["ventas"]["id_cliente"].isin(a["clientes"]["id_cliente"]).all()
+    assert a["detalle_ventas"]["id_venta"].isin(a["ventas"]["id_venta"]).all()
+    assert a["detalle_ventas"]["id_producto"].isin(a["productos"]["id_producto"]).all()
+    assert 2.5 < len(a["detalle_ventas"]) / len(a["ventas"]) < 3.2
+
+
+def test_find_regressions_against_last_baseline():
+    history = [
+        {"results": [{"func": "clean_df", "scale": 10, "wall_s": 5.0}]},
+        {"results": [{"func": "clean_df", "scale": 10, "wall_s": 1.0}]},
+    ]
+    slow = {"results": [{"func": "clean_df", "scale": 10, "wall_s": 1.5}]}
+    fine = {"results": [{"func": "clean_df", "scale": 10, "wall_s": 1.1}]}
+
+    assert len(bench_scaling.find_regressions(slow, history, tolerance=0.25)) == 1
+    assert bench_scaling.find_regressions(fine, history, tolerance=0.25) == []
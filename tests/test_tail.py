@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+
+from src import mi_analisis, synthetic, tail
+
+
+def _write(path, df, mode="w", header=True):
+    df.to_csv(path, mode=mode, header=header, index=False)
+
+
+def test_only_appended_complete_lines_are_parsed(tmp_path):
+    p = tmp_path / "ventas.csv"
+    p.write_text("id_venta,importe\n1,10\n2,20\n", encoding="utf-8")
+    tailer = tail.Tailer(tmp_path / "state.pkl")
+    collect = tailer.follow(p, tail.Collect())[0]
+
+    first = tailer.poll_file(p)
+    assert first.full and first.reason == "new" and first.rows == 2
+
+    with open(p, "a", encoding="utf-8") as fh:
+        fh.write("3,30\n4,4")  # the last line is still being written
+    delta = tailer.poll_file(p)
+    assert not delta.full and delta.reason == "appended"
+    assert delta.frame["id_venta"].tolist() == [3] and list(delta.frame.index) == [2]
+
+    with open(p, "a", encoding="utf-8") as fh:
+        fh.write("0\n")
+    assert tailer.poll_file(p).frame["importe"].tolist() == [40]
+    assert tailer.poll_file(p).rows == 0
+    pd.testing.assert_frame_equal(collect.value(), pd.read_csv(p))
+
+
+def test_appended_rows_keep_the_detected_number_format(tmp_path):
+    p = tmp_path / "ventas.csv"
+    p.write_text("id_venta;importe\n1;1.250,50\n2;3.000,25\n", encoding="utf-8")
+    tailer = tail.Tailer(tmp_path / "state.pkl")
+    first = tailer.poll_file(p)
+    assert first.frame["importe"].tolist() == [1250.5, 3000.25]
+
+    with open(p, "a", encoding="utf-8") as fh:
+        fh.write("3;1.250\n4;\n")
+    delta = tailer.poll_file(p)
+    assert not delta.full and delta.frame["importe"].dtype == first.frame["importe"].dtype
+    assert delta.frame["importe"].tolist()[0] == 1250.0 and pd.isna(delta.frame["importe"].iloc[1])
+
+
+def test_truncation_rewrite_and_rotation_reload(tmp_path):
+    p = tmp_path / "ventas.csv"
+    p.write_text("id_venta,importe\n1,10\n2,20\n", encoding="utf-8")
+    tailer = tail.Tailer(tmp_path / "state.pkl")
+    profile = tailer.follow(p, tail.Profile())[0]
+    tailer.poll_file(p)
+
+    p.write_text("id_venta,importe\n1,10\n", encoding="utf-8")
+    assert tailer.poll_file(p).reason == "truncated"
+
+    p.write_text("id_venta,importe\n9,90\n5,50\n", encoding="utf-8")
+    delta = tailer.poll_file(p)
+    assert delta.full and delta.reason == "rewritten" and delta.rows == 2
+
+    rotated = tmp_path / "new.csv"
+    rotated.write_text("id_venta,importe\n7,70\n", encoding="utf-8")
+    os.replace(rotated, p)
+    assert tailer.poll_file(p).reason == "rotated"
+    assert profile.rows == 1
+
+
+def test_saved_state_feeds_incremental_rfm(tmp_path):
+    d = synthetic.generate_dataset(600, seed=9)
+    ventas, detalle = d["ventas"], d["detalle_ventas"]
+    pv, pd_ = tmp_path / "ventas.csv", tmp_path / "detalle_ventas.csv"
+    _write(pv, ventas.iloc[:300])
+    _write(pd_, detalle.iloc[:500])
+
+    state_path = tmp_path / "state.pkl"
+    tailer = tail.Tailer.open(state_path)
+    rfm = mi_analisis.RFMState()
+    tailer.follow(pv, rfm.ventas)
+    tailer.follow(pd_, rfm.detalle)
+    tailer.poll()
+    tailer.save()
+
+    _write(pv, ventas.iloc[300:], mode="a", header=False)
+    _write(pd_, detalle.iloc[500:], mode="a", header=False)
+    restored = tail.Tailer.open(state_path)
+    deltas = restored.poll()
+    assert not any(delta.full for delta in deltas.values())
+    assert deltas[str(pv.resolve())].rows == len(ventas) - 300
+
+    rfm = restored.consumers[str(pv.resolve())][0].state
+    expected = mi_analisis.compute_rfm(mi_analisis.load_df(pv), mi_analisis.load_df(pd_), None)
+    pd.testing.assert_frame_equal(rfm.result().reset_index(drop=True), expected.reset_index(drop=True), check_exact=False)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from src import synthetic, validate
+
+
+def test_clean_synthetic_data_passes():
+    tables = synthetic.generate_dataset(400, seed=7)
+    results = validate.validate(tables)
+    assert [r.name for r in results if not r.ok] == []
+
+
+def test_offending_rows_are_reported():
+    t = synthetic.generate_dataset(400, seed=8)
+    ventas, detalle, productos = t["ventas"], t["detalle_ventas"], t["productos"]
+    ventas.loc[5, "id_cliente"] = 999_999
+    lost_id = ventas.loc[7, "id_venta"]
+    ventas.loc[7, "id_venta"] = ventas.loc[8, "id_venta"]
+    detalle.loc[3, "id_producto"] = -1
+    detalle.loc[10, "importe"] += 5
+    detalle.loc[20, "precio_unitario"] = detalle.loc[20, "precio_unitario"] * 2
+    detalle.loc[20, "importe"] = detalle.loc[20, "cantidad"] * detalle.loc[20, "precio_unitario"]
+
+    res = {r.name: r for r in validate.validate(t)}
+    assert res["fk_cliente"].rows.tolist() == [5]
+    assert res["pk_unique:id_venta"].rows.tolist() == [7, 8]
+    assert res["fk_producto"].rows.tolist() == [3]
+    assert res["importe"].rows.tolist() == [10]
+    assert res["precio_catalogo"].rows.tolist() == [20]
+    # el id pisado deja huérfanos a sus detalles
+    assert res["fk_venta"].rows.tolist() == detalle.index[detalle["id_venta"] == lost_id].tolist()
+    assert validate.offenders(res["fk_cliente"], t)["id_cliente"].tolist() == [999_999]
+
+
+def test_string_and_missing_keys():
+    t = synthetic.generate_dataset(50, seed=9)
+    t["ventas"]["id_cliente"] = t["ventas"]["id_cliente"].astype(str)
+    t["ventas"].loc[0, "id_cliente"] = np.nan
+    del t["productos"]
+    res = {r.name: r for r in validate.validate(t)}
+    assert res["fk_cliente"].rows.tolist() == [0]
+    assert res["fk_producto"].skipped and res["precio_catalogo"].skipped
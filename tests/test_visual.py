@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import visual
+
+
+def test_binned_counts_matches_numpy_over_chunks():
+    rng = np.random.default_rng(0)
+    values = rng.normal(10, 2, 5000)
+    edges = np.linspace(values.min(), values.max(), 31)
+    chunks = np.array_split(values, 7)
+
+    counts, n, std = visual.binned_counts(chunks, edges)
+
+    assert (counts == np.histogram(values, bins=edges)[0]).all()
+    assert n == len(values)
+    assert np.isclose(std, values.std(ddof=1))
+
+
+def test_fft_kde_close_to_direct_gaussian_sum():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0, 1, 2000)
+    edges = np.linspace(values.min(), values.max(), 1025)
+    counts, n, std = visual.binned_counts([values], edges)
+    bw = std * n ** (-1 / 5)
+    width = edges[1] - edges[0]
+
+    density = visual.fft_kde(counts, width, bw)
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    direct = np.exp(-0.5 * ((centers[:, None] - values[None, :]) / bw) ** 2).sum(1)
+    direct /= n * bw * np.sqrt(2 * np.pi)
+    assert np.abs(density - direct).max() < 0.01 * direct.max()
+
+
+def test_plot_hist_large_path_same_bars_as_seaborn():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({"importe": rng.lognormal(5, 0.5, 3000)})
+
+    small = visual.plot_hist(df, "importe")
+    large = visual.plot_hist(df, "importe", large=True)
+
+    heights = lambda fig: [p.get_height() for p in fig.axes[0].patches]
+    assert heights(small) == heights(large)
+    assert len(large.axes[0].lines) == 1
+
+
+def test_plot_hist_one_shot_chunks_need_range():
+    rng = np.random.default_rng(3)
+    chunks = [pd.DataFrame({"importe": rng.random(500)}) for _ in range(4)]
+
+    with pytest.raises(ValueError):
+        visual.plot_hist(iter(chunks), "importe")
+    from_list = visual.plot_hist(chunks, "importe")
+    from_iter = visual.plot_hist(iter(chunks), "importe", hist_range=(0, 1))
+
+    total = lambda fig: sum(p.get_height() for p in fig.axes[0].patches)
+    assert total(from_list) == total(from_iter) == 2000